@@ -9,13 +9,15 @@ import argparse
 from datetime import datetime, timezone
 import requests
 from urllib.parse import quote
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from src.config.settings import settings
 from src.agents.stock_research import StockResearchAgent
 from src.db.database import COLLECTIONS
 from src.db.database import async_db
 from src.db.models import Stock
+from src.services.stock_info_prefetcher import StockInfoPrefetcher
+from src.services.yfinance_service import get_default_info_cache
 from src.utils.logging import setup_logging
 
 # Configure logging
@@ -134,13 +136,19 @@ async def fetch_nse_stocks(index: str = "NIFTY 50", force_nse: bool = False) ->
         return []
 
 
-async def analyze_stock(symbol: str, agent: StockResearchAgent, force_llm: bool = False) -> List[Dict[str, Any]]:
+async def analyze_stock(
+    symbol: str,
+    agent: StockResearchAgent,
+    force_llm: bool = False,
+    prefetcher: Optional[StockInfoPrefetcher] = None,
+) -> List[Dict[str, Any]]:
     """Analyze a single stock and save results.
 
     Args:
         symbol: Stock symbol
         agent: Stock research agent instance
         force_llm: If True, force new analysis even if recent forecasts exist
+        prefetcher: Optional prefetcher holding this stock's yfinance data
 
     Returns:
         List of forecasts for the stock, empty list if analysis fails
@@ -149,7 +157,7 @@ async def analyze_stock(symbol: str, agent: StockResearchAgent, force_llm: bool
     try:
         # Get analysis from agent
         logger.info(f"Starting analysis for {symbol} at {start_time} (force_llm={force_llm})")
-        forecasts = await agent.analyze_stock(symbol, force=force_llm)
+        forecasts = await agent.analyze_stock(symbol, force=force_llm, prefetcher=prefetcher)
 
         end_time = datetime.now(timezone.utc)
         duration = (end_time - start_time).total_seconds()
@@ -161,13 +169,19 @@ async def analyze_stock(symbol: str, agent: StockResearchAgent, force_llm: bool
         return []
 
 
-async def process_stocks_with_semaphore(stocks: List[str], force_llm: bool, max_workers: int) -> Dict[str, List[Dict[str, Any]]]:
+async def process_stocks_with_semaphore(
+    stocks: List[str],
+    force_llm: bool,
+    max_workers: int,
+    prefetcher: Optional[StockInfoPrefetcher] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
     """Process stocks with a semaphore to limit concurrent tasks.
     
     Args:
         stocks: List of stock symbols to process
         force_llm: If True, force new analysis even if recent forecasts exist
         max_workers: Maximum number of concurrent tasks
+        prefetcher: Optional prefetcher holding yfinance data for the stocks
         
     Returns:
         Dictionary mapping stock symbols to their forecasts
@@ -188,7 +202,7 @@ async def process_stocks_with_semaphore(stocks: List[str], force_llm: bool, max_
             # Stock at index i uses key at index (i % num_keys)
             api_key_index = stock_index % num_keys if num_keys > 1 else None
             agent = StockResearchAgent(api_key_index=api_key_index)
-            forecasts = await analyze_stock(symbol, agent, force_llm=force_llm)
+            forecasts = await analyze_stock(symbol, agent, force_llm=force_llm, prefetcher=prefetcher)
             results[symbol] = forecasts
     
     # Create tasks for all stocks with their indices
@@ -235,6 +249,18 @@ async def main():
         default=10,
         help="Maximum number of concurrent tasks when processing in parallel (default: 10)"
     )
+    parser.add_argument(
+        "--prefetch-workers",
+        type=int,
+        default=8,
+        help="Threads used to prefetch yfinance data before/while the LLM runs; 0 disables prefetch (default: 8)"
+    )
+    parser.add_argument(
+        "--yf-rate",
+        type=float,
+        default=5.0,
+        help="Maximum yfinance requests per second during prefetch (default: 5)"
+    )
     args = parser.parse_args()
 
     start_time = datetime.now(timezone.utc)
@@ -252,23 +278,37 @@ async def main():
 
     logger.info(f"Found {len(stocks)} stocks in {args.index}")
 
-    if args.parallel:
-        # Process stocks in parallel with worker limit
-        logger.info(f"Processing stocks in parallel with {args.workers} workers")
-        results = await process_stocks_with_semaphore(stocks, args.force_llm, args.workers)
-    else:
-        # Process stocks sequentially
-        logger.info("Processing stocks sequentially")
-        # Get API keys for sequential processing too
-        api_keys = settings.get_google_api_keys() or [settings.google_api_key]
-        num_keys = len(api_keys)
-        results = {}
-        for idx, symbol in enumerate(stocks):
-            # Assign API key based on stock position for even distribution
-            api_key_index = idx % num_keys if num_keys > 1 else None
-            agent = StockResearchAgent(api_key_index=api_key_index)
-            forecasts = await analyze_stock(symbol, agent, force_llm=args.force_llm)
-            results[symbol] = forecasts
+    # Start loading yfinance data for every stock in the background so that
+    # network I/O overlaps with the LLM calls instead of preceding each one
+    prefetcher = None
+    if args.prefetch_workers > 0:
+        prefetcher = StockInfoPrefetcher(
+            max_workers=args.prefetch_workers,
+            requests_per_second=args.yf_rate,
+        )
+        prefetcher.start(stocks)
+
+    try:
+        if args.parallel:
+            # Process stocks in parallel with worker limit
+            logger.info(f"Processing stocks in parallel with {args.workers} workers")
+            results = await process_stocks_with_semaphore(stocks, args.force_llm, args.workers, prefetcher)
+        else:
+            # Process stocks sequentially
+            logger.info("Processing stocks sequentially")
+            # Get API keys for sequential processing too
+            api_keys = settings.get_google_api_keys() or [settings.google_api_key]
+            num_keys = len(api_keys)
+            results = {}
+            for idx, symbol in enumerate(stocks):
+                # Assign API key based on stock position for even distribution
+                api_key_index = idx % num_keys if num_keys > 1 else None
+                agent = StockResearchAgent(api_key_index=api_key_index)
+                forecasts = await analyze_stock(symbol, agent, force_llm=args.force_llm, prefetcher=prefetcher)
+                results[symbol] = forecasts
+    finally:
+        if prefetcher is not None:
+            prefetcher.shutdown()
 
     # Log results
     successful = sum(1 for forecasts in results.values() if forecasts)
@@ -281,6 +321,8 @@ async def main():
         failed_stocks = [symbol for symbol, forecasts in results.items() if not forecasts]
         logger.warning(f"Failed stocks: {', '.join(failed_stocks)}")
 
+    logger.info(f"yfinance info cache stats: {get_default_info_cache().stats()}")
+
     end_time = datetime.now(timezone.utc)
     duration = (end_time - start_time).total_seconds()
     logger.info(f"Completed all stock analysis in {duration:.2f} seconds")
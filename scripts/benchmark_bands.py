@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Compare drift-band settings against the plain minimum-order threshold.
+
+Each basket of an index in ``docs/baskets/`` (or a synthetic basket of
+``--basket-size`` stocks) is bought at the starting capital, then prices
+drift for a number of periods and every setting rebalances its own copy of
+the account after each move. The baseline trades every ticker whose diff
+exceeds ``--min-order-value`` (``solve_rebalance``); band settings trade only
+the tickers outside their band (``plan_band_rebalance``). All settings see
+the same seeded price path and no orders are placed.
+
+Reports, per setting and summed over baskets and periods, the order count,
+turnover and trading costs (always estimated with the cost model), how much
+of each the setting saves against the baseline, and the mean and worst
+deviation from target after rebalancing.
+
+Usage:
+    python scripts/benchmark_bands.py [--bands 1:0 0:25 1:25] [--periods 20] [--to-target] [--with-costs]
+
+Example:
+    python scripts/benchmark_bands.py --basket-size 50 --bands 0.5:0 1:20 --with-costs
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_solver import BASKETS_DIR, invest, load_basket_series, synthetic_prices
+from scripts.rebalance_portfolio import MARGIN_SAFETY_BUFFER
+from src.rebalancing import CostModel, DriftBands, plan_band_rebalance, solve_rebalance
+
+DEFAULT_INDEX = "NIFTY SMALLCAP 250"
+DEFAULT_BANDS = ["0.5:0", "1:0", "0:20", "1:25", "2:0"]
+
+
+def parse_band(spec: str) -> DriftBands:
+    """Parse 'ABS:REL' (both in percent) into drift bands."""
+    try:
+        absolute, relative = (float(part) for part in spec.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid band '{spec}', expected ABS:REL in percent, e.g. 1:25")
+    return DriftBands(absolute=absolute / 100, relative=relative / 100)
+
+
+def synthetic_basket(size: int, rng: random.Random) -> Dict[str, float]:
+    raw = {f"SIM{i:03d}": rng.uniform(0.5, 1.5) for i in range(size)}
+    total = sum(raw.values())
+    return {ticker: weight / total for ticker, weight in raw.items()}
+
+
+def build_settings(args) -> List[Tuple[str, Dict]]:
+    settings = [(f"min order ₹{args.min_order_value:,.0f}", {})]
+    for spec in args.bands:
+        bands = parse_band(spec)
+        settings.append((f"band {bands.describe()} → edge", {"bands": bands, "partial": True}))
+        if args.to_target:
+            settings.append((f"band {bands.describe()} → target", {"bands": bands, "partial": False}))
+    return settings
+
+
+def rebalance_once(setting: Dict, weights: Dict[str, float], prices: Dict[str, float],
+                   quantities: Dict[str, int], cash: float, args, cost_model: CostModel) -> Dict:
+    total = cash + sum(prices[t] * q for t, q in quantities.items())
+    if not setting:
+        solution = solve_rebalance(total, weights, prices, quantities, cash,
+                                   min_order_value=args.min_order_value, buy_cost_buffer=MARGIN_SAFETY_BUFFER)
+    else:
+        solution = plan_band_rebalance(
+            total, weights, prices, quantities, cash, setting["bands"], partial=setting["partial"],
+            min_order_value=args.min_order_value, buy_cost_buffer=MARGIN_SAFETY_BUFFER,
+            cost_model=cost_model if args.with_costs else None,
+        )
+    trades = solution["trades"]
+    return {
+        "quantities": solution["quantities"],
+        "cash": solution["cash_left"],
+        "orders": len(trades),
+        "turnover": sum(abs(q) * prices[t] for t, q in trades.items()),
+        "costs": sum(cost_model.order_cost(abs(q) * prices[t]) for t, q in trades.items()),
+        "deviation_pct": solution["deviation_pct"],
+    }
+
+
+def run_benchmark(args) -> List[Dict]:
+    rng = random.Random(args.seed)
+    if args.basket_size:
+        baskets = [synthetic_basket(args.basket_size, rng) for _ in range(args.baskets)]
+    else:
+        series = load_basket_series(Path(args.baskets_dir))
+        if args.index not in series:
+            raise ValueError(f"No baskets for {args.index} in {args.baskets_dir} (have: {', '.join(sorted(series))})")
+        baskets = series[args.index][:args.baskets]
+
+    cost_model = CostModel()
+    settings = build_settings(args)
+    totals = {name: {"orders": 0, "turnover": 0.0, "costs": 0.0, "deviations": []} for name, _ in settings}
+    for weights in baskets:
+        prices = synthetic_prices(weights, rng)
+        quantities, cash = invest(args.capital, weights, prices)
+        accounts = {name: (dict(quantities), cash) for name, _ in settings}
+        for _ in range(args.periods):
+            prices = {t: round(p * (1 + rng.gauss(0.0, args.drift_pct / 100)), 2) for t, p in prices.items()}
+            for name, setting in settings:
+                result = rebalance_once(setting, weights, prices, *accounts[name], args, cost_model)
+                accounts[name] = (result["quantities"], result["cash"])
+                totals[name]["orders"] += result["orders"]
+                totals[name]["turnover"] += result["turnover"]
+                totals[name]["costs"] += result["costs"]
+                totals[name]["deviations"].append(result["deviation_pct"])
+
+    baseline = totals[settings[0][0]]
+    report = []
+    for name, _ in settings:
+        total = totals[name]
+        report.append({
+            "setting": name,
+            "orders": total["orders"],
+            "orders_saved": baseline["orders"] - total["orders"],
+            "turnover": total["turnover"],
+            "turnover_saved": baseline["turnover"] - total["turnover"],
+            "costs": total["costs"],
+            "costs_saved": baseline["costs"] - total["costs"],
+            "mean_deviation_pct": sum(total["deviations"]) / len(total["deviations"]),
+            "max_deviation_pct": max(total["deviations"]),
+        })
+    return report
+
+
+def print_report(report: List[Dict], args) -> None:
+    def saved(value: float, base: float) -> str:
+        return f"{value / base * 100:>6.1f}%" if base else f"{'-':>7}"
+
+    baseline = report[0]
+    print(f"\n{args.periods} periods of {args.drift_pct}% price drift, capital ₹{args.capital:,.0f}"
+          f"{', band orders cost-checked' if args.with_costs else ''}")
+    print("=" * 124)
+    print(f"{'Setting':<42} {'Orders':>7} {'Saved':>7} {'Turnover ₹':>14} {'Saved':>7} "
+          f"{'Costs ₹':>11} {'Saved':>7} {'Mean dev %':>11} {'Max dev %':>10}")
+    print("-" * 124)
+    for r in report:
+        print(f"{r['setting']:<42} {r['orders']:>7} {saved(r['orders_saved'], baseline['orders'])} "
+              f"{r['turnover']:>14,.0f} {saved(r['turnover_saved'], baseline['turnover'])} "
+              f"{r['costs']:>11,.0f} {saved(r['costs_saved'], baseline['costs'])} "
+              f"{r['mean_deviation_pct']:>11.3f} {r['max_deviation_pct']:>10.3f}")
+    print("=" * 124)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare drift-band rebalancing against the min-order threshold")
+    parser.add_argument("--baskets-dir", default=str(BASKETS_DIR))
+    parser.add_argument("--index", default=DEFAULT_INDEX, help=f"Basket index to replay (default: {DEFAULT_INDEX})")
+    parser.add_argument("--basket-size", type=int, default=0,
+                        help="Use synthetic baskets of this many stocks instead of docs/baskets")
+    parser.add_argument("--baskets", type=int, default=10, help="Number of baskets to simulate (default: 10)")
+    parser.add_argument("--bands", nargs="+", default=DEFAULT_BANDS,
+                        help="Band settings as ABS:REL in percent (percentage points : percent of weight)")
+    parser.add_argument("--to-target", action="store_true", help="Also evaluate each band trading back to target")
+    parser.add_argument("--with-costs", action="store_true",
+                        help="Let band settings drop orders that cost more than the deviation they remove")
+    parser.add_argument("--capital", type=float, default=1_000_000.0, help="Starting capital (default: 1000000)")
+    parser.add_argument("--min-order-value", type=float, default=100.0)
+    parser.add_argument("--periods", type=int, default=20, help="Rebalances per basket (default: 20)")
+    parser.add_argument("--drift-pct", type=float, default=2.0,
+                        help="Standard deviation of price moves per period, in percent (default: 2)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args)
+
+
+if __name__ == "__main__":
+    main()
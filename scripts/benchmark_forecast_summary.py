@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark top-N stock selection from the forecast summary against the forecast aggregation.
+
+Fills a scratch database with a synthetic forecast history (1M forecasts over
+250 stocks by default, with full-size ``reason_summary`` and ``sources``),
+builds the hourly ``forecast_summary`` with the rebuild path, then times
+``PortfolioAgent``'s old aggregation (``top_stocks_pipeline``) against the
+summary lookup for several lookback windows and checks both pick the same
+stocks. It also times the per-insert cost of updating the summary. The
+scratch database is dropped afterwards unless ``--keep`` is given.
+
+Requires a reachable MongoDB (``MONGODB_URI``).
+
+Usage:
+    python scripts/benchmark_forecast_summary.py [--forecasts 1000000] [--since-days 1 7] [--repeat 5]
+
+Example:
+    python scripts/benchmark_forecast_summary.py --forecasts 200000 --keep
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.agents.portfolio import top_stocks_pipeline
+from src.config.settings import settings
+from src.db.database import COLLECTIONS
+from src.db.models import Forecast
+from src.db.repositories import ForecastSummaryRepository
+
+INSERT_BATCH_SIZE = 10_000
+HORIZONS = (7, 30)
+
+
+def synthetic_forecast(ticker: str, created_time: datetime, rng: random.Random) -> Dict:
+    reference_price = round(rng.uniform(50, 5000), 2)
+    gain = rng.gauss(2.0, 6.0)
+    days = rng.choice(HORIZONS)
+    return Forecast(
+        stock_ticker=ticker,
+        invocation_id=ObjectId(),
+        forecast_date=created_time + timedelta(days=days),
+        target_price=round(reference_price * (1 + gain / 100), 2),
+        gain=gain,
+        days=days,
+        reason_summary=" ".join(rng.choice(("margin", "guidance", "order book", "capex", "demand", "valuation",
+                                            "momentum", "earnings", "sector", "rerating")) for _ in range(90)),
+        sources=[f"https://news.example.com/{ticker.lower()}/{rng.getrandbits(40):x}" for _ in range(5)],
+        reference_price=reference_price,
+        created_time=created_time,
+        modified_time=created_time,
+    ).model_dump()
+
+
+async def populate(database, tickers: List[str], args) -> None:
+    """Insert the synthetic history, oldest first, in batches."""
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    span = args.history_days * 86400
+    offsets = sorted((rng.uniform(0, span) for _ in range(args.forecasts)), reverse=True)
+    collection = database[COLLECTIONS["forecasts"]]
+    started = time.perf_counter()
+    for start in range(0, len(offsets), INSERT_BATCH_SIZE):
+        batch = [
+            synthetic_forecast(rng.choice(tickers), now - timedelta(seconds=offset), rng)
+            for offset in offsets[start:start + INSERT_BATCH_SIZE]
+        ]
+        await collection.insert_many(batch, ordered=False)
+        print(f"\r   {start + len(batch):,}/{args.forecasts:,} forecasts", end="", flush=True)
+    print(f"\n   inserted in {time.perf_counter() - started:.1f}s")
+
+
+async def create_indexes(database) -> None:
+    """The forecast and forecast summary indexes of ``setup_indexes``, on the scratch database."""
+    forecasts = database[COLLECTIONS["forecasts"]]
+    await forecasts.create_index([("stock_ticker", 1), ("created_time", -1)])
+    await forecasts.create_index([("stock_ticker", 1), ("forecast_date", 1)])
+    await forecasts.create_index([("gain", -1)])
+    summary = database[COLLECTIONS["forecast_summary"]]
+    await summary.create_index([("stock_ticker", 1), ("days", 1), ("hour", 1)], unique=True)
+    await summary.create_index([("days", 1), ("hour", -1)])
+
+
+async def aggregation_top_stocks(database, tickers: List[str], since_time: datetime, top_n: int) -> List[Dict]:
+    pipeline = top_stocks_pipeline(tickers, since_time, top_n)
+    results = await database[COLLECTIONS["forecasts"]].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+    return [result["forecast"] for result in results]
+
+
+async def summary_top_stocks(database, repository: ForecastSummaryRepository, tickers: List[str],
+                             since_time: datetime, top_n: int) -> List[Dict]:
+    """The summary path of ``PortfolioAgent._get_top_stocks``."""
+    if not await repository.covers(since_time):
+        raise ValueError(f"Forecast summary does not cover the window since {since_time}")
+    summary = await repository.top_stocks(tickers, since_time, top_n, days=7)
+    latest = {
+        forecast["_id"]: forecast
+        for forecast in await database[COLLECTIONS["forecasts"]].find(
+            {"_id": {"$in": [entry["latest_forecast_id"] for entry in summary]}}
+        ).to_list(length=None)
+    }
+    return [
+        {**latest[entry["latest_forecast_id"]], "gain": entry["gain_mean"],
+         "target_price": entry["target_mean"], "forecast_count": entry["count"]}
+        for entry in summary if entry["latest_forecast_id"] in latest
+    ]
+
+
+async def timed_runs(func, repeat: int, *args) -> Tuple[float, List[Dict]]:
+    timings = []
+    result = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+async def insert_overhead(database, repository: ForecastSummaryRepository, tickers: List[str], args) -> Dict:
+    """Median latency of a forecast insert with and without the summary update."""
+    rng = random.Random(args.seed + 1)
+    collection = database[COLLECTIONS["forecasts"]]
+    plain, with_summary = [], []
+    for i in range(args.insert_sample):
+        forecast = Forecast(**synthetic_forecast(rng.choice(tickers), datetime.now(timezone.utc), rng))
+        started = time.perf_counter()
+        result = await collection.insert_one(forecast.model_dump())
+        inserted = time.perf_counter()
+        if i % 2:
+            await repository.record(result.inserted_id, forecast)
+            with_summary.append((time.perf_counter() - started) * 1000)
+        else:
+            plain.append((inserted - started) * 1000)
+    return {"insert_ms": statistics.median(plain), "insert_with_summary_ms": statistics.median(with_summary)}
+
+
+async def run_benchmark(args) -> Dict:
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    database = client[args.db_name]
+    tickers = [f"STK{i:04d}" for i in range(args.tickers)]
+    repository = ForecastSummaryRepository(database)
+    report: Dict = {"forecasts": args.forecasts, "tickers": args.tickers, "windows": []}
+    try:
+        if args.reuse and await database[COLLECTIONS["forecasts"]].estimated_document_count():
+            print(f"♻️  Reusing forecasts in {args.db_name}")
+        else:
+            await client.drop_database(args.db_name)
+            await create_indexes(database)
+            print(f"🧪 Generating {args.forecasts:,} forecasts over {args.history_days} days in {args.db_name}...")
+            await populate(database, tickers, args)
+
+        started = time.perf_counter()
+        buckets = await repository.rebuild()
+        report["rebuild_s"] = time.perf_counter() - started
+        report["summary_buckets"] = buckets
+        print(f"🔁 Rebuilt {buckets:,} summary buckets in {report['rebuild_s']:.1f}s")
+
+        for since_days in args.since_days:
+            since_time = datetime.now(timezone.utc) - timedelta(days=since_days)
+            aggregation_ms, expected = await timed_runs(
+                aggregation_top_stocks, args.repeat, database, tickers, since_time, args.top_n)
+            summary_ms, actual = await timed_runs(
+                summary_top_stocks, args.repeat, database, repository, tickers, since_time, args.top_n)
+            report["windows"].append({
+                "since_days": since_days,
+                "aggregation_ms": aggregation_ms,
+                "summary_ms": summary_ms,
+                "speedup": aggregation_ms / summary_ms if summary_ms else float("inf"),
+                "same_stocks": [f["stock_ticker"] for f in expected] == [f["stock_ticker"] for f in actual],
+                "max_gain_diff": max((abs(e["gain"] - a["gain"]) for e, a in zip(expected, actual)), default=0.0),
+            })
+
+        report.update(await insert_overhead(database, repository, tickers, args))
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db_name)
+        client.close()
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print("\n" + "=" * 84)
+    print(f"{report['forecasts']:,} forecasts, {report['tickers']} stocks, "
+          f"{report['summary_buckets']:,} summary buckets (rebuild {report['rebuild_s']:.1f}s)")
+    print("-" * 84)
+    print(f"{'Window':>8} {'Aggregation (ms)':>17} {'Summary (ms)':>13} {'Speedup':>8} {'Same top N':>11} "
+          f"{'Max gain diff':>14}")
+    for w in report["windows"]:
+        print(f"{w['since_days']:>7}d {w['aggregation_ms']:>17.1f} {w['summary_ms']:>13.1f} {w['speedup']:>7.1f}x "
+              f"{'yes' if w['same_stocks'] else 'NO':>11} {w['max_gain_diff']:>14.6f}")
+    print("-" * 84)
+    print(f"Forecast insert: {report['insert_ms']:.2f} ms | with summary update: "
+          f"{report['insert_with_summary_ms']:.2f} ms (median)")
+    print("=" * 84)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the forecast summary against the forecast aggregation")
+    parser.add_argument("--forecasts", type=int, default=1_000_000, help="Synthetic forecasts (default: 1000000)")
+    parser.add_argument("--tickers", type=int, default=250, help="Distinct stocks (default: 250)")
+    parser.add_argument("--history-days", type=int, default=30, help="Days the history spans (default: 30)")
+    parser.add_argument("--since-days", type=int, nargs="+", default=[1, 7], help="Lookback windows in days")
+    parser.add_argument("--top-n", type=int, default=20, help="Stocks to select (default: 20)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query; the median is reported")
+    parser.add_argument("--insert-sample", type=int, default=200, help="Inserts timed for the update overhead")
+    parser.add_argument("--db-name", default=f"{settings.mongodb_db_name}_forecast_bench",
+                        help="Scratch database (dropped afterwards unless --keep)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database")
+    parser.add_argument("--reuse", action="store_true", help="Reuse forecasts already in the scratch database")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_benchmark(args))
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark the portfolio rebalancer against the offline Kite simulator.
+
+Runs ``PortfolioRebalancer.rebalance`` in live mode against a ``SimulatedKite``
+account for every combination of basket size and portfolio size, and reports
+wall time, Kite API calls, rebalance iterations and the remaining deficit.
+No real orders are placed and no Zerodha credentials are needed.
+
+Usage:
+    python scripts/benchmark_rebalance.py [--basket-sizes 5 10 50] [--portfolio-sizes 0 10 50]
+
+Example:
+    python scripts/benchmark_rebalance.py --latency 0.08 --partial-fill-probability 0.1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.rebalance_portfolio import PortfolioRebalancer
+from src.services.instruments import InstrumentMaster
+from src.services.kite_simulator import SimulatedKite
+from src.services.order_dispatcher import RetryPolicy
+from src.services.zerodha_service import ZerodhaService
+
+
+def build_scenario(basket_size: int, portfolio_size: int, seed: int) -> Dict:
+    """Build prices, a target basket and starting holdings.
+
+    Half of the basket overlaps the current holdings so both buys and sells
+    are needed.
+    """
+    rng = random.Random(seed)
+    universe = [f"SIM{i:03d}" for i in range(basket_size + portfolio_size)]
+    prices = {symbol: round(rng.uniform(100, 3000), 2) for symbol in universe}
+
+    basket = universe[:basket_size]
+    held = universe[basket_size // 2:basket_size // 2 + portfolio_size]
+    holdings = {symbol: rng.randint(1, 200) for symbol in held}
+    holdings_value = sum(prices[s] * q for s, q in holdings.items())
+    cash = holdings_value * 0.2 if holdings else 1_000_000.0
+
+    return {
+        "prices": prices,
+        "holdings": holdings,
+        "cash": cash,
+        "basket": {"stocks": [{"stock_ticker": s, "weight": 1.0 / basket_size} for s in basket]},
+    }
+
+
+def remaining_deficit(kite: SimulatedKite, basket: Dict) -> float:
+    """Sum of |target - current| value across tickers, as a fraction of the portfolio value."""
+    quantities: Dict[str, int] = {}
+    for holding in kite.holdings():
+        quantities[holding["tradingsymbol"]] = holding["opening_quantity"]
+    for position in kite.positions()["net"]:
+        quantities[position["tradingsymbol"]] = quantities.get(position["tradingsymbol"], 0) + position["quantity"]
+    invested = sum(kite.prices[s] * q for s, q in quantities.items())
+    total = invested + kite.margins()["equity"]["net"]
+    targets = {stock["stock_ticker"]: stock["weight"] for stock in basket["stocks"]}
+    deficit = sum(
+        abs(total * targets.get(s, 0.0) - kite.prices[s] * quantities.get(s, 0))
+        for s in set(targets) | set(quantities)
+    )
+    return deficit / total if total else 0.0
+
+
+async def run_case(basket_size: int, portfolio_size: int, args, workdir: Path) -> Dict:
+    """Run one rebalance against a fresh simulated account."""
+    scenario = build_scenario(basket_size, portfolio_size, args.seed)
+    kite = SimulatedKite(
+        prices=scenario["prices"],
+        holdings=scenario["holdings"],
+        cash=scenario["cash"],
+        latency=args.latency,
+        fill_delay=args.fill_delay,
+        partial_fill_probability=args.partial_fill_probability,
+        reject_probability=args.reject_probability,
+        seed=args.seed,
+    )
+    # Each case has its own universe, so it needs its own instrument dump
+    instruments_dir = workdir / f"instruments_{basket_size}_{portfolio_size}"
+    service = ZerodhaService(kite=kite, instrument_master=InstrumentMaster(instruments_dir))
+    rebalancer = PortfolioRebalancer(
+        "SIM001",
+        zerodha_service=service,
+        retry_policy=RetryPolicy(initial_backoff=0.2, max_attempts=5, respect_market_hours=False),
+        respect_market_hours=False,
+        record_intents=False,
+    )
+    rebalancer.order_tracker.poll_interval = args.poll_interval
+
+    basket_file = workdir / f"basket_{basket_size}_{portfolio_size}.json"
+    basket_file.write_text(json.dumps(scenario["basket"]))
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        order_ids = await rebalancer.rebalance(
+            basket_file=str(basket_file),
+            dry_run=False,
+            min_order_value=args.min_order_value,
+            quiet=True,
+            target_deficit=args.target_deficit,
+        )
+    wall = time.perf_counter() - started
+
+    api_calls = dict(kite.api_calls)
+    return {
+        "basket_size": basket_size,
+        "portfolio_size": portfolio_size,
+        "wall_s": wall,
+        "api_calls": sum(api_calls.values()),
+        "order_calls": api_calls.get("place_order", 0),
+        "orders": len(order_ids),
+        "iterations": rebalancer.iterations,
+        "residual_pct": remaining_deficit(kite, scenario["basket"]) * 100,
+        "calls_by_endpoint": api_calls,
+    }
+
+
+def print_report(results: List[Dict]) -> None:
+    print("\n" + "=" * 92)
+    print(f"{'Basket':>6} {'Holdings':>8} {'Wall (s)':>9} {'API calls':>10} {'Order calls':>12} "
+          f"{'Orders':>7} {'Iterations':>11} {'Residual %':>11}")
+    print("-" * 92)
+    for r in results:
+        print(f"{r['basket_size']:>6} {r['portfolio_size']:>8} {r['wall_s']:>9.2f} {r['api_calls']:>10} "
+              f"{r['order_calls']:>12} {r['orders']:>7} {r['iterations']:>11} {r['residual_pct']:>11.2f}")
+    print("=" * 92)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rebalancer against a simulated Kite exchange")
+    parser.add_argument("--basket-sizes", type=int, nargs="+", default=[5, 10, 50])
+    parser.add_argument("--portfolio-sizes", type=int, nargs="+", default=[0, 10, 50],
+                        help="Number of stocks already held (default: 0 10 50)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean seconds per API call (default: 0.05)")
+    parser.add_argument("--fill-delay", type=float, default=0.2, help="Seconds until an order fills (default: 0.2)")
+    parser.add_argument("--partial-fill-probability", type=float, default=0.0)
+    parser.add_argument("--reject-probability", type=float, default=0.0)
+    parser.add_argument("--poll-interval", type=float, default=0.25,
+                        help="Order book poll interval while waiting for fills (default: 0.25)")
+    parser.add_argument("--min-order-value", type=float, default=10.0)
+    parser.add_argument("--target-deficit", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for basket_size in args.basket_sizes:
+            for portfolio_size in args.portfolio_sizes:
+                print(f"Running basket={basket_size} holdings={portfolio_size}...")
+                results.append(await run_case(basket_size, portfolio_size, args, Path(tmp)))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
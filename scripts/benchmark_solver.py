@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark the integer rebalancing solver against the legacy iterative loop.
+
+Replays consecutive baskets of the same index from ``docs/baskets/``: the
+account starts fully invested in the earlier basket, prices drift, and the
+account is then rebalanced into the later basket twice, once with the legacy
+``int(value_diff / price)`` loop (up to 10 iterations, sells before buys,
+buys rejected when cash runs out) and once with ``solve_rebalance``.
+Prices are synthetic and seeded, so runs are reproducible and need no
+market data. "Min" is the number of tickers entering or leaving the basket,
+which every engine has to trade.
+
+Usage:
+    python scripts/benchmark_solver.py [--capital 1000000] [--min-order-value 100] [--order-cost-pct 0.25]
+
+Example:
+    python scripts/benchmark_solver.py --capital 200000 --json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.rebalancing import solve_rebalance
+
+BASKETS_DIR = Path(__file__).parent.parent / "docs" / "baskets"
+
+# Maximum outer iterations of the legacy loop (matches PortfolioRebalancer.rebalance)
+LEGACY_MAX_ITERATIONS = 10
+
+
+def load_basket_series(baskets_dir: Path) -> Dict[str, List[Dict[str, float]]]:
+    """Group basket weights by index, oldest first (baskets without 'stocks' are skipped)."""
+    series = defaultdict(list)
+    for path in sorted(baskets_dir.glob("*.json")):
+        data = json.loads(path.read_text())
+        if not data.get("stocks") or not data.get("creation_date"):
+            continue
+        index = path.name.split("__")[0]
+        weights = {stock["stock_ticker"]: stock["weight"] for stock in data["stocks"]}
+        series[index].append((data["creation_date"], weights))
+    return {index: [weights for _, weights in sorted(baskets)] for index, baskets in series.items()}
+
+
+def synthetic_prices(tickers, rng: random.Random) -> Dict[str, float]:
+    return {ticker: round(rng.uniform(50, 5000), 2) for ticker in sorted(tickers)}
+
+
+def invest(capital: float, weights: Dict[str, float], prices: Dict[str, float]) -> Tuple[Dict[str, int], float]:
+    """Buy a basket with floored quantities; returns (quantities, cash left)."""
+    quantities = {t: int(capital * w // prices[t]) for t, w in weights.items()}
+    return quantities, capital - sum(prices[t] * q for t, q in quantities.items())
+
+
+def deviation(weights: Dict[str, float], prices: Dict[str, float], quantities: Dict[str, int], cash: float) -> float:
+    total = cash + sum(prices[t] * q for t, q in quantities.items())
+    tickers = set(weights) | set(quantities)
+    return sum(abs(total * weights.get(t, 0.0) - prices[t] * quantities.get(t, 0)) for t in tickers)
+
+
+def run_legacy(weights: Dict[str, float], prices: Dict[str, float], quantities: Dict[str, int], cash: float,
+               min_order_value: float, target_deficit: float) -> Dict:
+    """The pre-solver loop: per-ticker int(diff / price), re-planned until the deficit is small."""
+    quantities = dict(quantities)
+    orders = iterations = 0
+    while iterations < LEGACY_MAX_ITERATIONS:
+        total = cash + sum(prices[t] * q for t, q in quantities.items())
+        if deviation(weights, prices, quantities, cash) <= target_deficit:
+            break
+        iterations += 1
+        sells, buys = [], []
+        for ticker in set(weights) | set(quantities):
+            value_diff = total * weights.get(ticker, 0.0) - prices[ticker] * quantities.get(ticker, 0)
+            if abs(value_diff) < min_order_value:
+                continue
+            if value_diff > 0:
+                quantity = int(value_diff / prices[ticker])
+                if quantity > 0:
+                    buys.append((ticker, quantity))
+            else:
+                quantity = min(quantities.get(ticker, 0), int(-value_diff / prices[ticker]))
+                if quantity > 0:
+                    sells.append((ticker, quantity))
+        if not sells and not buys:
+            break
+        for ticker, quantity in sells:
+            quantities[ticker] -= quantity
+            cash += quantity * prices[ticker]
+            orders += 1
+        for ticker, quantity in buys:
+            orders += 1
+            cost = quantity * prices[ticker]
+            if cost > cash:
+                continue  # rejected by the broker for insufficient funds
+            quantities[ticker] = quantities.get(ticker, 0) + quantity
+            cash -= cost
+    return {"iterations": iterations, "orders": orders,
+            "deviation": deviation(weights, prices, quantities, cash), "cash": cash}
+
+
+def run_solver(weights: Dict[str, float], prices: Dict[str, float], quantities: Dict[str, int], cash: float,
+               min_order_value: float, order_cost_pct: float = 0.0) -> Dict:
+    total = cash + sum(prices[t] * q for t, q in quantities.items())
+    solution = solve_rebalance(total, weights, prices, quantities, cash, min_order_value=min_order_value,
+                               order_cost=total * order_cost_pct / 100)
+    return {"iterations": 1, "orders": solution["orders"],
+            "deviation": deviation(weights, prices, solution["quantities"], solution["cash_left"]),
+            "cash": solution["cash_left"]}
+
+
+def timed(func, *args) -> Dict:
+    started = time.perf_counter()
+    result = func(*args)
+    result["time_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def run_benchmark(args) -> List[Dict]:
+    rng = random.Random(args.seed)
+    results = []
+    for index, baskets in sorted(load_basket_series(Path(args.baskets_dir)).items()):
+        for step, (previous, current) in enumerate(zip(baskets, baskets[1:]), start=1):
+            prices = synthetic_prices(set(previous) | set(current), rng)
+            quantities, cash = invest(args.capital, previous, prices)
+            # Prices move between rebalances
+            prices = {t: round(p * (1 + rng.gauss(0.0, args.drift_pct / 100)), 2) for t, p in prices.items()}
+            total = cash + sum(prices[t] * q for t, q in quantities.items())
+
+            legacy = timed(run_legacy, current, prices, quantities, cash, args.min_order_value, args.target_deficit)
+            solver = timed(run_solver, current, prices, quantities, cash, args.min_order_value, args.order_cost_pct)
+            for name, result in (("legacy", legacy), ("solver", solver)):
+                results.append({
+                    "index": index,
+                    "step": step,
+                    "engine": name,
+                    "iterations": result["iterations"],
+                    "orders": result["orders"],
+                    "min_orders": len(set(previous) ^ set(current)),
+                    "residual_pct": result["deviation"] / total * 100,
+                    "cash_left": result["cash"],
+                    "time_ms": result["time_ms"],
+                })
+    return results
+
+
+def print_report(results: List[Dict]) -> None:
+    print("\n" + "=" * 93)
+    print(f"{'Index':<20} {'Step':>4} {'Engine':<7} {'Iterations':>10} {'Orders':>7} {'Min':>4} "
+          f"{'Residual %':>11} {'Cash left':>12} {'Time (ms)':>10}")
+    print("-" * 93)
+    for r in results:
+        print(f"{r['index']:<20} {r['step']:>4} {r['engine']:<7} {r['iterations']:>10} {r['orders']:>7} "
+              f"{r['min_orders']:>4} {r['residual_pct']:>11.3f} {r['cash_left']:>12,.0f} {r['time_ms']:>10.2f}")
+    print("=" * 93)
+
+    print("\n📊 Averages")
+    for engine in ("legacy", "solver"):
+        rows = [r for r in results if r["engine"] == engine]
+        if not rows:
+            continue
+        print(f"   {engine:<7} iterations {sum(r['iterations'] for r in rows) / len(rows):.2f} | "
+              f"orders {sum(r['orders'] for r in rows) / len(rows):.2f} "
+              f"({sum(r['orders'] - r['min_orders'] for r in rows) / len(rows):.2f} beyond min) | "
+              f"residual {sum(r['residual_pct'] for r in rows) / len(rows):.3f}% | "
+              f"time {sum(r['time_ms'] for r in rows) / len(rows):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rebalancing solver on historical baskets")
+    parser.add_argument("--baskets-dir", default=str(BASKETS_DIR))
+    parser.add_argument("--capital", type=float, default=1_000_000.0, help="Starting capital (default: 1000000)")
+    parser.add_argument("--min-order-value", type=float, default=100.0)
+    parser.add_argument("--order-cost-pct", type=float, default=0.0,
+                        help="Solver skips orders correcting less than this percent of the portfolio (default: 0)")
+    parser.add_argument("--target-deficit", type=float, default=1000.0,
+                        help="Legacy loop stops below this total deficit (default: 1000)")
+    parser.add_argument("--drift-pct", type=float, default=3.0,
+                        help="Standard deviation of price moves between baskets, in percent (default: 3)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
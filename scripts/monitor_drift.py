@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Watch an account's weight drift against a basket and rebalance only on band breaches.
+
+Holds the basket and the account's holdings, follows live prices (Kite ticker
+with ``--stream-prices``, otherwise one LTP request every ``--poll-interval``
+seconds) and runs a drift-band rebalance (``rebalance_portfolio.py`` with the
+same ``--band-*`` options) whenever a ticker leaves its band, at most once per
+``--cooldown`` seconds. Outside market hours it sleeps until the next open.
+
+``--simulate`` runs offline against a simulated account holding the basket,
+with random-walk prices and simulated fills, so the trigger logic can be
+watched without Kite.
+
+Usage:
+    python scripts/monitor_drift.py <basket_json_file> [--user-id USER_ID] [--live]
+                                    [--band-abs PP] [--band-rel PCT] [--stream-prices]
+
+Example:
+    python scripts/monitor_drift.py docs/baskets/"NIFTY SMALLCAP 250__Aug_18_2025_03_17__N50_K10.json" \\
+        --band-abs 1 --band-rel 25 --simulate --duration 60 --cooldown 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.rebalance_portfolio import PortfolioRebalancer, get_user_id, rebalancer_options, start_price_feed
+from src.services.drift_monitor import DEFAULT_COOLDOWN, DEFAULT_POLL_INTERVAL, DriftMonitor
+from src.services.instruments import InstrumentMaster
+from src.services.kite_simulator import SimulatedKite
+from src.services.price_feed import FakeTickSource, PriceTable
+from src.services.zerodha_service import ZerodhaService
+from src.utils.logging import get_logger
+from src.utils.market_hours import now_ist
+
+logger = get_logger(__name__)
+
+# Default band when neither --band-abs nor --band-rel is given, in percentage points
+DEFAULT_BAND_ABS = 1.0
+SIMULATED_CAPITAL = 1_000_000.0
+
+
+def build_simulation(target_weights: Dict[str, float], seed: int) -> Tuple[SimulatedKite, ZerodhaService]:
+    """A simulated account invested in the basket at synthetic prices."""
+    rng = random.Random(seed)
+    prices = {ticker: round(rng.uniform(100, 3000), 2) for ticker in sorted(target_weights)}
+    holdings = {ticker: int(SIMULATED_CAPITAL * weight // prices[ticker]) for ticker, weight in target_weights.items()}
+    cash = SIMULATED_CAPITAL - sum(prices[t] * q for t, q in holdings.items())
+    kite = SimulatedKite(prices=prices, holdings=holdings, cash=cash, latency=0.0, fill_delay=0.05, seed=seed)
+    service = ZerodhaService(kite=kite, instrument_master=InstrumentMaster(Path(tempfile.mkdtemp())))
+    return kite, service
+
+
+async def simulate_ticks(kite: SimulatedKite, price_table: PriceTable, volatility_pct: float,
+                         interval: float, seed: int) -> None:
+    """Random-walk the simulated prices, pushing every move into the price table."""
+    rng = random.Random(seed)
+    source = FakeTickSource(price_table, seed=seed)
+    while True:
+        for symbol, price in list(kite.prices.items()):
+            price = round(price * (1 + rng.gauss(0.0, volatility_pct / 100)), 2)
+            kite.prices[symbol] = price
+            source.push(f"NSE:{symbol}", price)
+        await asyncio.sleep(interval)
+
+
+def print_status(monitor: DriftMonitor) -> None:
+    status = monitor.status()
+    worst = status['max_drift_ticker']
+    print(f"📈 ₹{status['total_value']:,.0f} | {status['updates']} price updates, {status['sweeps']} full checks | "
+          f"largest drift {worst or '-'} {status['max_drift'] * 100:+.2f}pp | "
+          f"{len(status['breaches'])} outside band | {status['rebalances']} rebalances")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebalance when portfolio weight drift leaves a band")
+    parser.add_argument("basket_file", help="Path to basket JSON file")
+    parser.add_argument("--user-id", help="Zerodha user ID (if not provided, will use stored token or authenticate)")
+    parser.add_argument("--live", action="store_true", help="Place actual orders when triggered (default: dry run)")
+    parser.add_argument("--quiet", action="store_true", help="Run in quiet non-interactive mode")
+    parser.add_argument("--min-order-value", type=float, default=100.0,
+                        help="Minimum order value in rupees (default: 100)")
+    parser.add_argument("--target-deficit", type=float, default=1000.0,
+                        help="Drift beyond the bands (rupees) at which a triggered rebalance stops (default: 1000)")
+    parser.add_argument("--band-abs", type=float, default=None,
+                        help=f"Band in percentage points of target weight (default: {DEFAULT_BAND_ABS} "
+                             "unless --band-rel is given)")
+    parser.add_argument("--band-rel", type=float, default=None, help="Band in percent of target weight")
+    parser.add_argument("--band-to-target", action="store_true",
+                        help="Trade breaching tickers to target instead of to the band edge")
+    parser.add_argument("--band-costs", action="store_true", help="Apply the cost model when rebalancing")
+    parser.add_argument("--stream-prices", action="store_true", help="Follow prices over the Kite WebSocket ticker")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f"Seconds between LTP requests when not streaming (default: {DEFAULT_POLL_INTERVAL:.0f})")
+    parser.add_argument("--cooldown", type=float, default=DEFAULT_COOLDOWN,
+                        help=f"Minimum seconds between rebalances (default: {DEFAULT_COOLDOWN:.0f})")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--max-rebalances", type=int, default=None, help="Stop after this many rebalances")
+    parser.add_argument("--status-interval", type=float, default=60.0,
+                        help="Seconds between status lines (default: 60)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Run offline against a simulated account with random-walk prices")
+    parser.add_argument("--sim-volatility-pct", type=float, default=0.3,
+                        help="Simulated move per tick, in percent (default: 0.3)")
+    parser.add_argument("--sim-tick-interval", type=float, default=0.5,
+                        help="Seconds between simulated ticks (default: 0.5)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not Path(args.basket_file).exists():
+        print(f"❌ Basket file not found: {args.basket_file}")
+        sys.exit(1)
+    with open(args.basket_file, 'r') as f:
+        target_weights = {stock['stock_ticker']: stock['weight'] for stock in json.load(f)['stocks']}
+    if args.band_abs is None and args.band_rel is None:
+        args.band_abs = DEFAULT_BAND_ABS
+    options = rebalancer_options(args)
+    # Simulated accounts always trade, so the effect of each rebalance on drift can be followed
+    dry_run = not (args.live or args.simulate)
+
+    price_feed = None
+    tick_task = None
+    status_task = None
+    zerodha_service: Optional[ZerodhaService] = None
+    price_table: Optional[PriceTable] = None
+    try:
+        if args.simulate:
+            user_id = "SIM001"
+            kite, zerodha_service = build_simulation(target_weights, args.seed)
+            price_table = PriceTable()
+            tick_task = asyncio.create_task(
+                simulate_ticks(kite, price_table, args.sim_volatility_pct, args.sim_tick_interval, args.seed)
+            )
+        else:
+            user_id = await get_user_id(args.user_id, quiet=args.quiet)
+            zerodha_service = ZerodhaService()
+            if args.stream_prices:
+                price_feed = await start_price_feed([user_id], args.basket_file)
+                price_table = price_feed.price_table
+
+        if not dry_run and not args.quiet and not args.simulate:
+            confirm = input(f"\n⚠️  Place live orders whenever drift leaves {options['drift_bands'].describe()}? (yes/no): ")
+            if confirm.lower() != 'yes':
+                print("❌ Monitoring cancelled")
+                return
+
+        async def trigger(event: Dict[str, Any]) -> Dict[str, Any]:
+            print(f"\n🚨 {len(event['breaches'])} tickers outside band: "
+                  + ", ".join(f"{t} {d * 100:+.2f}pp" for t, d in sorted(event['breaches'].items())))
+            rebalancer = PortfolioRebalancer(
+                user_id,
+                zerodha_service=zerodha_service,
+                price_table=price_table,
+                respect_market_hours=not args.simulate,
+                record_intents=not args.simulate,
+                run_label=f"drift-{now_ist():%H%M%S}",
+                **options,
+            )
+            with contextlib.redirect_stdout(io.StringIO()) if args.quiet or args.simulate else contextlib.nullcontext():
+                order_ids = await rebalancer.rebalance(
+                    basket_file=args.basket_file,
+                    dry_run=dry_run,
+                    min_order_value=args.min_order_value,
+                    quiet=True,
+                    target_deficit=args.target_deficit,
+                )
+            print(f"⚖️  Rebalance {'planned (dry run)' if dry_run else 'done'}: {len(order_ids)} orders placed")
+            return {'orders': len(order_ids), 'iterations': rebalancer.iterations}
+
+        monitor = DriftMonitor(
+            zerodha_service,
+            user_id,
+            target_weights,
+            options['drift_bands'],
+            trigger,
+            price_table=price_table,
+            poll_interval=args.poll_interval,
+            cooldown=args.cooldown,
+            respect_market_hours=not args.simulate,
+            max_rebalances=args.max_rebalances,
+        )
+
+        async def report_status():
+            while True:
+                await asyncio.sleep(args.status_interval)
+                print_status(monitor)
+
+        status_task = asyncio.create_task(report_status())
+        print(f"👀 Monitoring {len(target_weights)} basket tickers for {user_id}: bands "
+              f"{options['drift_bands'].describe()}, cooldown {args.cooldown:.0f}s, "
+              f"{'streaming' if price_table is not None else f'polling every {args.poll_interval:.0f}s'}, "
+              f"{'DRY RUN' if dry_run else 'LIVE'}")
+        rebalances = await monitor.run(duration=args.duration)
+        print_status(monitor)
+        print(f"\n✅ Monitoring stopped after {len(rebalances)} rebalances")
+        if any(event['error'] for event in rebalances):
+            sys.exit(1)
+
+    except KeyboardInterrupt:
+        print("\n❌ Monitoring cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Drift monitor failed: {e}")
+        print(f"❌ Drift monitor failed: {e}")
+        sys.exit(1)
+    finally:
+        for task in (tick_task, status_task):
+            if task is not None:
+                task.cancel()
+        if price_feed is not None:
+            price_feed.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
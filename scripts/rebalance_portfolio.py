@@ -7,6 +7,7 @@ It connects to the Zerodha Kite API to fetch current holdings and place orders.
 
 Usage:
     python scripts/rebalance_portfolio.py <basket_json_file> [--user-id USER_ID] [--dry-run] [--min-order-value MIN_VALUE]
+    python scripts/rebalance_portfolio.py <basket_json_file> (--all-accounts | --user-ids ID [ID ...]) [--live]
 
 Example:
     python scripts/rebalance_portfolio.py docs/baskets/NIFTY_50__Jul_27_2025_22_04__N20_K5.json --dry-run
@@ -16,89 +17,130 @@ import argparse
 import asyncio
 import json
 import sys
+import time
+import uuid
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
-from datetime import datetime, timedelta, time as dt_time
-from zoneinfo import ZoneInfo
 
 # Add src to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.config.settings import settings
+from src.db.models import PlannedOrder, RebalancePlan
+from src.db.repositories import OrderIntentRepository, RebalancePlanRepository
+from src.rebalancing import CostModel, DriftBands, plan_band_rebalance, solve_rebalance
+from src.services.auth_server import start_postback_server
+from src.services.order_dispatcher import OrderDispatcher, RetryPolicy, summarize_latencies
+from src.services.order_tracker import OrderTracker
+from src.services.portfolio_state import PortfolioState, holdings_from_summary
+from src.services.price_feed import DEFAULT_MAX_AGE, KiteTickerFeed, PriceTable
 from src.services.zerodha_service import ZerodhaService, authenticate_user
 from src.utils.logging import get_logger
+from src.utils.market_hours import (
+    MARKET_ARM_TIME,
+    is_market_open_ist,
+    next_market_open,
+    next_session_time,
+    now_ist,
+    sleep_until,
+)
 
 logger = get_logger(__name__)
 
+# Fraction of cash kept aside when sizing buys (charges and price moves on market orders)
+MARGIN_SAFETY_BUFFER = 0.01
 
-IST = ZoneInfo("Asia/Kolkata")
-MARKET_OPEN = dt_time(hour=9, minute=15)
-MARKET_PREOPEN_TARGET = dt_time(hour=9, minute=14)
-MARKET_CLOSE = dt_time(hour=15, minute=30)
+# Default limit-price buffers for after-market orders, in percent of the last close
+AMO_BUY_BUFFER_PCT = 1.0
+AMO_SELL_BUFFER_PCT = 1.0
 
+# A shared price snapshot is refetched once older than this, so every read stays within DEFAULT_MAX_AGE
+SNAPSHOT_REFRESH_AGE = DEFAULT_MAX_AGE - 10.0
 
-def now_ist() -> datetime:
-    return datetime.now(IST)
 
+class SharedPriceSnapshot:
+    """One LTP snapshot shared by every account of a multi-account run.
 
-def is_weekday(d: datetime) -> bool:
-    # Monday=0, Sunday=6
-    return d.weekday() < 5
-
-
-def is_market_open_ist(current: Optional[datetime] = None) -> bool:
-    """Return True if current IST time is during market hours (9:15-15:30) on a weekday."""
-    current = current or now_ist()
-    if not is_weekday(current):
-        return False
-    t = current.time()
-    return (t >= MARKET_OPEN) and (t < MARKET_CLOSE)
+    The first account to need prices after the snapshot has aged past
+    ``SNAPSHOT_REFRESH_AGE`` refetches it with a single request; accounts
+    planning at about the same time (e.g. right after the pre-open wait)
+    read the same prices.
+    """
 
+    def __init__(self, zerodha_service: ZerodhaService, user_id: str, instruments: List[str]):
+        self.zerodha_service = zerodha_service
+        self.user_id = user_id
+        self.instruments = instruments
+        self.price_table = PriceTable()
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
 
-def next_9_14_ist(after: Optional[datetime] = None) -> datetime:
-    """Compute the next 9:14 AM IST on a weekday starting from 'after'.
-    Special case: if time is between 9:14 and 9:15 on a weekday, return 'after' (immediate, no wait).
-    """
-    after = after or now_ist()
-
-    # If weekday and between 09:14 and 09:15, start immediately (no wait)
-    if is_weekday(after):
-        t = after.time()
-        if MARKET_PREOPEN_TARGET <= t < MARKET_OPEN:
-            return after
-        if t < MARKET_PREOPEN_TARGET:
-            return datetime.combine(after.date(), MARKET_PREOPEN_TARGET, tzinfo=IST)
-
-    # Otherwise, schedule for next weekday at 09:14
-    date = after.date()
-    if is_weekday(after):
-        # If it's a weekday but already past market open, move to next day
-        date = date + timedelta(days=1)
-    # For weekends, the while loop below will advance to next weekday
-    target_dt = datetime.combine(date, MARKET_PREOPEN_TARGET, tzinfo=IST)
-    while target_dt.weekday() >= 5:  # 5=Sat, 6=Sun
-        date = date + timedelta(days=1)
-        target_dt = datetime.combine(date, MARKET_PREOPEN_TARGET, tzinfo=IST)
-    return target_dt
-
-
-async def sleep_until(target_dt: datetime):
-    """Async sleep until target datetime."""
-    while True:
-        now = now_ist()
-        seconds = (target_dt - now).total_seconds()
-        if seconds <= 0:
-            break
-        # Sleep in chunks to allow graceful interruption
-        await asyncio.sleep(min(seconds, 60.0))
+    async def refresh(self) -> PriceTable:
+        """Refetch the snapshot unless it is recent enough, and return its price table."""
+        async with self._lock:
+            if self._fetched_at is not None and time.monotonic() - self._fetched_at < SNAPSHOT_REFRESH_AGE:
+                return self.price_table
+            try:
+                prices = await self.zerodha_service.get_ltp(self.user_id, self.instruments)
+            except Exception as e:
+                # Each rebalancer fetches what the table is missing itself
+                logger.warning(f"Shared price snapshot refresh failed: {e}")
+                return self.price_table
+            for instrument, quote in prices.items():
+                self.price_table.update(instrument, quote['last_price'])
+            self._fetched_at = time.monotonic()
+            print(f"📸 Price snapshot for {len(prices)}/{len(self.instruments)} instruments")
+        return self.price_table
 
 
 class PortfolioRebalancer:
     """Main class for portfolio rebalancing operations."""
     
-    def __init__(self, user_id: Optional[str] = None):
-        self.zerodha_service = ZerodhaService()
+    def __init__(self, user_id: Optional[str] = None, use_postbacks: bool = False,
+                 price_table: Optional[PriceTable] = None,
+                 zerodha_service: Optional[ZerodhaService] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 respect_market_hours: bool = True,
+                 plan_repository: Optional[RebalancePlanRepository] = None,
+                 record_intents: bool = True,
+                 drift_bands: Optional[DriftBands] = None,
+                 band_partial: bool = True,
+                 cost_model: Optional[CostModel] = None,
+                 order_cost_pct: float = 0.0,
+                 run_label: Optional[str] = None,
+                 run_id: Optional[str] = None,
+                 price_snapshot: Optional[SharedPriceSnapshot] = None):
+        self.zerodha_service = zerodha_service or ZerodhaService()
+        # Order intents persisted in Mongo so a restarted run never re-sends a placed order
+        self.intent_log = OrderIntentRepository() if record_intents else None
+        # Persisted after-market plans
+        self.plan_repository = plan_repository or RebalancePlanRepository()
         self.user_id = user_id
+        self.retry_policy = retry_policy
+        # Simulated exchanges trade around the clock
+        self.respect_market_hours = respect_market_hours
+        self.iterations = 0
+        # Every dispatch result of the run, for reporting
+        self.dispatch_results: List[Dict] = []
+        # Live prices streamed from the Kite ticker, or a snapshot shared with other accounts
+        self.price_snapshot = price_snapshot
+        self.price_table = price_snapshot.price_table if price_snapshot is not None else price_table
+        # Fill state of placed orders; polled from the order book unless postbacks are delivered
+        self.order_tracker = OrderTracker(self.zerodha_service, user_id, use_polling=not use_postbacks)
+        # Holdings and cash, loaded once and then kept current from fills
+        self.portfolio_state = PortfolioState(self.zerodha_service, user_id, order_tracker=self.order_tracker)
+        # Drift-band mode: only trade tickers outside their band (back to the edge when partial)
+        self.drift_bands = drift_bands
+        self.band_partial = band_partial
+        self.cost_model = cost_model
+        # Outside drift-band mode: skip orders that correct less than this percent of the portfolio
+        self.order_cost_pct = order_cost_pct
+        # Distinguishes several runs of the same basket on one day (e.g. drift-triggered) in order tags
+        self.run_label = run_label
+        # Per-run nonce in order tags: a new run places its orders afresh, a resumed run
+        # (same ID) adopts the orders it already placed
+        self.run_id = run_id or new_run_id()
         
     async def load_basket(self, basket_file: str) -> Dict:
         """Load target basket allocation from JSON file."""
@@ -117,45 +159,7 @@ class PortfolioRebalancer:
     async def get_current_portfolio(self) -> Dict:
         """Get current portfolio holdings and positions."""
         portfolio = await self.zerodha_service.get_portfolio_summary(self.user_id)
-        
-        # Convert holdings to a more usable format
-        current_holdings = {}
-        for holding in portfolio['holdings']:
-            ticker = holding['tradingsymbol']
-            current_holdings[ticker] = {
-                'quantity': int(holding.get('opening_quantity') or 0),
-                'average_price': float(holding['average_price']),
-                # Per API: use last_price for value computations
-                'current_value': float(holding.get('last_price') or 0.0) * int(holding.get('opening_quantity') or 0),
-                'ltp': float(holding.get('last_price', holding['average_price'])),
-                'exchange': holding.get('exchange', 'NSE')
-            }
-        
-        # Add positions using net positions (per API, 'net' is actual current portfolio)
-        for position in portfolio['positions']['net']:
-            ticker = position['tradingsymbol']
-            exchange = position.get('exchange', 'NSE')
-            qty = int(position.get('quantity') or 0)
-            ltp = float(position.get('last_price', position.get('average_price', 0.0)))
-            multiplier = int(position.get('multiplier') or 1)
-            if ticker in current_holdings:
-                # Update quantity if position exists
-                current_holdings[ticker]['quantity'] += qty
-                # Update latest ltp and exchange if available
-                current_holdings[ticker]['ltp'] = ltp or current_holdings[ticker]['ltp']
-                current_holdings[ticker]['exchange'] = current_holdings[ticker].get('exchange') or exchange
-            elif qty != 0:
-                # Add new position
-                current_holdings[ticker] = {
-                    'quantity': qty,
-                    'average_price': float(position.get('average_price') or 0.0),
-                    # For positions, value = last_price * quantity * multiplier
-                    'current_value': ltp * qty * multiplier,
-                    'ltp': ltp,
-                    'exchange': exchange
-                }
-        
-        portfolio['current_holdings'] = current_holdings
+        portfolio['current_holdings'] = holdings_from_summary(portfolio)
         return portfolio
     
     async def calculate_rebalancing_actions(self, basket_data: Dict, portfolio: Dict, 
@@ -163,18 +167,18 @@ class PortfolioRebalancer:
         """Calculate rebalancing orders and return (actions, total_deficit_amount).
 
         total_deficit_amount is the sum over all tickers of |target_value - current_value|,
-        using current LTPs and current quantities. Actions are only created for deficits
-        above min_order_value.
+        using current LTPs and current quantities. Order quantities come from the integer
+        solver, which sizes every trade at once within the available cash and never
+        creates an order below min_order_value or, with an order_cost_pct set, one that
+        corrects less than that percent of the portfolio. In drift-band mode only tickers outside
+        their band are traded and total_deficit_amount is the drift beyond the bands.
         """
         target_weights = {stock['stock_ticker']: stock['weight'] for stock in basket_data['stocks']}
         current_holdings = portfolio['current_holdings']
-        total_value = portfolio['total_value']
         
-        logger.info(f"Total portfolio value: ₹{total_value:,.2f}")
         logger.info(f"Target allocation has {len(target_weights)} stocks")
         logger.info(f"Current holdings have {len(current_holdings)} stocks")
         
-        actions = []
         total_deficit_amount = 0.0
         
         # Get current LTP for all relevant stocks using their exchange when known
@@ -187,7 +191,17 @@ class PortfolioRebalancer:
             instruments.append(f"{ex}:{ticker}")
         
         try:
-            ltp_data = await self.zerodha_service.get_ltp(self.user_id, instruments)
+            # Streamed prices need no request; only instruments without a fresh tick are fetched
+            ltp_data = {}
+            if self.price_snapshot is not None:
+                await self.price_snapshot.refresh()
+            if self.price_table is not None:
+                ltp_data = {
+                    inst: {'last_price': ltp} for inst, ltp in self.price_table.get_ltps(instruments).items()
+                }
+            missing = [inst for inst in instruments if inst not in ltp_data]
+            if missing:
+                ltp_data.update(await self.zerodha_service.get_ltp(self.user_id, missing))
         except Exception as e:
             logger.error(f"Failed to get LTP: {e}")
             # Fallback to using average prices
@@ -199,68 +213,82 @@ class PortfolioRebalancer:
                         'last_price': current_holdings[ticker]['ltp']
                     }
         
-        # Calculate required actions for each stock
-        deficits = []  # List of (deficit_value, action) tuples for prioritization
-        
+        # Resolve a price for every ticker
+        prices = {}
         for ticker in all_tickers:
-            target_weight = target_weights.get(ticker, 0.0)
-            target_value = total_value * target_weight
-            
-            current_quantity = current_holdings.get(ticker, {}).get('quantity', 0)
-            
-            # Get current price
-            ex = ticker_to_exchange.get(ticker, 'NSE')
-            ltp_key = f"{ex}:{ticker}"
+            ltp_key = f"{ticker_to_exchange.get(ticker, 'NSE')}:{ticker}"
             if ltp_key in ltp_data:
-                current_price = float(ltp_data[ltp_key]['last_price'])
+                prices[ticker] = float(ltp_data[ltp_key]['last_price'])
             elif ticker in current_holdings:
-                current_price = current_holdings[ticker]['ltp']
+                prices[ticker] = current_holdings[ticker]['ltp']
             else:
                 logger.warning(f"No price available for {ticker}, skipping")
-                continue
-            
-            current_value = current_quantity * current_price
-            
-            # Calculate difference
-            value_diff = target_value - current_value
+        
+        current_quantities = {ticker: holding.get('quantity', 0) for ticker, holding in current_holdings.items()}
+        # Value the portfolio at the prices the trades are sized with, not those captured at load time
+        total_value = portfolio.get('available_cash', 0.0) + sum(
+            quantity * prices.get(ticker, current_holdings[ticker]['ltp'])
+            for ticker, quantity in current_quantities.items()
+        )
+        logger.info(f"Total portfolio value: ₹{total_value:,.2f}")
+        for ticker, price in prices.items():
+            value_diff = total_value * target_weights.get(ticker, 0.0) - current_quantities.get(ticker, 0) * price
             total_deficit_amount += abs(value_diff)
-            
-            if abs(value_diff) < min_order_value:
-                logger.info(f"{ticker}: No action needed (diff: ₹{value_diff:.2f})")
-                continue
-            
-            # Determine transaction type
-            if value_diff > 0:
-                # Need to buy more
-                quantity_to_buy = int(value_diff / current_price)
-                if quantity_to_buy > 0:
-                    action = {
-                        'ticker': ticker,
-                        'action': 'BUY',
-                        'quantity': quantity_to_buy,
-                        'price': current_price,
-                        'value': quantity_to_buy * current_price,
-                        'target_weight': target_weight,
-                        'current_weight': current_value / total_value if total_value > 0 else 0,
-                        'deficit': value_diff
-                    }
-                    deficits.append((value_diff, action))
-                    
-            else:
-                # Need to sell
-                quantity_to_sell = min(current_quantity, int(abs(value_diff) / current_price))
-                if quantity_to_sell > 0:
-                    action = {
-                        'ticker': ticker,
-                        'action': 'SELL',
-                        'quantity': quantity_to_sell,
-                        'price': current_price,
-                        'value': quantity_to_sell * current_price,
-                        'target_weight': target_weight,
-                        'current_weight': current_value / total_value if total_value > 0 else 0,
-                        'deficit': value_diff
-                    }
-                    deficits.append((abs(value_diff), action))
+        
+        if self.drift_bands is not None:
+            # Only tickers outside their band trade; the deficit that counts is the part outside the bands
+            solution = plan_band_rebalance(
+                total_value,
+                target_weights,
+                prices,
+                current_quantities,
+                cash=portfolio.get('available_cash', 0.0),
+                bands=self.drift_bands,
+                partial=self.band_partial,
+                min_order_value=min_order_value,
+                buy_cost_buffer=MARGIN_SAFETY_BUFFER,
+                cost_model=self.cost_model,
+            )
+            total_deficit_amount = solution['band_excess']
+            logger.info(f"Drift bands ({self.drift_bands.describe()}): {len(solution['breaches'])} tickers outside, "
+                        f"₹{solution['band_excess']:,.2f} beyond the bands, {solution['orders']} orders, "
+                        f"estimated costs ₹{solution['costs']:,.2f}")
+        else:
+            # Solve for whole-share targets within the available cash in one pass
+            solution = solve_rebalance(
+                total_value,
+                target_weights,
+                prices,
+                current_quantities,
+                cash=portfolio.get('available_cash', 0.0),
+                min_order_value=min_order_value,
+                buy_cost_buffer=MARGIN_SAFETY_BUFFER,
+                order_cost=total_value * self.order_cost_pct / 100,
+            )
+        logger.info(f"Solver: {solution['orders']} orders, residual deviation ₹{solution['deviation']:,.2f} "
+                    f"({solution['deviation_pct']:.2f}%), cash left ₹{solution['cash_left']:,.2f}")
+        
+        deficits = []  # List of (deficit_value, action) tuples for prioritization
+        for ticker, quantity_change in solution['trades'].items():
+            target_weight = target_weights.get(ticker, 0.0)
+            current_quantity = current_quantities.get(ticker, 0)
+            current_price = prices[ticker]
+            current_value = current_quantity * current_price
+            value_diff = total_value * target_weight - current_value
+            quantity = abs(quantity_change)
+            action = {
+                'ticker': ticker,
+                'exchange': ticker_to_exchange.get(ticker, 'NSE'),
+                'action': 'BUY' if quantity_change > 0 else 'SELL',
+                'quantity': quantity,
+                'price': current_price,
+                'value': quantity * current_price,
+                'target_weight': target_weight,
+                'current_weight': current_value / total_value if total_value > 0 else 0,
+                'current_quantity': current_quantity,
+                'deficit': value_diff
+            }
+            deficits.append((abs(value_diff), action))
         
         # Sort by deficit (highest first) to prioritize most out-of-balance positions
         deficits.sort(key=lambda x: x[0], reverse=True)
@@ -268,69 +296,149 @@ class PortfolioRebalancer:
         
         return actions, total_deficit_amount
     
-    async def _wait_for_market_window_if_needed(self):
-        """If outside market hours, wait until 9:14 AM IST of next trading day."""
-        current = now_ist()
-        if is_market_open_ist(current):
-            return
-        target = next_9_14_ist(current)
-        pretty_date = target.strftime("%Y-%m-%d")
-        print("\n⏳ Market is closed. Waiting until 9:14 AM IST to start placing orders...")
-        print(f"   Current IST time: {current.strftime('%Y-%m-%d %H:%M:%S')} | Target: {target.strftime('%Y-%m-%d %H:%M:%S')}")
-        await sleep_until(target)
-        print("🕘 It's 9:14 AM IST. Preparing to place orders and will retry until market opens at 9:15.")
-
-    async def _place_order_with_retries(self, action: Dict) -> Optional[str]:
-        """Place an order with systematic retries around market open and transient failures.
-
-        Strategy:
-        - If before 9:15, retry every 2-5 seconds until 9:16.
-        - After 9:16, use backoff retries up to a reasonable limit.
-        - Stop retrying if market closes (15:30 IST) for the day.
-        """
-        max_backoff_seconds = 60
-        backoff = 2.0
-        attempt = 0
-        start_time = now_ist()
-        cutoff_close = datetime.combine(start_time.date(), MARKET_CLOSE, tzinfo=IST)
+    def _reprice_with_live_prices(self, actions: List[Dict]) -> List[Dict]:
+        """Recompute order quantities against streamed prices right before placement.
 
-        while True:
-            # Stop if market closed for the current day
-            if now_ist() >= cutoff_close:
-                logger.warning(f"Market closed before completing order for {action['ticker']}")
+        The planned order value is kept, so the solver's rounding carries over.
+        """
+        repriced = []
+        for action in actions:
+            entry = self.price_table.get(f"{action.get('exchange', 'NSE')}:{action['ticker']}")
+            if entry is None:
+                repriced.append(action)
+                continue
+            price = entry['last_price']
+            quantity = round(action['value'] / price)
+            if action['action'] == 'SELL':
+                quantity = min(action['current_quantity'], quantity)
+            if quantity <= 0:
+                logger.info(f"Dropping {action['action']} {action['ticker']}: nothing to trade at live price ₹{price:.2f}")
+                continue
+            if quantity != action['quantity']:
+                logger.info(f"{action['action']} {action['ticker']}: {action['quantity']} -> {quantity} at live price ₹{price:.2f}")
+            repriced.append({**action, 'quantity': quantity, 'price': price, 'value': quantity * price})
+        return repriced
+    
+    async def _apply_margin_preflight(self, actions: List[Dict], available_cash: float,
+                                      include_sell_proceeds: bool = True) -> List[Dict]:
+        """Check the planned basket against available funds and shrink buys if short.
+        
+        The whole basket is priced with one basket-margin request (at the limit
+        price for limit orders). Funds are the available cash plus, unless
+        ``include_sell_proceeds`` is False (orders that all execute later), the
+        expected proceeds of the planned sells; when the required margin exceeds
+        them, every buy quantity is scaled down by the same factor.
+        """
+        buys = [a for a in actions if a['action'] == 'BUY']
+        if not buys:
+            return actions
+        
+        sell_proceeds = sum(a['value'] for a in actions if a['action'] == 'SELL') if include_sell_proceeds else 0.0
+        buy_value = sum(a['quantity'] * (a.get('limit_price') or a['price']) for a in buys)
+        try:
+            margins = await self.zerodha_service.get_basket_margins(self.user_id, [
+                {
+                    'exchange': a.get('exchange', 'NSE'),
+                    'tradingsymbol': a['ticker'],
+                    'transaction_type': a['action'],
+                    'quantity': a['quantity'],
+                    'product': 'CNC',
+                    'order_type': a.get('order_type', 'MARKET'),
+                    'price': a.get('limit_price') or a['price'],
+                }
+                for a in buys
+            ])
+            required = float(margins['final']['total'])
+        except Exception as e:
+            logger.warning(f"Basket margin check unavailable, using planned buy value: {e}")
+            required = buy_value
+        
+        funds = (available_cash + sell_proceeds) * (1 - MARGIN_SAFETY_BUFFER)
+        print(f"\n💰 Margin check: required ₹{required:,.2f} | available ₹{available_cash:,.2f} "
+              f"+ sell proceeds ₹{sell_proceeds:,.2f}")
+        if required <= funds:
+            return actions
+        
+        scale = max(funds, 0.0) / required
+        print(f"⚠️  Short by ₹{required - funds:,.2f}; scaling buy quantities to {scale:.1%}")
+        resized = []
+        for action in actions:
+            if action['action'] == 'BUY':
+                quantity = int(action['quantity'] * scale)
+                if quantity <= 0:
+                    logger.info(f"Dropping BUY {action['ticker']}: no quantity left after margin scaling")
+                    continue
+                action = {**action, 'quantity': quantity, 'value': quantity * action['price']}
+            resized.append(action)
+        return resized
+    
+    async def _arm_before_open(self, quiet: bool = False) -> Optional[datetime]:
+        """Wait for the pre-open window and prepare everything except the orders.
+        
+        Sleeps until 09:10 IST of the next trading day (after pre-open price
+        discovery), then validates the Kite session and loads the instrument
+        master, so only planning on fresh prices and placement remain. Returns
+        the market open to fire the plan at, or None if the user declined.
+        """
+        current = now_ist()
+        arm_at = next_session_time(MARKET_ARM_TIME, current)
+        open_at = next_market_open(current)
+        print("\n⏳ Market is closed. The order plan will be armed before the open and fired at 9:15 AM IST.")
+        print(f"   Current IST time: {current.strftime('%Y-%m-%d %H:%M:%S')} | Arm: {arm_at.strftime('%Y-%m-%d %H:%M:%S')} "
+              f"| Open: {open_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        # Nobody may be at the terminal by 09:10, so confirm now
+        if not quiet:
+            confirm = input("Type 'CONFIRM' to place the plan computed at the open: ")
+            if confirm != 'CONFIRM':
+                print("❌ Orders cancelled.")
                 return None
-
+        
+        await sleep_until(arm_at)
+        started = time.monotonic()
+        print(f"🕘 Arming at {now_ist().strftime('%H:%M:%S')} IST: validating session and loading instruments...")
+        kite = await self.zerodha_service.get_authenticated_kite(self.user_id)
+        # Other exchanges in the plan are loaded (from the day's cache) when it is validated
+        await self.zerodha_service.instrument_master.ensure_loaded('NSE', kite)
+        print(f"   Session and instruments ready in {time.monotonic() - started:.1f}s")
+        return open_at
+    
+    async def _validate_plan(self, actions: List[Dict]) -> List[Dict]:
+        """Drop orders the instrument master rejects (unknown symbol, lot size, freeze quantity)."""
+        instrument_master = self.zerodha_service.instrument_master
+        try:
+            kite = await self.zerodha_service.get_authenticated_kite(self.user_id)
+            for exchange in sorted({a.get('exchange', 'NSE') for a in actions}):
+                await instrument_master.ensure_loaded(exchange, kite)
+        except Exception as e:
+            logger.warning(f"Instrument master unavailable, placing orders unvalidated: {e}")
+            return actions
+        
+        valid = []
+        for action in actions:
             try:
-                order_id = await self.zerodha_service.place_order(
-                    user_id=self.user_id,
-                    variety='regular',
-                    exchange='NSE',
-                    tradingsymbol=action['ticker'],
-                    transaction_type=action['action'],
-                    quantity=action['quantity'],
-                    product='CNC',  # Cash and Carry for delivery
-                    order_type='MARKET'  # Market order for immediate execution
-                )
-                return order_id
-            except Exception as e:
-                attempt += 1
-                err_msg = str(e)
-                now = now_ist()
-                # Determine retry interval
-                if now.time() < MARKET_OPEN:
-                    # Before market open, retry quickly
-                    sleep_secs = 3.0
-                else:
-                    # After open, exponential backoff up to 60s
-                    sleep_secs = min(backoff, max_backoff_seconds)
-                    backoff = min(backoff * 1.7, max_backoff_seconds)
-
-                logger.warning(f"Order attempt {attempt} for {action['ticker']} failed: {err_msg}. Retrying in {sleep_secs:.0f}s...")
-                await asyncio.sleep(sleep_secs)
+                instrument_master.validate_order(action['ticker'], action['quantity'], action.get('exchange', 'NSE'))
+            except ValueError as e:
+                print(f"❌ Dropping {action['action']} {action['ticker']}: {e}")
+                continue
+            valid.append(action)
+        return valid
 
-    async def execute_orders(self, actions: List[Dict], dry_run: bool = True, quiet: bool = False) -> List[str]:
-        """Execute the calculated rebalancing orders."""
+    async def execute_orders(self, actions: List[Dict], dry_run: bool = True, quiet: bool = False,
+                             available_cash: Optional[float] = None,
+                             open_at: Optional[datetime] = None,
+                             plan_id: Optional[str] = None) -> List[str]:
+        """Execute the calculated rebalancing orders.
+        
+        If ``available_cash`` is given, buys are first sized to fit the funds
+        reported by the basket margin pre-flight check. With ``open_at`` (an
+        armed pre-open plan, already confirmed), the validated plan is held
+        until the market opens and then fired. ``plan_id`` seeds the order
+        tags used to deduplicate placement.
+        """
         order_ids = []
+        if available_cash is not None:
+            actions = await self._apply_margin_preflight(actions, available_cash)
         # Execute sell orders first to free up cash, while preserving internal priority
         ordered_actions = [a for a in actions if a['action'] == 'SELL'] + [a for a in actions if a['action'] == 'BUY']
         
@@ -366,8 +474,10 @@ class PortfolioRebalancer:
             print(f"\n✅ Dry run completed. {len(ordered_actions)} orders planned.")
             return order_ids
         
-        # Confirm before executing
-        if not quiet:
+        # Confirm before executing (an armed plan was confirmed before the wait)
+        if open_at is not None:
+            print(f"\n🎯 Plan armed with {len(ordered_actions)} orders.")
+        elif not quiet:
             print(f"\n⚠️  Ready to place {len(ordered_actions)} orders on Zerodha.")
             confirm = input("Type 'CONFIRM' to proceed: ")
             if confirm != 'CONFIRM':
@@ -376,40 +486,40 @@ class PortfolioRebalancer:
         else:
             print("\n⚠️  Quiet mode enabled: auto-confirming order placement.")
         
-        # If market is closed, wait until 9:14 AM IST and then begin retries
-        await self._wait_for_market_window_if_needed()
-
+        ordered_actions = await self._validate_plan(ordered_actions)
+        
+        if open_at is not None:
+            print(f"⏳ Holding until the open at {open_at.strftime('%H:%M:%S')} IST...")
+            await sleep_until(open_at)
+        
         print("\n🚀 Placing orders...")
+        fired_at = open_at.timestamp() if open_at is not None else time.time()
         
-        # Execute orders with prioritization
-        for i, action in enumerate(ordered_actions, 1):
-            try:
-                print(f"[{i}/{len(actions)}] Placing {action['action']} order for {action['ticker']}...")
-                order_id = await self._place_order_with_retries(action)
-                if not order_id:
-                    print(f"⚠️  Skipping {action['ticker']} as market closed before successful placement.")
-                    continue
-
-                order_ids.append(order_id)
-                print(f"✅ Order placed successfully. Order ID: {order_id}")
-                
-                # Small delay between orders
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Failed to place order for {action['ticker']}: {e}")
-                print(f"❌ Failed to place order for {action['ticker']}: {e}")
-                
-                # Ask if user wants to continue
-                if i < len(ordered_actions):
-                    if not quiet:
-                        continue_trading = input("Continue with remaining orders? (y/n): ")
-                        if continue_trading.lower() != 'y':
-                            break
-                    else:
-                        print("Quiet mode: continuing with remaining orders...")
-                        continue
+        if self.price_table is not None:
+            ordered_actions = self._reprice_with_live_prices(ordered_actions)
+        
+        # Sells go out first, then buys; each phase is concurrent within Kite's rate limit
+        dispatcher = OrderDispatcher(self.zerodha_service, self.user_id, retry_policy=self.retry_policy,
+                                     intent_log=self.intent_log)
+        results = await dispatcher.dispatch(ordered_actions, tracker=self.order_tracker, plan_id=plan_id)
+        self.dispatch_results.extend(results)
         
+        for i, result in enumerate(results, 1):
+            if result['status'] == 'PLACED':
+                order_ids.append(result['order_id'])
+                print(f"[{i}/{len(results)}] ✅ {result['action']} {result['ticker']}: "
+                      f"Order ID {result['order_id']} ({result['latency_ms']:.0f} ms, "
+                      f"{result['attempts']} attempt{'s' if result['attempts'] != 1 else ''})")
+            else:
+                print(f"[{i}/{len(results)}] ❌ {result['action']} {result['ticker']}: {result['error']}")
+        
+        latency = summarize_latencies(results)
+        if latency['placed']:
+            print(f"\n⏱️  Placement latency: p50 {latency['p50_ms']:.0f} ms, max {latency['max_ms']:.0f} ms")
+            last_placed = max(r['placed_at'] for r in results if r['status'] == 'PLACED')
+            label = "Open → last order placed" if open_at is not None else "Dispatch → last order placed"
+            print(f"⏱️  {label}: {last_placed - fired_at:.2f}s")
+            logger.info(f"{label}: {last_placed - fired_at:.2f}s for {latency['placed']} orders")
         print(f"\n✅ Rebalancing completed. {len(order_ids)} orders placed successfully.")
         return order_ids
     
@@ -423,9 +533,16 @@ class PortfolioRebalancer:
         print("=" * 50)
         print(f"Basket file: {basket_file}")
         print(f"User ID: {self.user_id}")
+        print(f"Run ID: {self.run_id}")
         print(f"Mode: {'DRY RUN' if dry_run else 'LIVE'}")
         print(f"Min order value: ₹{min_order_value}")
         print(f"Target deficit: ₹{target_deficit}")
+        if self.order_cost_pct and self.drift_bands is None:
+            print(f"Order cost: {self.order_cost_pct}% of the portfolio per order")
+        if self.drift_bands is not None:
+            print(f"Drift bands: {self.drift_bands.describe()} "
+                  f"({'to band edge' if self.band_partial else 'to target'}"
+                  f"{', with costs' if self.cost_model else ''})")
         print(f"Quiet mode: {'ON' if quiet else 'OFF'}")
         print()
         
@@ -434,11 +551,20 @@ class PortfolioRebalancer:
 
         overall_order_ids: List[str] = []
         attempt = 0
+        
+        # Outside market hours, arm the plan before the open instead of waking up at 9:14
+        open_at = None
+        if not dry_run and self.respect_market_hours and not is_market_open_ist():
+            open_at = await self._arm_before_open(quiet)
+            if open_at is None:
+                return overall_order_ids
+            # A portfolio loaded before the wait (e.g. seeded at startup) may be a day old
+            self.portfolio_state.loaded = False
 
         while True:
             attempt += 1
-            print(f"\n📊 Fetching current portfolio (attempt {attempt})...")
-            portfolio = await self.get_current_portfolio()
+            self.iterations = attempt
+            portfolio = await self._refresh_portfolio_state(attempt)
 
             print("⚖️  Calculating rebalancing actions and total deficit...")
             actions, total_deficit = await self.calculate_rebalancing_actions(
@@ -451,7 +577,7 @@ class PortfolioRebalancer:
                 break
 
             if not actions:
-                print("ℹ️  No actionable orders (all diffs below min order value). Stopping.")
+                print("ℹ️  No actionable orders (remaining diffs below min order value or order cost). Stopping.")
                 break
 
             if dry_run:
@@ -459,14 +585,227 @@ class PortfolioRebalancer:
                 break
 
             # Execute orders
-            order_ids = await self.execute_orders(actions, dry_run, quiet)
+            order_ids = await self.execute_orders(
+                actions, dry_run, quiet, available_cash=portfolio['available_cash'], open_at=open_at,
+                plan_id=self._plan_id(basket_file, attempt),
+            )
+            open_at = None
             overall_order_ids.extend(order_ids)
 
+            # Converge on fills: only re-plan when something did not fill in full
+            print(f"\n⏳ Waiting for {len(order_ids)} orders to fill...")
+            fills = await self.order_tracker.wait_for(order_ids)
+            for order in fills:
+                print(f"   {order['action']:<4} {order['ticker']:<12} {order['status']:<10} "
+                      f"{order['filled_quantity']}/{order['quantity']}"
+                      + (f" @ ₹{order['average_price']:.2f}" if order['average_price'] else "")
+                      + (f" ({order['status_message']})" if order['status_message'] else ""))
+            self.portfolio_state.apply_fills(self.order_tracker, order_ids)
+            if order_ids and len(order_ids) == len(actions) and self.order_tracker.fully_filled(order_ids):
+                print("✅ All planned orders filled in full. Stopping.")
+                break
+
             if attempt >= 10:
                 print("⚠️  Reached maximum attempts (10). Stopping.")
                 break
 
+        if overall_order_ids:
+            await self._reconcile_portfolio_state()
+
         return overall_order_ids
+    
+    def _plan_id(self, basket_file: str, round_label) -> str:
+        """Identify a plan by account, trading day, basket, run and round.
+
+        Resuming a run (same ``run_id``) re-derives the same order tags, so its
+        already placed orders are adopted instead of sent again; any other run
+        gets tags of its own.
+        """
+        if self.run_label:
+            round_label = f"{self.run_label}:{round_label}"
+        return (f"{self.user_id}:{now_ist().date().isoformat()}:{Path(basket_file).name}:"
+                f"{self.run_id}:{round_label}")
+    
+    async def _refresh_portfolio_state(self, attempt: int) -> Dict:
+        """Return the portfolio for an iteration, fetching it only when needed.
+        
+        The first iteration loads the account; later ones use the state kept
+        current from fills, unless it may have diverged (an order with an
+        unknown outcome), in which case it is reconciled first.
+        """
+        if not self.portfolio_state.loaded:
+            print(f"\n📊 Fetching current portfolio (attempt {attempt})...")
+            await self.portfolio_state.load()
+        elif attempt == 1:
+            print(f"\n📊 Using portfolio fetched at startup (attempt {attempt})")
+        elif self.portfolio_state.needs_reconcile:
+            print(f"\n📊 Order outcomes uncertain; reconciling portfolio (attempt {attempt})...")
+            await self._reconcile_portfolio_state()
+        else:
+            print(f"\n📊 Using portfolio updated from fills (attempt {attempt})")
+        return self.portfolio_state.snapshot()
+    
+    async def _reconcile_portfolio_state(self) -> None:
+        """Reload the account from Kite and report differences from the fill-based state."""
+        mismatches = await self.portfolio_state.reconcile()
+        if not mismatches:
+            print("🔎 Portfolio reconciled: matches the fills")
+            return
+        print(f"⚠️  Portfolio reconciled: {len(mismatches)} differences from the fills")
+        for mismatch in mismatches:
+            print(f"   {mismatch['ticker']:<12} expected {mismatch['expected']} | actual {mismatch['actual']}")
+
+    
+    async def submit_amo(self, basket_file: str, dry_run: bool = True, min_order_value: float = 100.0,
+                         quiet: bool = False, buy_buffer_pct: float = AMO_BUY_BUFFER_PCT,
+                         sell_buffer_pct: float = AMO_SELL_BUFFER_PCT) -> Optional[str]:
+        """Plan the rebalance now and submit it as after-market LIMIT orders.
+        
+        Buys are limited at the last close plus ``buy_buffer_pct`` and sells
+        at the last close minus ``sell_buffer_pct`` (rounded to the tick size).
+        Buys are sized against cash only, since no sell executes before the
+        open. The plan and its order IDs are stored in the ``rebalance_plans``
+        collection for ``scripts/reconcile_orders.py``; the process can exit
+        right after submission.
+        
+        Returns:
+            ID of the stored plan, or None if nothing was submitted
+        """
+        current = now_ist()
+        if self.respect_market_hours and is_market_open_ist(current):
+            raise ValueError("After-market orders are only accepted outside market hours; run without --amo")
+        
+        print("Portfolio Rebalancing Tool (after-market orders)")
+        print("=" * 50)
+        print(f"Basket file: {basket_file}")
+        print(f"User ID: {self.user_id}")
+        print(f"Run ID: {self.run_id}")
+        print(f"Mode: {'DRY RUN' if dry_run else 'LIVE'}")
+        print(f"Limit buffers: buy +{buy_buffer_pct:.2f}% | sell -{sell_buffer_pct:.2f}% of last close")
+        print()
+        
+        basket_data = await self.load_basket(basket_file)
+        if not self.portfolio_state.loaded:
+            await self.portfolio_state.load()
+        portfolio = self.portfolio_state.snapshot()
+        actions, total_deficit = await self.calculate_rebalancing_actions(basket_data, portfolio, min_order_value)
+        print(f"📉 Total deficit: ₹{total_deficit:,.2f}")
+        if not actions:
+            print("ℹ️  No actionable orders. Nothing to submit.")
+            return None
+        
+        instrument_master = self.zerodha_service.instrument_master
+        kite = await self.zerodha_service.get_authenticated_kite(self.user_id)
+        for exchange in sorted({a.get('exchange', 'NSE') for a in actions}):
+            await instrument_master.ensure_loaded(exchange, kite)
+        
+        amo_actions = []
+        for action in actions:
+            buffer_pct = buy_buffer_pct if action['action'] == 'BUY' else -sell_buffer_pct
+            limit_price = instrument_master.round_to_tick(
+                action['ticker'], action['price'] * (1 + buffer_pct / 100), action.get('exchange', 'NSE')
+            )
+            amo_actions.append({**action, 'variety': 'amo', 'order_type': 'LIMIT', 'limit_price': limit_price})
+        amo_actions = await self._apply_margin_preflight(
+            amo_actions, portfolio['available_cash'], include_sell_proceeds=False
+        )
+        amo_actions = await self._validate_plan(amo_actions)
+        ordered_actions = ([a for a in amo_actions if a['action'] == 'SELL']
+                           + [a for a in amo_actions if a['action'] == 'BUY'])
+        
+        market_date = next_market_open(current).date().isoformat()
+        print(f"\nAfter-market orders for {market_date} ({len(ordered_actions)} total):")
+        print("-" * 80)
+        for i, action in enumerate(ordered_actions, 1):
+            print(f"{i:2d}. {action['action']:<4} {action['quantity']:>6} × {action['ticker']:<12} "
+                  f"LIMIT ₹{action['limit_price']:>9.2f} (last ₹{action['price']:.2f})")
+        
+        if not ordered_actions:
+            print("No orders left to submit.")
+            return None
+        if dry_run:
+            print(f"\n✅ Dry run completed. {len(ordered_actions)} after-market orders planned.")
+            return None
+        if not quiet:
+            confirm = input(f"\nType 'CONFIRM' to submit {len(ordered_actions)} after-market orders: ")
+            if confirm != 'CONFIRM':
+                print("❌ Orders cancelled.")
+                return None
+        
+        # Retries stop after a few attempts: the AMO window has no open to wait for
+        retry_policy = self.retry_policy or RetryPolicy(max_attempts=3, respect_market_hours=False)
+        dispatcher = OrderDispatcher(self.zerodha_service, self.user_id, retry_policy=retry_policy,
+                                     intent_log=self.intent_log)
+        results = await dispatcher.dispatch(ordered_actions, plan_id=self._plan_id(basket_file, 'amo'))
+        self.dispatch_results.extend(results)
+        
+        orders = []
+        for action, result in zip(ordered_actions, results):
+            placed = result['status'] == 'PLACED'
+            orders.append(PlannedOrder(
+                ticker=action['ticker'],
+                exchange=action.get('exchange', 'NSE'),
+                action=action['action'],
+                quantity=action['quantity'],
+                planned_price=action['price'],
+                limit_price=action['limit_price'],
+                order_id=result['order_id'],
+                status='PLACED' if placed else 'FAILED',
+                error=result['error'],
+            ))
+            mark = '✅' if placed else '❌'
+            print(f"{mark} {action['action']} {action['ticker']}: {result['order_id'] or result['error']}")
+        
+        plan = RebalancePlan(
+            user_id=self.user_id,
+            basket_file=str(basket_file),
+            market_date=market_date,
+            orders=orders,
+        )
+        plan_id = await self.plan_repository.insert(plan)
+        placed_count = sum(1 for order in orders if order.status == 'PLACED')
+        print(f"\n✅ Submitted {placed_count}/{len(orders)} after-market orders. Plan ID: {plan_id}")
+        print(f"   After the open, run: python scripts/reconcile_orders.py --plan-id {plan_id}")
+        return plan_id
+
+
+def new_run_id() -> str:
+    """Short random ID distinguishing one rebalance run from another in order tags."""
+    return uuid.uuid4().hex[:8]
+
+
+async def collect_instruments(zerodha_service: ZerodhaService, user_ids: List[str],
+                              basket_file: str) -> Tuple[List[str], Dict[str, Dict]]:
+    """Collect every basket instrument and every instrument held by the given accounts.
+    
+    Returns:
+        (instruments, portfolio summary per user ID), so the summaries can
+        seed each account's portfolio state instead of being fetched again
+    """
+    with open(basket_file, 'r') as f:
+        instruments = {f"NSE:{stock['stock_ticker']}" for stock in json.load(f)['stocks']}
+    portfolios = await asyncio.gather(
+        *(zerodha_service.get_portfolio_summary(user_id) for user_id in user_ids)
+    )
+    for portfolio in portfolios:
+        for holding in portfolio['holdings'] + portfolio['positions']['net']:
+            instruments.add(f"{holding.get('exchange', 'NSE')}:{holding['tradingsymbol']}")
+    return sorted(instruments), dict(zip(user_ids, portfolios))
+
+
+async def start_price_feed(user_ids: List[str], basket_file: str,
+                           instruments: Optional[List[str]] = None) -> KiteTickerFeed:
+    """Start streaming prices for every basket and holding instrument of the given accounts."""
+    zerodha_service = ZerodhaService()
+    kite = await zerodha_service.get_authenticated_kite(user_ids[0])
+    await zerodha_service.instrument_master.ensure_loaded("NSE", kite)
+    
+    if instruments is None:
+        instruments, _ = await collect_instruments(zerodha_service, user_ids, basket_file)
+    feed = KiteTickerFeed(settings.zerodha_api_key, kite.access_token, zerodha_service.instrument_master)
+    await feed.start(instruments)
+    print(f"📡 Streaming live prices for {len(instruments)} instruments")
+    return feed
 
 
 async def get_user_id(provided_user_id: Optional[str], quiet: bool = False) -> str:
@@ -484,9 +823,7 @@ async def get_user_id(provided_user_id: Optional[str], quiet: bool = False) -> s
             print("Starting authentication process...")
     
     # Check if there are any stored tokens
-    from src.db.database import db, COLLECTIONS
-    
-    stored_tokens = list(db[COLLECTIONS["zerodha_tokens"]].find({"is_active": True}))
+    stored_tokens = await zerodha_service.tokens.list_active()
     
     if stored_tokens and not provided_user_id:
         if quiet:
@@ -525,6 +862,153 @@ async def get_user_id(provided_user_id: Optional[str], quiet: bool = False) -> s
     return user_id
 
 
+async def get_user_ids(requested_user_ids: Optional[List[str]]) -> List[str]:
+    """Resolve the accounts to rebalance: the requested ones, or every active stored account."""
+    zerodha_service = ZerodhaService()
+    if requested_user_ids:
+        candidates = list(dict.fromkeys(requested_user_ids))
+    else:
+        candidates = [token['user_id'] for token in await zerodha_service.tokens.list_active()]
+    
+    # Validate every account's session concurrently
+    tokens = await asyncio.gather(*(zerodha_service.get_stored_token(user_id) for user_id in candidates))
+    user_ids = []
+    for user_id, token in zip(candidates, tokens):
+        if token:
+            user_ids.append(user_id)
+        else:
+            print(f"❌ Skipping {user_id}: no valid token (authenticate this account separately)")
+    return user_ids
+
+
+def print_consolidated_report(reports: List[Dict]):
+    """Print one line per account plus totals."""
+    print("\n" + "=" * 100)
+    print("CONSOLIDATED REBALANCING REPORT")
+    print("=" * 100)
+    print(f"{'Account':<12} {'Status':<8} {'Iter':>4} {'Placed':>7} {'Failed':>7} "
+          f"{'Bought ₹':>14} {'Sold ₹':>14} {'Wall (s)':>9}  Error")
+    print("-" * 100)
+    totals = {'placed': 0, 'failed': 0, 'bought': 0.0, 'sold': 0.0}
+    for report in reports:
+        totals['placed'] += report['placed']
+        totals['failed'] += report['failed']
+        totals['bought'] += report['bought']
+        totals['sold'] += report['sold']
+        print(f"{report['user_id']:<12} {report['status']:<8} {report['iterations']:>4} {report['placed']:>7} "
+              f"{report['failed']:>7} {report['bought']:>14,.2f} {report['sold']:>14,.2f} "
+              f"{report['wall_seconds']:>9.1f}  {report['error'] or ''}")
+    print("-" * 100)
+    print(f"{'TOTAL':<12} {'':<8} {'':>4} {totals['placed']:>7} {totals['failed']:>7} "
+          f"{totals['bought']:>14,.2f} {totals['sold']:>14,.2f}")
+    print("=" * 100)
+
+
+async def rebalance_accounts(user_ids: List[str], args, dry_run: bool) -> List[Dict]:
+    """Rebalance several accounts concurrently against the same basket.
+    
+    All accounts share one price table (a live stream, or a snapshot
+    refetched once per planning round rather than per account) and the
+    process-wide instrument master; each account keeps its own rebalancer,
+    order dispatcher, rate limit and order tracker. The portfolios fetched to
+    collect instruments seed every account's portfolio state; an account that
+    waits for the open fetches its portfolio again once armed.
+    """
+    zerodha_service = ZerodhaService()
+    instruments, portfolios = await collect_instruments(zerodha_service, user_ids, args.basket_file)
+    price_feed = None
+    price_table = None
+    price_snapshot = None
+    if args.stream_prices:
+        price_feed = await start_price_feed(user_ids, args.basket_file, instruments=instruments)
+        price_table = price_feed.price_table
+    else:
+        # Fetched when the accounts first plan, i.e. after any pre-open wait
+        price_snapshot = SharedPriceSnapshot(zerodha_service, user_ids[0], instruments)
+    
+    rebalancers = {
+        user_id: PortfolioRebalancer(
+            user_id, use_postbacks=args.postback_port is not None, price_table=price_table,
+            price_snapshot=price_snapshot, run_id=args.run_id,
+            order_cost_pct=args.order_cost_pct, **rebalancer_options(args)
+        )
+        for user_id in user_ids
+    }
+    for user_id, rebalancer in rebalancers.items():
+        await rebalancer.portfolio_state.load(portfolios[user_id])
+    
+    def route_postback(payload: Dict):
+        rebalancer = rebalancers.get(payload.get('user_id'))
+        if rebalancer is not None:
+            rebalancer.order_tracker.handle_postback(payload)
+    
+    postback_server = None
+    if args.postback_port is not None and not dry_run:
+        _, postback_server = await start_postback_server(route_postback, port=args.postback_port)
+    
+    async def run_one(user_id: str) -> Dict:
+        rebalancer = rebalancers[user_id]
+        started = time.monotonic()
+        error = None
+        try:
+            if args.amo:
+                await rebalancer.submit_amo(
+                    basket_file=args.basket_file,
+                    dry_run=dry_run,
+                    min_order_value=args.min_order_value,
+                    quiet=True,
+                    buy_buffer_pct=args.amo_buy_buffer_pct,
+                    sell_buffer_pct=args.amo_sell_buffer_pct,
+                )
+            else:
+                await rebalancer.rebalance(
+                    basket_file=args.basket_file,
+                    dry_run=dry_run,
+                    min_order_value=args.min_order_value,
+                    quiet=True,
+                    target_deficit=args.target_deficit,
+                )
+        except Exception as e:
+            logger.error(f"Rebalancing failed for {user_id}: {e}")
+            error = str(e)
+        results = rebalancer.dispatch_results
+        placed = [r for r in results if r['status'] == 'PLACED']
+        fills = rebalancer.order_tracker.orders.values()
+        return {
+            'user_id': user_id,
+            'status': 'FAILED' if error else 'OK',
+            'iterations': rebalancer.iterations,
+            'placed': len(placed),
+            'failed': len(results) - len(placed),
+            'bought': sum(o['filled_quantity'] * (o['average_price'] or 0.0) for o in fills if o['action'] == 'BUY'),
+            'sold': sum(o['filled_quantity'] * (o['average_price'] or 0.0) for o in fills if o['action'] == 'SELL'),
+            'wall_seconds': time.monotonic() - started,
+            'error': error,
+        }
+    
+    try:
+        reports = await asyncio.gather(*(run_one(user_id) for user_id in user_ids))
+    finally:
+        if postback_server is not None:
+            postback_server.should_exit = True
+        if price_feed is not None:
+            price_feed.stop()
+    
+    print_consolidated_report(reports)
+    return reports
+
+
+def rebalancer_options(args) -> Dict:
+    """Drift-band keyword arguments for PortfolioRebalancer from the command line."""
+    if args.band_abs is None and args.band_rel is None:
+        return {}
+    return {
+        'drift_bands': DriftBands(absolute=(args.band_abs or 0.0) / 100, relative=(args.band_rel or 0.0) / 100),
+        'band_partial': not args.band_to_target,
+        'cost_model': CostModel() if args.band_costs else None,
+    }
+
+
 async def main():
     """Main function."""
     parser = argparse.ArgumentParser(description="Rebalance stock portfolio using Zerodha Kite API")
@@ -539,8 +1023,39 @@ async def main():
     parser.add_argument("--quiet", action="store_true", help="Run in quiet non-interactive mode (auto-select defaults)")
     parser.add_argument("--target-deficit", type=float, default=1.0,
                        help="Target total deficit to reach before stopping (default: 1000)")
+    parser.add_argument("--order-cost-pct", type=float, default=0.0,
+                       help="Skip orders that reduce the deviation from target by less than this percent of the "
+                            "portfolio value (default: 0, place every order above --min-order-value)")
+    parser.add_argument("--stream-prices", action="store_true",
+                       help="Stream live prices for basket and holding instruments over the Kite WebSocket ticker")
+    parser.add_argument("--all-accounts", action="store_true",
+                       help="Rebalance every account with an active stored token concurrently (implies --quiet)")
+    parser.add_argument("--user-ids", nargs="+",
+                       help="Rebalance these accounts concurrently (implies --quiet)")
+    parser.add_argument("--postback-port", type=int, default=None,
+                       help="Receive Kite order postbacks on this port instead of polling the order book")
+    parser.add_argument("--amo", action="store_true",
+                       help="Submit the plan now as after-market LIMIT orders and exit (reconcile later with "
+                            "scripts/reconcile_orders.py)")
+    parser.add_argument("--amo-buy-buffer-pct", type=float, default=AMO_BUY_BUFFER_PCT,
+                       help=f"AMO buy limit above the last close, in percent (default: {AMO_BUY_BUFFER_PCT})")
+    parser.add_argument("--amo-sell-buffer-pct", type=float, default=AMO_SELL_BUFFER_PCT,
+                       help=f"AMO sell limit below the last close, in percent (default: {AMO_SELL_BUFFER_PCT})")
+    parser.add_argument("--band-abs", type=float, default=None,
+                       help="Drift-band mode: leave tickers within this many percentage points of their target weight")
+    parser.add_argument("--band-rel", type=float, default=None,
+                       help="Drift-band mode: leave tickers within this percent of their target weight")
+    parser.add_argument("--band-to-target", action="store_true",
+                       help="Trade tickers outside their band all the way to target instead of to the band edge")
+    parser.add_argument("--band-costs", action="store_true",
+                       help="Apply the cost model (STT, slippage) in drift-band mode: reserve cash for charges and "
+                            "skip orders that cost more than they correct")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                       help="Resume an interrupted run (its printed Run ID): orders it already placed are adopted "
+                            "instead of placed again. Without it every run places its own orders.")
     
     args = parser.parse_args()
+    args.run_id = args.resume or new_run_id()
     
     # Validate basket file
     if not Path(args.basket_file).exists():
@@ -549,20 +1064,68 @@ async def main():
     
     # Determine run mode
     dry_run = not args.live  # If --live is specified, dry_run becomes False
+    if not dry_run:
+        if args.resume:
+            print(f"🔁 Resuming run {args.run_id}: its already placed orders will not be sent again")
+        else:
+            print(f"🔑 Run ID: {args.run_id} (if interrupted, re-run with --resume {args.run_id})")
     
     try:
+        if args.all_accounts or args.user_ids:
+            user_ids = await get_user_ids(args.user_ids)
+            if not user_ids:
+                print("❌ No accounts with valid tokens to rebalance")
+                sys.exit(1)
+            print(f"👥 Rebalancing {len(user_ids)} accounts concurrently: {', '.join(user_ids)}")
+            reports = await rebalance_accounts(user_ids, args, dry_run)
+            if any(report['error'] for report in reports):
+                sys.exit(1)
+            return
+        
         # Get user ID
         user_id = await get_user_id(args.user_id, quiet=args.quiet)
         
+        if args.amo:
+            rebalancer = PortfolioRebalancer(user_id, run_id=args.run_id, order_cost_pct=args.order_cost_pct,
+                                             **rebalancer_options(args))
+            await rebalancer.submit_amo(
+                basket_file=args.basket_file,
+                dry_run=dry_run,
+                min_order_value=args.min_order_value,
+                quiet=args.quiet,
+                buy_buffer_pct=args.amo_buy_buffer_pct,
+                sell_buffer_pct=args.amo_sell_buffer_pct,
+            )
+            return
+        
         # Create rebalancer and run
-        rebalancer = PortfolioRebalancer(user_id)
-        order_ids = await rebalancer.rebalance(
-            basket_file=args.basket_file,
-            dry_run=dry_run,
-            min_order_value=args.min_order_value,
-            quiet=args.quiet,
-            target_deficit=args.target_deficit,
+        price_feed = await start_price_feed([user_id], args.basket_file) if args.stream_prices else None
+        rebalancer = PortfolioRebalancer(
+            user_id,
+            use_postbacks=args.postback_port is not None,
+            price_table=price_feed.price_table if price_feed else None,
+            run_id=args.run_id,
+            order_cost_pct=args.order_cost_pct,
+            **rebalancer_options(args)
         )
+        postback_server = None
+        if args.postback_port is not None and not dry_run:
+            _, postback_server = await start_postback_server(
+                rebalancer.order_tracker.handle_postback, port=args.postback_port
+            )
+        try:
+            order_ids = await rebalancer.rebalance(
+                basket_file=args.basket_file,
+                dry_run=dry_run,
+                min_order_value=args.min_order_value,
+                quiet=args.quiet,
+                target_deficit=args.target_deficit,
+            )
+        finally:
+            if postback_server is not None:
+                postback_server.should_exit = True
+            if price_feed is not None:
+                price_feed.stop()
         
         if order_ids:
             print(f"\n📋 Order IDs: {', '.join(order_ids)}")
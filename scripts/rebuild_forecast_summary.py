@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly forecast summary from the forecasts collection.
+
+The ``forecast_summary`` collection is updated on every forecast insert. Run
+this once to backfill it for forecasts stored before it existed, after
+forecasts were edited or deleted by hand, or after a summary update failed.
+Until then top-N selection aggregates the forecasts of any window the summary
+does not fully cover.
+
+Usage:
+    python scripts/rebuild_forecast_summary.py [--since-days DAYS]
+
+Example:
+    python scripts/rebuild_forecast_summary.py --since-days 7
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.db.repositories import ForecastSummaryRepository
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild the forecast summary from the forecasts collection")
+    parser.add_argument("--since-days", type=int, default=None,
+                        help="Only rebuild the last DAYS days (default: the whole history)")
+    args = parser.parse_args()
+
+    since_time = None
+    if args.since_days is not None:
+        since_time = datetime.now(timezone.utc) - timedelta(days=args.since_days)
+
+    started = time.perf_counter()
+    try:
+        buckets = await ForecastSummaryRepository().rebuild(since_time)
+    except Exception as e:
+        logger.error(f"Forecast summary rebuild failed: {e}")
+        print(f"❌ Forecast summary rebuild failed: {e}")
+        sys.exit(1)
+    scope = f"since {since_time:%Y-%m-%d %H:%M} UTC" if since_time else "for the whole history"
+    print(f"✅ Rebuilt {buckets} summary buckets {scope} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Reconcile persisted rebalance plans against the Kite order book.
+
+After-market plans submitted with ``rebalance_portfolio.py --amo`` are stored
+in the ``rebalance_plans`` collection. Run this after the open to pull the
+latest status and fills of every order of the pending plans, store them on
+the plan and print a fill report. It makes one order-book request per
+account (plus an order-history request for orders missing from the book).
+
+Usage:
+    python scripts/reconcile_orders.py [--plan-id PLAN_ID] [--user-id USER_ID] [--wait SECONDS]
+
+Example:
+    python scripts/reconcile_orders.py --wait 300
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.db.models import RebalancePlan
+from src.db.repositories import RebalancePlanRepository
+from src.services.order_tracker import TERMINAL_STATUSES
+from src.services.zerodha_service import ZerodhaService
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds between order-book refreshes with --wait
+POLL_INTERVAL = 15.0
+
+
+def plan_status(plan: RebalancePlan) -> str:
+    """Derive a plan's status from its orders."""
+    if any(order.status not in TERMINAL_STATUSES | {"FAILED"} for order in plan.orders):
+        return "OPEN"
+    if all(order.status == "COMPLETE" and order.filled_quantity >= order.quantity for order in plan.orders):
+        return "COMPLETED"
+    return "PARTIAL"
+
+
+async def refresh_plan(zerodha_service: ZerodhaService, plan: RebalancePlan) -> RebalancePlan:
+    """Update every order of a plan from the order book (order history as fallback)."""
+    book = {order["order_id"]: order for order in await zerodha_service.get_orders(plan.user_id)}
+    for order in plan.orders:
+        if not order.order_id or order.status in TERMINAL_STATUSES:
+            continue
+        update = book.get(order.order_id)
+        if update is None:
+            try:
+                history = await zerodha_service.get_order_history(plan.user_id, order.order_id)
+                update = history[-1] if history else None
+            except Exception as e:
+                logger.warning(f"No state for order {order.order_id} ({order.ticker}): {e}")
+        if update is None:
+            continue
+        order.status = update.get("status") or order.status
+        order.filled_quantity = int(update.get("filled_quantity") or 0)
+        order.average_price = float(update.get("average_price") or 0.0) or order.average_price
+        order.error = update.get("status_message") or order.error
+
+    plan.status = plan_status(plan)
+    plan.reconciled_time = datetime.now(timezone.utc)
+    return plan
+
+
+def print_plan_report(plan: RebalancePlan) -> None:
+    print("\n" + "=" * 96)
+    print(f"Plan {plan.id} | {plan.user_id} | {plan.market_date} | {plan.basket_file} | {plan.status}")
+    print("-" * 96)
+    print(f"{'Action':<6} {'Ticker':<14} {'Qty':>6} {'Filled':>7} {'Limit ₹':>10} {'Avg ₹':>10} {'Status':<18} Message")
+    for order in plan.orders:
+        print(f"{order.action:<6} {order.ticker:<14} {order.quantity:>6} {order.filled_quantity:>7} "
+              f"{order.limit_price or 0.0:>10.2f} {order.average_price or 0.0:>10.2f} "
+              f"{order.status:<18} {order.error or ''}")
+    bought = sum(o.filled_quantity * (o.average_price or 0.0) for o in plan.orders if o.action == "BUY")
+    sold = sum(o.filled_quantity * (o.average_price or 0.0) for o in plan.orders if o.action == "SELL")
+    print("-" * 96)
+    print(f"Bought ₹{bought:,.2f} | Sold ₹{sold:,.2f}")
+
+
+async def reconcile(plan_id: Optional[str], user_id: Optional[str], wait: float) -> List[RebalancePlan]:
+    """Reconcile the selected plans, polling up to ``wait`` seconds until none is open."""
+    repository = RebalancePlanRepository()
+    if plan_id:
+        plan = await repository.get(plan_id)
+        if plan is None:
+            raise ValueError(f"Rebalance plan {plan_id} not found")
+        plans = [plan]
+    else:
+        plans = await repository.list_pending(user_id)
+    if not plans:
+        print("ℹ️  No pending rebalance plans.")
+        return []
+
+    zerodha_service = ZerodhaService()
+    deadline = time.monotonic() + wait
+    while True:
+        results = await asyncio.gather(
+            *(refresh_plan(zerodha_service, plan) for plan in plans), return_exceptions=True
+        )
+        for plan, result in zip(plans, results):
+            if isinstance(result, Exception):
+                print(f"❌ Could not reconcile plan {plan.id} for {plan.user_id}: {result}")
+            else:
+                await repository.save_reconciled(plan)
+        open_plans = [plan for plan in plans if plan.status == "OPEN"]
+        if not open_plans or time.monotonic() >= deadline:
+            break
+        print(f"⏳ {len(open_plans)} plans still have open orders; checking again in {POLL_INTERVAL:.0f}s...")
+        await asyncio.sleep(min(POLL_INTERVAL, max(deadline - time.monotonic(), 0.0)))
+
+    for plan in plans:
+        print_plan_report(plan)
+    return plans
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Reconcile after-market rebalance plans against the order book")
+    parser.add_argument("--plan-id", help="Reconcile this plan only (default: every pending plan)")
+    parser.add_argument("--user-id", help="Only reconcile pending plans of this user")
+    parser.add_argument("--wait", type=float, default=0.0,
+                        help="Keep polling up to this many seconds until no order is open (default: 0)")
+    args = parser.parse_args()
+
+    try:
+        plans = await reconcile(args.plan_id, args.user_id, args.wait)
+    except Exception as e:
+        logger.error(f"Reconcile failed: {e}")
+        print(f"❌ Reconcile failed: {e}")
+        sys.exit(1)
+    if any(plan.status == "OPEN" for plan in plans):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
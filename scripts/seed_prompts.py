@@ -28,9 +28,9 @@ Analyze the provided NSE stock ticker and its `yfinance` data to generate a pric
 
 **STEP 1: COMPREHENSIVE YFINANCE DATA ANALYSIS (MANDATORY FIRST STEP)**
 Before using Google Search, you MUST thoroughly analyze ALL provided yfinance data:
-- **Price & Volume Analysis:** Examine the 20-day historical data. Identify trends, patterns, breakouts, consolidations, or reversals. Calculate volume changes and price momentum.
+- **Price & Volume Analysis:** Examine the technical indicators (RSI, ATR, rolling returns, realized volatility, distance from VWAP, volume z-score, 52-week range position) together with the most recent daily bars. Identify trends, patterns, breakouts, consolidations, or reversals, and assess volume changes and price momentum.
 - **Key Metrics Review:** Analyze beta, 52-week range, previous close, and 10-day average volume. Compare current price to historical ranges.
-- **News Headlines Analysis:** Review all recent news headlines provided in the yfinance data. Identify recurring themes, major announcements, or significant events.
+- **News Headlines Analysis:** Review all recent news headlines provided in the yfinance data. Identify recurring themes, major announcements, or significant events. Headlines marked **[NEW]** appeared after the previous forecast for this stock; weigh them as the latest developments.
 - **Form Initial Hypothesis:** Based purely on the yfinance data, formulate your initial hypothesis about the stock's direction and potential catalysts. This is your quantitative foundation.
 
 **STEP 2: GOOGLE SEARCH DEEP INVESTIGATION (MANDATORY SECOND STEP)**
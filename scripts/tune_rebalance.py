@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tune MIN_ORDER_VALUE / TARGET_DEFICIT with the vectorized rebalance engine.
+
+Replays consecutive baskets of one index from ``docs/baskets/`` (SMALLCAP by
+default): the account starts fully invested in the earlier basket at each
+capital, prices drift, and the later basket (or, with ``--drift-only``, the
+same basket) is planned for every combination of minimum order value and
+target deficit in a single NumPy call per basket pair. Nothing is placed; prices are synthetic and seeded as in
+``benchmark_solver.py``.
+
+Reports, per setting and averaged over the basket pairs, the expected order
+count, turnover and residual deficit.
+
+Usage:
+    python scripts/tune_rebalance.py [--index "NIFTY SMALLCAP 250"] [--capitals 200000 1000000]
+                                     [--min-order-values 10 100 1000] [--target-deficits 1 1000 5000]
+                                     [--order-cost-pct 0.25]
+
+Example:
+    python scripts/tune_rebalance.py --capitals 500000 --verify
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_solver import BASKETS_DIR, invest, load_basket_series, synthetic_prices
+from scripts.rebalance_portfolio import MARGIN_SAFETY_BUFFER
+from src.rebalancing import evaluate_scenarios, scenario_grid, solve_rebalance
+from src.rebalancing.vectorized import align, summarize
+
+DEFAULT_INDEX = "NIFTY SMALLCAP 250"
+DEFAULT_CAPITALS = [200_000.0, 1_000_000.0, 5_000_000.0]
+DEFAULT_MIN_ORDER_VALUES = [10.0, 100.0, 500.0, 1000.0, 2500.0, 5000.0]
+DEFAULT_TARGET_DEFICITS = [1.0, 1000.0, 5000.0, 10000.0]
+
+
+def evaluate_pair(previous: Dict[str, float], current: Dict[str, float], args, rng: random.Random) -> List[Dict]:
+    """Plan every grid scenario for one basket pair in a single call."""
+    tickers = sorted(set(previous) | set(current))
+    start_prices = synthetic_prices(tickers, rng)
+    drift = {t: 1 + rng.gauss(0.0, args.drift_pct / 100) for t in tickers}
+    prices = align(tickers, {t: round(start_prices[t] * drift[t], 2) for t in tickers})
+
+    scenarios = scenario_grid(capital=args.capitals, min_order_value=args.min_order_values,
+                              target_deficit=args.target_deficits)
+    holdings = {}
+    for capital in args.capitals:
+        quantities, cash = invest(capital, previous, start_prices)
+        holdings[capital] = (align(tickers, quantities), cash)
+    quantities = np.stack([holdings[s["capital"]][0] for s in scenarios])
+    cash = np.array([holdings[s["capital"]][1] for s in scenarios])
+    # The same per-order cost rebalance_portfolio.py --order-cost-pct applies
+    order_cost = (quantities @ prices + cash) * args.order_cost_pct / 100
+    results = evaluate_scenarios(
+        target_weights=align(tickers, current),
+        prices=prices,
+        quantities=quantities,
+        cash=cash,
+        min_order_value=np.array([s["min_order_value"] for s in scenarios]),
+        target_deficit=np.array([s["target_deficit"] for s in scenarios]),
+        buy_cost_buffer=MARGIN_SAFETY_BUFFER,
+        order_cost=order_cost,
+    )
+    rows = summarize(results, scenarios)
+
+    if args.verify:
+        price_map = dict(zip(tickers, prices.tolist()))
+        for i, row in enumerate(rows):
+            if results["deficit"][i] <= row["target_deficit"]:
+                row["solver_orders"], row["solver_residual"] = 0, row["residual"]
+                continue
+            quantities, cash = holdings[row["capital"]]
+            solution = solve_rebalance(
+                float(results["total_value"][i]), current, price_map,
+                {t: int(q) for t, q in zip(tickers, quantities)}, cash,
+                min_order_value=row["min_order_value"], buy_cost_buffer=MARGIN_SAFETY_BUFFER,
+                order_cost=float(order_cost[i]),
+            )
+            row["solver_orders"], row["solver_residual"] = solution["orders"], solution["deviation"]
+    return rows
+
+
+def run_grid(args) -> List[Dict]:
+    series = load_basket_series(Path(args.baskets_dir))
+    if args.index not in series:
+        raise ValueError(f"No baskets for {args.index} in {args.baskets_dir} (have: {', '.join(sorted(series))})")
+    baskets = series[args.index]
+    rng = random.Random(args.seed)
+    pairs = zip(baskets, baskets) if args.drift_only else zip(baskets, baskets[1:])
+
+    started = time.perf_counter()
+    per_setting = defaultdict(list)
+    for previous, current in pairs:
+        for row in evaluate_pair(previous, current, args, rng):
+            per_setting[(row["capital"], row["min_order_value"], row["target_deficit"])].append(row)
+    elapsed = time.perf_counter() - started
+
+    summary = []
+    for (capital, min_order_value, target_deficit), rows in sorted(per_setting.items()):
+        entry = {
+            "capital": capital,
+            "min_order_value": min_order_value,
+            "target_deficit": target_deficit,
+            "pairs": len(rows),
+            "orders": sum(r["orders"] for r in rows) / len(rows),
+            "turnover": sum(r["turnover"] for r in rows) / len(rows),
+            "residual": sum(r["residual"] for r in rows) / len(rows),
+            "residual_pct": sum(r["residual_pct"] for r in rows) / len(rows),
+        }
+        if args.verify:
+            entry["solver_orders"] = sum(r["solver_orders"] for r in rows) / len(rows)
+            entry["solver_residual"] = sum(r["solver_residual"] for r in rows) / len(rows)
+        summary.append(entry)
+    print(f"⏱️  {len(summary)} settings x {summary[0]['pairs'] if summary else 0} basket pairs planned in {elapsed * 1000:.1f} ms",
+          file=sys.stderr)
+    return summary
+
+
+def print_report(summary: List[Dict], verify: bool) -> None:
+    width = 104 if verify else 80
+    print("\n" + "=" * width)
+    header = (f"{'Capital':>12} {'Min order':>10} {'Target def':>11} {'Orders':>7} "
+              f"{'Turnover':>14} {'Residual':>11} {'Resid %':>8}")
+    if verify:
+        header += f" {'Solver ord':>10} {'Solver resid':>13}"
+    print(header)
+    print("-" * width)
+    for r in summary:
+        line = (f"{r['capital']:>12,.0f} {r['min_order_value']:>10,.0f} {r['target_deficit']:>11,.0f} "
+                f"{r['orders']:>7.1f} {r['turnover']:>14,.0f} {r['residual']:>11,.0f} {r['residual_pct']:>8.3f}")
+        if verify:
+            line += f" {r['solver_orders']:>10.1f} {r['solver_residual']:>13,.0f}"
+        print(line)
+    print("=" * width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate rebalance settings over a grid without placing orders")
+    parser.add_argument("--baskets-dir", default=str(BASKETS_DIR))
+    parser.add_argument("--index", default=DEFAULT_INDEX, help=f"Basket index to replay (default: {DEFAULT_INDEX})")
+    parser.add_argument("--capitals", type=float, nargs="+", default=DEFAULT_CAPITALS)
+    parser.add_argument("--min-order-values", type=float, nargs="+", default=DEFAULT_MIN_ORDER_VALUES)
+    parser.add_argument("--target-deficits", type=float, nargs="+", default=DEFAULT_TARGET_DEFICITS)
+    parser.add_argument("--order-cost-pct", type=float, default=0.0,
+                        help="Skip orders correcting less than this percent of the portfolio (default: 0)")
+    parser.add_argument("--drift-pct", type=float, default=3.0,
+                        help="Standard deviation of price moves between baskets, in percent (default: 3)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--drift-only", action="store_true",
+                        help="Rebalance each basket back into itself after the price drift (tunes TARGET_DEFICIT)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Also run solve_rebalance on every scenario and show its orders and residual")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        summary = run_grid(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary, args.verify)
+
+
+if __name__ == "__main__":
+    main()
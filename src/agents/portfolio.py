@@ -2,14 +2,17 @@
 Portfolio optimization agent for selecting the best stocks.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 
 from src.db.database import COLLECTIONS
 from src.db.database import async_db
 from src.db.models import Basket, BasketStock
+from src.db.repositories import ForecastSummaryRepository
+from src.services.market_data import MarketDataProvider, get_default_market_data_provider
 from src.services.yfinance_service import YFinanceService
 from src.utils.data_utils import round_floats_to_2_decimals
 
@@ -18,13 +21,71 @@ from .base import BaseAgent
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+def top_stocks_pipeline(tickers: List[str], since_time: datetime, filter_top_n: int) -> List[Dict[str, Any]]:
+    """Aggregation returning the latest 7-day forecast of the top N stocks by average gain since ``since_time``.
+
+    Reads every full forecast in the window; ``_get_top_stocks`` uses the forecast
+    summary instead and only falls back to this when the summary does not cover
+    the whole window.
+    """
+    return [
+        # Match forecasts for stocks in the index after since_time, only 7-day forecasts
+        {
+            "$match": {
+                "stock_ticker": {"$in": tickers},
+                "created_time": {"$gte": since_time},
+                "days": 7
+            }
+        },
+        # Sort by stock_ticker and created_time descending to get latest first
+        {"$sort": {"stock_ticker": 1, "created_time": -1}},
+        # Group by stock_ticker, keeping the latest doc but averaging numeric metrics
+        {
+            "$group": {
+                "_id": "$stock_ticker",
+                "latest_forecast": {"$first": "$$ROOT"},
+                "avg_gain": {"$avg": "$gain"},
+                "avg_target_price": {"$avg": "$target_price"},
+                "forecast_count": {"$sum": 1}
+            }
+        },
+        # Sort by average gain in descending order
+        {"$sort": {"avg_gain": -1}},
+        # Limit to top N stocks
+        {"$limit": filter_top_n},
+        # Project only the forecast data
+        {
+            "$project": {
+                "_id": 0,
+                "forecast": {
+                    "$mergeObjects": [
+                        "$latest_forecast",
+                        {
+                            "gain": "$avg_gain",
+                            "target_price": "$avg_target_price",
+                            "forecast_count": "$forecast_count"
+                        }
+                    ]
+                }
+            }
+        }
+    ]
+
+
 class PortfolioAgent(BaseAgent):
     """Agent for optimizing stock portfolios."""
 
-    def __init__(self):
-        """Initialize the portfolio agent."""
+    def __init__(self, market_data_provider: Optional[MarketDataProvider] = None):
+        """Initialize the portfolio agent.
+        
+        Args:
+            market_data_provider: Optional LTP source. Defaults to the shared Kite -> yfinance chain.
+        """
         super().__init__()
         self.yfinance_service = YFinanceService()
+        self.market_data_provider = market_data_provider
+        self.forecast_summary = ForecastSummaryRepository()
 
     async def _get_top_stocks(
         self,
@@ -54,58 +115,39 @@ class PortfolioAgent(BaseAgent):
             
         tickers = [stock["ticker"] for stock in stocks]
         
-        # Use MongoDB aggregation to get averaged 7-day forecast metrics for each stock
-        pipeline = [
-            # Match forecasts for stocks in the index after since_time, only 7-day forecasts
-            {
-                "$match": {
-                    "stock_ticker": {"$in": tickers},
-                    "created_time": {"$gte": since_time},
-                    "days": 7
-                }
-            },
-            # Sort by stock_ticker and created_time descending to get latest first
-            {"$sort": {"stock_ticker": 1, "created_time": -1}},
-            # Group by stock_ticker, keeping the latest doc but averaging numeric metrics
-            {
-                "$group": {
-                    "_id": "$stock_ticker",
-                    "latest_forecast": {"$first": "$$ROOT"},
-                    "avg_gain": {"$avg": "$gain"},
-                    "avg_target_price": {"$avg": "$target_price"},
-                    "forecast_count": {"$sum": 1}
-                }
-            },
-            # Sort by average gain in descending order
-            {"$sort": {"avg_gain": -1}},
-            # Limit to top N stocks
-            {"$limit": filter_top_n},
-            # Project only the forecast data
+        # Averaged 7-day metrics per stock from the small hourly summary buckets, if they hold the whole window
+        if not await self.forecast_summary.covers(since_time):
+            logger.warning("Forecast summary does not cover this window; falling back to aggregating forecasts "
+                           "(run scripts/rebuild_forecast_summary.py to backfill it)")
+            forecasts = await async_db[COLLECTIONS["forecasts"]].aggregate(
+                top_stocks_pipeline(tickers, since_time, filter_top_n)
+            ).to_list(length=None)
+            if not forecasts:
+                raise ValueError(f"No forecasts found for stocks in {index} after {since_time}")
+            return [forecast["forecast"] for forecast in forecasts]
+
+        summary = await self.forecast_summary.top_stocks(tickers, since_time, filter_top_n, days=7)
+        if not summary:
+            raise ValueError(f"No forecasts found for stocks in {index} after {since_time}")
+
+        # Only the latest forecast of each selected stock is read in full
+        latest_ids = [entry["latest_forecast_id"] for entry in summary]
+        latest = {
+            forecast["_id"]: forecast
+            for forecast in await async_db[COLLECTIONS["forecasts"]].find(
+                {"_id": {"$in": latest_ids}}
+            ).to_list(length=None)
+        }
+        return [
             {
-                "$project": {
-                    "_id": 0,
-                    "forecast": {
-                        "$mergeObjects": [
-                            "$latest_forecast",
-                            {
-                                "gain": "$avg_gain",
-                                "target_price": "$avg_target_price",
-                                "forecast_count": "$forecast_count"
-                            }
-                        ]
-                    }
-                }
+                **latest[entry["latest_forecast_id"]],
+                "gain": entry["gain_mean"],
+                "target_price": entry["target_mean"],
+                "forecast_count": entry["count"],
             }
+            for entry in summary
+            if entry["latest_forecast_id"] in latest
         ]
-        
-        # Execute aggregation
-        forecasts = await async_db[COLLECTIONS["forecasts"]].aggregate(pipeline).to_list(length=None)
-        
-        if not forecasts:
-            raise ValueError(f"No forecasts found for stocks in {index} after {since_time}")
-            
-        # Extract just the forecast data from the aggregation result
-        return [forecast["forecast"] for forecast in forecasts]
 
     async def optimize_portfolio(
         self,
@@ -138,25 +180,37 @@ class PortfolioAgent(BaseAgent):
         
         # Fetch LTP and OHLC data for each unique ticker
         logger.info(f"Fetching LTP and OHLC data for {len(unique_tickers)} stocks")
-        ticker_financial_data = {}
-        for ticker in unique_tickers:
+        # LTPs for all candidates in one provider call
+        try:
+            provider = self.market_data_provider or await get_default_market_data_provider()
+            ticker_ltps = await provider.get_ticker_ltp(unique_tickers)
+        except Exception as e:
+            logger.warning(f"Failed to fetch LTPs: {e}")
+            ticker_ltps = {}
+
+        async def fetch_ohlc(ticker: str) -> List[Dict[str, Any]]:
             try:
-                # Get LTP
-                ltp = self.yfinance_service.get_stock_ltp(ticker)
-                
                 # Get OHLC for last 5 trading days
-                ohlc_data = self.yfinance_service.get_stock_ohlc_last_5_days(ticker)
-                
-                ticker_financial_data[ticker] = {
-                    "ltp": ltp,
-                    "ohlc_last_5_days": ohlc_data
-                }
+                return await self.yfinance_service.aget_stock_ohlc_last_5_days(ticker)
             except Exception as e:
                 logger.warning(f"Failed to fetch financial data for {ticker}: {e}")
-                ticker_financial_data[ticker] = {
-                    "ltp": None,
-                    "ohlc_last_5_days": []
-                }
+                return []
+
+        ohlc_results = await asyncio.gather(*(fetch_ohlc(ticker) for ticker in unique_tickers))
+        ticker_financial_data = {
+            ticker: {
+                "ltp": ticker_ltps.get(ticker),
+                "ohlc_last_5_days": ohlc_data
+            }
+            for ticker, ohlc_data in zip(unique_tickers, ohlc_results)
+        }
+        
+        # Technical indicators for all candidates in one vectorized pass over the local price store
+        try:
+            ticker_indicators = await self.yfinance_service.aget_indicators(unique_tickers)
+        except Exception as e:
+            logger.warning(f"Failed to compute technical indicators: {e}")
+            ticker_indicators = {}
         
         # Check if we have any forecasts
         if not stock_data:
@@ -188,6 +242,7 @@ class PortfolioAgent(BaseAgent):
             financial_data = ticker_financial_data.get(ticker, {})
             cleaned_forecast['ltp'] = financial_data.get('ltp')
             cleaned_forecast['ohlc_last_5_days'] = financial_data.get('ohlc_last_5_days', [])
+            cleaned_forecast['indicators'] = ticker_indicators.get(ticker, {})
             
             cleaned_stock_data.append(cleaned_forecast)
 
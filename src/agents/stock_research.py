@@ -4,13 +4,17 @@ Stock research agent for analyzing and forecasting stock prices using Google Gem
 
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import aiohttp
 import pandas as pd
 
 from src.db.database import COLLECTIONS
 from src.db.database import async_db
 from src.db.models import Forecast, ListForecast
+from src.db.repositories import ForecastSummaryRepository
+from src.services.market_data import MarketDataProvider, get_default_market_data_provider
+from src.services.news_store import NewsStore
+from src.services.stock_info_prefetcher import StockInfoPrefetcher
 from src.services.yfinance_service import YFinanceService
 from src.utils.data_utils import round_floats_to_2_decimals
 
@@ -19,18 +23,58 @@ from .base import BaseAgent
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Raw daily bars included in the prompt alongside the technical indicators
+PRICE_HISTORY_DAYS_FOR_LLM = 5
+
+# A previous forecast is reused instead of calling the LLM when it is at most
+# this old, no new headlines appeared since, and the price moved less than this
+REUSE_MAX_AGE_HOURS = 72
+REUSE_PRICE_MOVE_THRESHOLD_PCT = 2.0
+
+
+def _analysis_time(forecast: Dict[str, Any]) -> datetime:
+    """When the LLM analysis behind a stored forecast was made, as an aware UTC datetime."""
+    analysis_time = forecast.get("analysis_time") or forecast["created_time"]
+    if analysis_time.tzinfo is None:
+        analysis_time = analysis_time.replace(tzinfo=timezone.utc)
+    return analysis_time
+
 
 class StockResearchAgent(BaseAgent):
     """Agent for analyzing stocks and generating price forecasts using Google Gemini models."""
 
-    def __init__(self, api_key_index=None):
+    def __init__(self, api_key_index=None, market_data_provider: Optional[MarketDataProvider] = None):
         """Initialize the stock research agent.
         
         Args:
             api_key_index: Optional index of the API key to use. If None, uses the first key.
+            market_data_provider: Optional LTP source. Defaults to the shared Kite -> yfinance chain.
         """
         super().__init__(api_key_index=api_key_index)
         self.yfinance_service = YFinanceService()
+        self.news_store = NewsStore()
+        self.market_data_provider = market_data_provider
+        self.forecast_summary = ForecastSummaryRepository()
+
+    async def _get_ltp(self, symbol: str) -> Optional[float]:
+        """Get the current LTP of a stock from the market data provider chain."""
+        provider = self.market_data_provider or await get_default_market_data_provider()
+        prices = await provider.get_ticker_ltp([symbol])
+        return prices.get(symbol)
+
+    async def _store_forecast(self, forecast: Forecast) -> None:
+        """Insert a forecast and add it to the hourly forecast summary."""
+        result = await async_db[COLLECTIONS["forecasts"]].insert_one(forecast.model_dump())
+        try:
+            await self.forecast_summary.record(result.inserted_id, forecast)
+        except Exception as e:
+            # The summary can be rebuilt from the forecasts (scripts/rebuild_forecast_summary.py);
+            # until then windows containing this hour are ranked from the forecasts themselves
+            logger.warning(f"Failed to update forecast summary for {forecast.stock_ticker}: {e}")
+            try:
+                await self.forecast_summary.mark_missed(forecast.created_time)
+            except Exception as e:
+                logger.error(f"Failed to mark forecast summary incomplete after {forecast.created_time}: {e}")
 
     async def _get_recent_forecasts(self, symbol: str, hours_threshold: int = 12) -> List[Dict[str, Any]]:
         """Get recent forecasts for a stock.
@@ -51,6 +95,118 @@ class StockResearchAgent(BaseAgent):
         
         return forecasts
 
+    async def _get_latest_forecast_batch(self, symbol: str) -> List[Dict[str, Any]]:
+        """Get the forecasts produced by the most recent analysis of a stock.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            Forecasts sharing the latest invocation, or an empty list if the latest
+            analysis is older than REUSE_MAX_AGE_HOURS
+        """
+        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=REUSE_MAX_AGE_HOURS)
+        latest = await async_db[COLLECTIONS["forecasts"]].find_one(
+            {"stock_ticker": symbol, "created_time": {"$gte": cutoff_time}},
+            sort=[("created_time", -1)]
+        )
+        if not latest:
+            return []
+        # A re-issued forecast ages from the LLM analysis it copies, not from when it was re-issued
+        analysis_time = _analysis_time(latest)
+        if analysis_time < cutoff_time:
+            logger.info(f"{symbol}: latest analysis is from {analysis_time:%Y-%m-%d %H:%M} UTC; too old to reuse")
+            return []
+        if latest.get("invocation_id") is None:
+            return [latest]
+        
+        # The invocation may have been reused before, so keep the newest forecast per horizon
+        batch = await async_db[COLLECTIONS["forecasts"]].find({
+            "stock_ticker": symbol,
+            "invocation_id": latest["invocation_id"]
+        }).sort("created_time", -1).to_list(length=None)
+        forecasts_by_days: Dict[int, Dict[str, Any]] = {}
+        for forecast in batch:
+            forecasts_by_days.setdefault(forecast["days"], forecast)
+        return list(forecasts_by_days.values())
+
+    async def _reuse_forecasts_if_unchanged(
+        self,
+        symbol: str,
+        previous_forecasts: List[Dict[str, Any]],
+        news_headlines: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Re-issue the previous forecasts if neither news nor price moved materially.
+        
+        Args:
+            symbol: Stock symbol
+            previous_forecasts: Forecasts from the latest analysis
+            news_headlines: Current headlines, already flagged with ``is_new``
+            
+        Returns:
+            The re-issued forecasts, or an empty list if a fresh analysis is needed
+        """
+        new_headlines = [h for h in news_headlines if h.get("is_new")]
+        if new_headlines:
+            logger.info(f"{symbol}: {len(new_headlines)} new headlines since last forecast; re-analyzing")
+            return []
+        
+        ltp = await self._get_ltp(symbol)
+        if ltp is None or ltp <= 0:
+            return []
+        
+        # Measure the move from the price at the original analysis, so repeated
+        # reuse cannot let the price drift further than the threshold in total
+        latest = previous_forecasts[0]
+        reference_price = latest.get("analysis_reference_price") or latest.get("reference_price")
+        if not reference_price:
+            # Older forecasts did not record the LTP; derive it from target and gain
+            gain = float(latest.get("gain") or 0.0)
+            reference_price = float(latest["target_price"]) / (1.0 + gain / 100.0) if gain else None
+        if not reference_price:
+            return []
+        
+        move_pct = abs(ltp / reference_price - 1.0) * 100.0
+        if move_pct >= REUSE_PRICE_MOVE_THRESHOLD_PCT:
+            logger.info(f"{symbol}: price moved {move_pct:.2f}% since last analysis; re-analyzing")
+            return []
+        
+        logger.info(
+            f"{symbol}: no new news and price moved {move_pct:.2f}% since last analysis; "
+            f"reusing {len(previous_forecasts)} previous forecasts"
+        )
+        now = datetime.now(timezone.utc)
+        forecasts = []
+        for previous in previous_forecasts:
+            target_price = float(previous["target_price"])
+            gain = ((target_price - ltp) / ltp) * 100.0
+            forecast = Forecast(
+                stock_ticker=symbol,
+                invocation_id=previous.get("invocation_id"),
+                # The target still refers to the date of the original analysis
+                forecast_date=previous["forecast_date"],
+                target_price=target_price,
+                days=previous["days"],
+                reason_summary=previous["reason_summary"],
+                sources=previous.get("sources", []),
+                gain=gain,
+                reference_price=ltp,
+                analysis_time=_analysis_time(previous),
+                analysis_reference_price=reference_price,
+                created_time=now,
+                modified_time=now
+            )
+            await self._store_forecast(forecast)
+            forecasts.append({
+                "timeframe": f"{previous['days']}d",
+                "target_price": target_price,
+                "reasoning": previous["reason_summary"],
+                "sources": previous.get("sources", []),
+                "gain": gain,
+                "invocation_id": str(previous["invocation_id"]) if previous.get("invocation_id") else None
+            })
+        return forecasts
+
     async def _process_sources(self, sources: List[str]) -> List[str]:
         """Process a list of source URLs, checking response status and following redirects.
         
@@ -182,14 +338,44 @@ class StockResearchAgent(BaseAgent):
                 timestamp = headline.get('timestamp', 'N/A')
                 title = headline.get('headline', 'N/A')
                 publisher = headline.get('publisher', 'N/A')
-                formatted_data.append(f"- **[{timestamp}]:** {title} (Publisher: {publisher})")
+                new_marker = "**[NEW]** " if headline.get('is_new') else ""
+                formatted_data.append(f"- {new_marker}**[{timestamp}]:** {title} (Publisher: {publisher})")
         else:
             formatted_data.append("- No recent news available")
         formatted_data.append("---")
         
-        # Price and Volume History section
-        formatted_data.append("**## Price and Volume History (Last 20 Days)**")
-        historical_data = yfinance_data.get('historical_data', [])
+        # Technical Indicators section (precomputed from the full price history)
+        formatted_data.append("**## Technical Indicators**")
+        indicators = yfinance_data.get('indicators') or {}
+        if any(value is not None for value in indicators.values()):
+            def format_indicator(name, prefix="", suffix="", signed=False):
+                value = indicators.get(name)
+                if value is None:
+                    return "N/A"
+                return f"{prefix}{value:+.2f}{suffix}" if signed else f"{prefix}{value:.2f}{suffix}"
+            
+            formatted_data.append(f"- **RSI (14):** {format_indicator('rsi_14')}")
+            formatted_data.append(
+                f"- **ATR (14):** {format_indicator('atr_14', '₹')} "
+                f"({format_indicator('atr_14_pct', suffix='% of price')})"
+            )
+            formatted_data.append(
+                f"- **Returns:** 5D {format_indicator('return_5d_pct', suffix='%', signed=True)}, "
+                f"20D {format_indicator('return_20d_pct', suffix='%', signed=True)}, "
+                f"60D {format_indicator('return_60d_pct', suffix='%', signed=True)}"
+            )
+            formatted_data.append(f"- **Realized Volatility (20D, annualized):** {format_indicator('volatility_20d_pct', suffix='%')}")
+            formatted_data.append(f"- **Distance from 20D VWAP:** {format_indicator('vwap_20d_distance_pct', suffix='%', signed=True)}")
+            formatted_data.append(f"- **Volume Z-Score (latest vs 20D):** {format_indicator('volume_zscore_20d', signed=True)}")
+            formatted_data.append(f"- **52-Week Range Position:** {format_indicator('range_52w_position')} (0 = 52W low, 1 = 52W high)")
+        else:
+            formatted_data.append("- No technical indicators available")
+        formatted_data.append("---")
+        
+        # Price and Volume History section (only the most recent days; the
+        # indicators above summarize the longer history)
+        formatted_data.append(f"**## Price and Volume History (Last {PRICE_HISTORY_DAYS_FOR_LLM} Days)**")
+        historical_data = yfinance_data.get('historical_data', [])[-PRICE_HISTORY_DAYS_FOR_LLM:]
         if historical_data:
             for day_data in historical_data:
                 date = day_data.get('date', 'N/A')
@@ -213,12 +399,18 @@ class StockResearchAgent(BaseAgent):
         
         return "\n".join(formatted_data)
 
-    async def analyze_stock(self, symbol: str, force: bool = False) -> List[Dict[str, Any]]:
+    async def analyze_stock(
+        self,
+        symbol: str,
+        force: bool = False,
+        prefetcher: Optional[StockInfoPrefetcher] = None,
+    ) -> List[Dict[str, Any]]:
         """Analyze a stock and generate price forecasts.
 
         Args:
             symbol: The stock symbol (NSE format, e.g., 'RELIANCE', 'OLECTRA')
             force: If True, force new analysis even if recent forecasts exist
+            prefetcher: Optional prefetcher already loading yfinance data for this stock
 
         Returns:
             List of forecasts for the stock
@@ -242,7 +434,10 @@ class StockResearchAgent(BaseAgent):
 
         # Fetch comprehensive yfinance data
         logger.info(f"Fetching yfinance data for {symbol}")
-        yfinance_data = self.yfinance_service.get_stock_info(symbol)
+        if prefetcher is not None:
+            yfinance_data = await prefetcher.get(symbol)
+        else:
+            yfinance_data = await self.yfinance_service.aget_stock_info(symbol)
         
         if "error" in yfinance_data:
             logger.warning(f"Failed to fetch yfinance data for {symbol}: {yfinance_data['error']}")
@@ -251,6 +446,25 @@ class StockResearchAgent(BaseAgent):
         # Round all floating point numbers to 2 decimal places before formatting
         yfinance_data = round_floats_to_2_decimals(yfinance_data)
         
+        # Flag headlines first seen after the previous forecast so the model
+        # can focus on what changed
+        previous_forecasts = await self._get_latest_forecast_batch(symbol)
+        last_forecast_time = None
+        if previous_forecasts:
+            last_forecast_time = previous_forecasts[0]["created_time"]
+            if last_forecast_time.tzinfo is None:
+                last_forecast_time = last_forecast_time.replace(tzinfo=timezone.utc)
+        headlines = await self.news_store.record(symbol, yfinance_data.get("news_headlines", []))
+        yfinance_data["news_headlines"] = self.news_store.mark_new(headlines, last_forecast_time)
+        
+        # Skip the LLM if nothing material changed since the previous forecast
+        if not force and previous_forecasts:
+            reused_forecasts = await self._reuse_forecasts_if_unchanged(
+                symbol, previous_forecasts, yfinance_data["news_headlines"]
+            )
+            if reused_forecasts:
+                return reused_forecasts
+        
         # Format yfinance data for LLM consumption
         yfinance_formatted = self._format_yfinance_data_for_llm(yfinance_data)
         
@@ -278,7 +492,7 @@ class StockResearchAgent(BaseAgent):
             forecasts = []
             
             # Fetch current LTP once for gain calculation
-            ltp = self.yfinance_service.get_stock_ltp(symbol)
+            ltp = await self._get_ltp(symbol)
             if ltp is None:
                 logger.warning(f"LTP unavailable for {symbol}; gain will default to 0.0")
             
@@ -321,9 +535,10 @@ class StockResearchAgent(BaseAgent):
                     days=forecast_data.days,
                     reason_summary=forecast_data.reason_summary,
                     sources=processed_sources,
-                    gain=float(computed_gain)
+                    gain=float(computed_gain),
+                    reference_price=ltp
                 )
-                await async_db[COLLECTIONS["forecasts"]].insert_one(forecast.model_dump())
+                await self._store_forecast(forecast)
                 
                 forecasts.append({
                     "timeframe": f"{forecast_data.days}d",
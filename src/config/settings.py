@@ -21,6 +21,9 @@ class Settings(BaseSettings):
     # MongoDB
     mongodb_uri: str = Field(..., env="MONGODB_URI")
     mongodb_db_name: str = Field(..., env="MONGODB_DB_NAME")
+    mongodb_max_pool_size: int = Field(100, env="MONGODB_MAX_POOL_SIZE")
+    mongodb_min_pool_size: int = Field(0, env="MONGODB_MIN_POOL_SIZE")
+    mongodb_server_selection_timeout_ms: int = Field(30000, env="MONGODB_SERVER_SELECTION_TIMEOUT_MS")
 
     # Zerodha API (optional for existing users)
     zerodha_api_key: str = Field("", env="ZERODHA_API_KEY")
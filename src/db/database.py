@@ -10,12 +10,19 @@ from pymongo import MongoClient
 
 from src.config.settings import settings
 
+# Connection pool settings shared by both clients
+CLIENT_OPTIONS = {
+    "maxPoolSize": settings.mongodb_max_pool_size,
+    "minPoolSize": settings.mongodb_min_pool_size,
+    "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+}
+
 # Create MongoDB client
-client = MongoClient(settings.mongodb_uri)
+client = MongoClient(settings.mongodb_uri, **CLIENT_OPTIONS)
 db = client[settings.mongodb_db_name]
 
 # Create async MongoDB client
-async_client = AsyncIOMotorClient(settings.mongodb_uri)
+async_client = AsyncIOMotorClient(settings.mongodb_uri, **CLIENT_OPTIONS)
 async_db = async_client[settings.mongodb_db_name]
 
 # Collection names
@@ -24,8 +31,13 @@ COLLECTIONS = {
     "invocations": "invocations",
     "stocks": "stocks",
     "forecasts": "forecasts",
+    "forecast_summary": "forecast_summary",
+    "forecast_summary_coverage": "forecast_summary_coverage",
     "baskets": "baskets",
     "zerodha_tokens": "zerodha_tokens",
+    "news": "news",
+    "rebalance_plans": "rebalance_plans",
+    "order_intents": "order_intents",
 }
 
 
@@ -50,6 +62,27 @@ def setup_indexes():
     ])  # For forecast lookups
     db[COLLECTIONS["forecasts"]].create_index([("gain", -1)])  # For sorting by gain
 
+    # Forecast summary indexes
+    db[COLLECTIONS["forecast_summary"]].create_index([
+        ("stock_ticker", 1),
+        ("days", 1),
+        ("hour", 1)
+    ], unique=True)  # One bucket per stock, horizon and hour
+    db[COLLECTIONS["forecast_summary"]].create_index([
+        ("days", 1),
+        ("hour", -1)
+    ])  # For the buckets of a lookback window
+
+    # News indexes
+    db[COLLECTIONS["news"]].create_index([
+        ("stock_ticker", 1),
+        ("content_hash", 1)
+    ], unique=True)  # One record per distinct headline
+    db[COLLECTIONS["news"]].create_index([
+        ("stock_ticker", 1),
+        ("first_seen_time", -1)
+    ])  # For "new since" lookups
+
     # Basket indexes
     db[COLLECTIONS["baskets"]].create_index([("creation_date", -1)])  # For recent baskets
     db[COLLECTIONS["baskets"]].create_index([("invocation_id", 1)])  # For linking to invocations
@@ -59,6 +92,20 @@ def setup_indexes():
     db[COLLECTIONS["zerodha_tokens"]].create_index([("is_active", 1)])  # For finding active tokens
     db[COLLECTIONS["zerodha_tokens"]].create_index([("created_time", -1)])  # For recent tokens
 
+    # Rebalance plan indexes
+    db[COLLECTIONS["rebalance_plans"]].create_index([
+        ("user_id", 1),
+        ("created_time", -1)
+    ])  # For a user's recent plans
+    db[COLLECTIONS["rebalance_plans"]].create_index([("status", 1)])  # For plans awaiting reconcile
+
+    # Order intent indexes
+    db[COLLECTIONS["order_intents"]].create_index([
+        ("user_id", 1),
+        ("tag", 1)
+    ], unique=True)  # One intent per order tag
+    db[COLLECTIONS["order_intents"]].create_index([("plan_id", 1)])  # For a plan's orders
+
 
 async def get_database() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
     """Get async database instance."""
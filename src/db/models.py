@@ -97,10 +97,28 @@ class Forecast(BaseModel):
     days: int
     reason_summary: str
     sources: List[str]
+    reference_price: Optional[float] = Field(None, description="LTP used to compute the gain")
+    analysis_time: Optional[datetime] = Field(
+        None, description="When the LLM analysis behind a re-issued forecast was made (None: created_time)"
+    )
+    analysis_reference_price: Optional[float] = Field(
+        None, description="LTP at the LLM analysis behind a re-issued forecast (None: reference_price)"
+    )
     created_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     modified_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+class NewsItem(BaseModel):
+    """Model for tracking news headlines already seen for a stock."""
+
+    stock_ticker: str
+    content_hash: str = Field(..., description="SHA-256 of the normalized headline and publisher")
+    headline: str
+    publisher: str
+    published: str = Field("N/A", description="Publish timestamp as reported by the source")
+    first_seen_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
 class ListForecast(BaseModel):
     """Model for LLM response containing a list of forecasts."""
 
@@ -142,3 +160,50 @@ class ZerodhaToken(BaseModel):
     created_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     expires_at: Optional[datetime] = Field(None, description="Token expiration time")
     is_active: bool = Field(default=True, description="Whether token is currently active")
+
+
+class PlannedOrder(BaseModel):
+    """Model for one order of a persisted rebalance plan."""
+
+    ticker: str = Field(..., description="Trading symbol")
+    exchange: str = Field(default="NSE", description="Exchange code")
+    action: str = Field(..., description="BUY or SELL")
+    quantity: int = Field(..., description="Planned quantity")
+    planned_price: float = Field(..., description="Price the plan was computed at")
+    limit_price: Optional[float] = Field(None, description="Limit price sent with the order, if any")
+    order_id: Optional[str] = Field(None, description="Kite order ID once placed")
+    status: str = Field(default="PLANNED", description="PLANNED, FAILED or the latest Kite order status")
+    filled_quantity: int = Field(default=0, description="Quantity filled so far")
+    average_price: Optional[float] = Field(None, description="Average fill price")
+    error: Optional[str] = Field(None, description="Placement error or Kite status message")
+
+
+class RebalancePlan(BaseModel):
+    """Model for a rebalance plan submitted ahead of execution (e.g., as after-market orders)."""
+
+    id: PyObjectId | None = Field(None, alias="_id")
+    user_id: str = Field(..., description="Zerodha user ID")
+    basket_file: str = Field(..., description="Basket the plan was computed for")
+    variety: str = Field(default="amo", description="Kite order variety the plan was placed with")
+    market_date: str = Field(..., description="Trading day (YYYY-MM-DD) the orders execute on")
+    status: str = Field(default="SUBMITTED", description="SUBMITTED, OPEN, COMPLETED or PARTIAL")
+    orders: List[PlannedOrder] = Field(default_factory=list, description="Planned orders")
+    created_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    reconciled_time: Optional[datetime] = Field(None, description="Last reconcile against the order book")
+
+
+class OrderIntent(BaseModel):
+    """Model for an order the rebalancer intends to place, keyed by its deterministic tag."""
+
+    user_id: str = Field(..., description="Zerodha user ID")
+    tag: str = Field(..., description="Order tag sent to Kite (unique per user)")
+    plan_id: str = Field(..., description="Plan the order belongs to")
+    ticker: str = Field(..., description="Trading symbol")
+    exchange: str = Field(default="NSE", description="Exchange code")
+    action: str = Field(..., description="BUY or SELL")
+    quantity: int = Field(..., description="Order quantity")
+    status: str = Field(default="PENDING", description="PENDING, PLACED or FAILED")
+    order_id: Optional[str] = Field(None, description="Kite order ID once placed")
+    error: Optional[str] = Field(None, description="Last placement error")
+    created_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    modified_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,359 @@
+"""
+Async repositories over the Motor database for collections used on hot paths.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.db.database import COLLECTIONS
+from src.db.database import async_db
+from src.db.models import Forecast, OrderIntent, RebalancePlan, ZerodhaToken
+
+
+class ZerodhaTokenRepository:
+    """Async access to stored (encrypted) Zerodha access tokens."""
+
+    def __init__(self, database: Optional[AsyncIOMotorDatabase] = None):
+        """Initialize the repository.
+
+        Args:
+            database: Motor database to use. Defaults to the shared ``async_db``.
+        """
+        self.collection = (database if database is not None else async_db)[COLLECTIONS["zerodha_tokens"]]
+
+    async def find_active(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get the active token document for a user, if any."""
+        return await self.collection.find_one({"user_id": user_id, "is_active": True})
+
+    async def list_active(self) -> List[Dict[str, Any]]:
+        """Get all active token documents, most recent first."""
+        return await self.collection.find({"is_active": True}).sort("created_time", -1).to_list(length=None)
+
+    async def deactivate(self, user_id: str) -> None:
+        """Mark every token of a user as inactive."""
+        await self.collection.update_many({"user_id": user_id}, {"$set": {"is_active": False}})
+
+    async def save_active(self, token: ZerodhaToken) -> None:
+        """Store a token as the user's single active token.
+
+        The collection has a unique index on user_id, so the previous document
+        is replaced rather than a second one inserted.
+        """
+        await self.collection.replace_one(
+            {"user_id": token.user_id},
+            token.model_dump(exclude={"id"}),
+            upsert=True,
+        )
+
+
+# Plan statuses after which no order of the plan can change any more
+FINAL_PLAN_STATUSES = ("COMPLETED", "PARTIAL")
+
+
+class RebalancePlanRepository:
+    """Async access to persisted rebalance plans and their order IDs."""
+
+    def __init__(self, database: Optional[AsyncIOMotorDatabase] = None):
+        """Initialize the repository.
+
+        Args:
+            database: Motor database to use. Defaults to the shared ``async_db``.
+        """
+        self.collection = (database if database is not None else async_db)[COLLECTIONS["rebalance_plans"]]
+
+    async def insert(self, plan: RebalancePlan) -> str:
+        """Store a new plan and return its ID."""
+        result = await self.collection.insert_one(plan.model_dump(exclude={"id"}))
+        return str(result.inserted_id)
+
+    async def get(self, plan_id: str) -> Optional[RebalancePlan]:
+        """Get a plan by ID."""
+        document = await self.collection.find_one({"_id": ObjectId(plan_id)})
+        return RebalancePlan(**document) if document else None
+
+    async def list_pending(self, user_id: Optional[str] = None) -> List[RebalancePlan]:
+        """Get plans whose orders may still change, oldest first."""
+        query: Dict[str, Any] = {"status": {"$nin": list(FINAL_PLAN_STATUSES)}}
+        if user_id:
+            query["user_id"] = user_id
+        documents = await self.collection.find(query).sort("created_time", 1).to_list(length=None)
+        return [RebalancePlan(**document) for document in documents]
+
+    async def save_reconciled(self, plan: RebalancePlan) -> None:
+        """Store the orders and status of a reconciled plan."""
+        await self.collection.update_one(
+            {"_id": ObjectId(str(plan.id))},
+            {"$set": {
+                "orders": [order.model_dump() for order in plan.orders],
+                "status": plan.status,
+                "reconciled_time": plan.reconciled_time,
+            }},
+        )
+
+
+class OrderIntentRepository:
+    """Async access to the order intent log used to deduplicate order placement."""
+
+    def __init__(self, database: Optional[AsyncIOMotorDatabase] = None):
+        """Initialize the repository.
+
+        Args:
+            database: Motor database to use. Defaults to the shared ``async_db``.
+        """
+        self.collection = (database if database is not None else async_db)[COLLECTIONS["order_intents"]]
+
+    async def find(self, user_id: str, tag: str) -> Optional[OrderIntent]:
+        """Get the intent recorded for an order tag, if any."""
+        document = await self.collection.find_one({"user_id": user_id, "tag": tag})
+        return OrderIntent(**document) if document else None
+
+    async def record(self, intent: OrderIntent) -> None:
+        """Record an intent before its first placement attempt (no-op if the tag is already logged)."""
+        await self.collection.update_one(
+            {"user_id": intent.user_id, "tag": intent.tag},
+            {"$setOnInsert": intent.model_dump()},
+            upsert=True,
+        )
+
+    async def mark_placed(self, user_id: str, tag: str, order_id: str) -> None:
+        """Attach the Kite order ID to an intent."""
+        await self.collection.update_one(
+            {"user_id": user_id, "tag": tag},
+            {"$set": {"status": "PLACED", "order_id": order_id, "error": None,
+                      "modified_time": datetime.now(timezone.utc)}},
+        )
+
+    async def mark_failed(self, user_id: str, tag: str, error: str) -> None:
+        """Record that an intent was given up on."""
+        await self.collection.update_one(
+            {"user_id": user_id, "tag": tag},
+            {"$set": {"status": "FAILED", "error": error, "modified_time": datetime.now(timezone.utc)}},
+        )
+
+
+def summary_hour(moment: datetime) -> datetime:
+    """Start of the UTC hour containing ``moment`` (naive datetimes are taken as UTC, as Mongo returns them)."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    else:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+# Coverage of a rebuild of the whole history
+SUMMARY_COVERS_ALL = datetime.min.replace(tzinfo=timezone.utc)
+
+
+class ForecastSummaryRepository:
+    """Hourly running totals of forecasts per stock and horizon, kept current on every forecast insert.
+
+    Top-N selection over a lookback window reads the small summary buckets of
+    the whole hours in the window, plus the raw forecasts of the partial
+    first hour, instead of aggregating every full forecast document.
+
+    A coverage watermark records the time from which the buckets hold every
+    forecast. ``rebuild`` lowers it, and a failed update raises it past the
+    hour it missed; windows starting before it must not be read from the
+    summary (see ``covers``).
+    """
+
+    def __init__(self, database: Optional[AsyncIOMotorDatabase] = None):
+        """Initialize the repository.
+
+        Args:
+            database: Motor database to use. Defaults to the shared ``async_db``.
+        """
+        database = database if database is not None else async_db
+        self.collection = database[COLLECTIONS["forecast_summary"]]
+        self.coverage = database[COLLECTIONS["forecast_summary_coverage"]]
+        self.forecasts = database[COLLECTIONS["forecasts"]]
+
+    async def covered_since(self) -> Optional[datetime]:
+        """Time from which every forecast is in the buckets (None: the summary was never rebuilt)."""
+        document = await self.coverage.find_one({"_id": "coverage"})
+        if not document:
+            return None
+        covered_since = document["covered_since"]
+        return covered_since if covered_since.tzinfo else covered_since.replace(tzinfo=timezone.utc)
+
+    async def covers(self, since_time: datetime) -> bool:
+        """Return True if the buckets hold every forecast created since ``since_time``."""
+        covered_since = await self.covered_since()
+        if since_time.tzinfo is None:
+            since_time = since_time.replace(tzinfo=timezone.utc)
+        return covered_since is not None and since_time >= covered_since
+
+    async def mark_missed(self, created_time: datetime) -> None:
+        """Move the watermark past the hour of a forecast whose bucket update failed."""
+        await self.coverage.update_one(
+            {"_id": "coverage"},
+            {"$max": {"covered_since": summary_hour(created_time) + timedelta(hours=1)}},
+            upsert=True,
+        )
+
+    async def record(self, forecast_id: ObjectId, forecast: Forecast) -> None:
+        """Add a newly inserted forecast to the running totals of its hour."""
+        created_time = forecast.created_time
+        await self.collection.update_one(
+            {"stock_ticker": forecast.stock_ticker, "days": forecast.days, "hour": summary_hour(created_time)},
+            [
+                {"$set": {
+                    "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+                    "gain_sum": {"$add": [{"$ifNull": ["$gain_sum", 0.0]}, forecast.gain]},
+                    "target_sum": {"$add": [{"$ifNull": ["$target_sum", 0.0]}, forecast.target_price]},
+                    # Out-of-order inserts must not replace a newer latest forecast
+                    "latest_forecast_id": {"$cond": [
+                        {"$gte": [created_time, {"$ifNull": ["$latest_created_time", datetime.min]}]},
+                        forecast_id,
+                        "$latest_forecast_id",
+                    ]},
+                    "latest_created_time": {"$max": [created_time, {"$ifNull": ["$latest_created_time", datetime.min]}]},
+                    "modified_time": datetime.now(timezone.utc),
+                }},
+                {"$set": {
+                    "gain_mean": {"$divide": ["$gain_sum", "$count"]},
+                    "target_mean": {"$divide": ["$target_sum", "$count"]},
+                }},
+            ],
+            upsert=True,
+        )
+
+    async def top_stocks(self, tickers: Iterable[str], since_time: datetime, limit: int,
+                         days: int = 7) -> List[Dict[str, Any]]:
+        """Rank stocks by mean forecast gain over the forecasts created since ``since_time``.
+
+        Returns:
+            Up to ``limit`` entries, best mean gain first, with 'stock_ticker',
+            'count', 'gain_mean', 'target_mean' and 'latest_forecast_id'
+        """
+        tickers = list(tickers)
+        if since_time.tzinfo is None:
+            since_time = since_time.replace(tzinfo=timezone.utc)
+        first_whole_hour = summary_hour(since_time)
+        if first_whole_hour < since_time:
+            first_whole_hour += timedelta(hours=1)
+
+        totals: Dict[str, Dict[str, Any]] = {}
+
+        def add(ticker: str, count: int, gain_sum: float, target_sum: float, latest_id, latest_time) -> None:
+            entry = totals.setdefault(ticker, {"stock_ticker": ticker, "count": 0, "gain_sum": 0.0,
+                                               "target_sum": 0.0, "latest_forecast_id": None, "latest_time": None})
+            entry["count"] += count
+            entry["gain_sum"] += gain_sum
+            entry["target_sum"] += target_sum
+            if entry["latest_time"] is None or (latest_time is not None and latest_time > entry["latest_time"]):
+                entry["latest_forecast_id"], entry["latest_time"] = latest_id, latest_time
+
+        buckets = self.collection.find(
+            {"stock_ticker": {"$in": tickers}, "days": days, "hour": {"$gte": first_whole_hour}},
+            {"_id": 0, "stock_ticker": 1, "count": 1, "gain_sum": 1, "target_sum": 1,
+             "latest_forecast_id": 1, "latest_created_time": 1},
+        )
+        async for bucket in buckets:
+            add(bucket["stock_ticker"], bucket["count"], bucket["gain_sum"], bucket["target_sum"],
+                bucket["latest_forecast_id"], bucket["latest_created_time"])
+
+        # The partial hour at the start of the window comes from the raw forecasts
+        if first_whole_hour > since_time:
+            partial = self.forecasts.find(
+                {"stock_ticker": {"$in": tickers}, "days": days,
+                 "created_time": {"$gte": since_time, "$lt": first_whole_hour}},
+                {"stock_ticker": 1, "gain": 1, "target_price": 1, "created_time": 1},
+            )
+            async for forecast in partial:
+                add(forecast["stock_ticker"], 1, forecast["gain"], forecast["target_price"],
+                    forecast["_id"], forecast["created_time"])
+
+        ranked = []
+        for entry in totals.values():
+            if not entry["count"]:
+                continue
+            ranked.append({
+                "stock_ticker": entry["stock_ticker"],
+                "count": entry["count"],
+                "gain_mean": entry["gain_sum"] / entry["count"],
+                "target_mean": entry["target_sum"] / entry["count"],
+                "latest_forecast_id": entry["latest_forecast_id"],
+            })
+        ranked.sort(key=lambda entry: entry["gain_mean"], reverse=True)
+        return ranked[:limit]
+
+    async def rebuild(self, since_time: Optional[datetime] = None) -> int:
+        """Recompute the buckets from the forecasts collection.
+
+        Args:
+            since_time: Only rebuild the hours from this time on (default: everything)
+
+        Returns:
+            Number of buckets written
+        """
+        match: Dict[str, Any] = {}
+        bucket_filter: Dict[str, Any] = {}
+        rebuilt_since = SUMMARY_COVERS_ALL
+        if since_time is not None:
+            rebuilt_since = summary_hour(since_time)
+            match["created_time"] = {"$gte": rebuilt_since}
+            bucket_filter["hour"] = {"$gte": rebuilt_since}
+        # Hours being rebuilt are not covered until the rebuild completes
+        previous = await self.covered_since()
+        await self.coverage.update_one(
+            {"_id": "coverage"},
+            {"$set": {"covered_since": datetime.max.replace(tzinfo=timezone.utc)}},
+            upsert=True,
+        )
+        await self.collection.delete_many(bucket_filter)
+
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"created_time": 1}},
+            {"$group": {
+                "_id": {
+                    "stock_ticker": "$stock_ticker",
+                    "days": "$days",
+                    "hour": {"$dateFromParts": {
+                        "year": {"$year": "$created_time"},
+                        "month": {"$month": "$created_time"},
+                        "day": {"$dayOfMonth": "$created_time"},
+                        "hour": {"$hour": "$created_time"},
+                    }},
+                },
+                "count": {"$sum": 1},
+                "gain_sum": {"$sum": "$gain"},
+                "target_sum": {"$sum": "$target_price"},
+                "latest_forecast_id": {"$last": "$_id"},
+                "latest_created_time": {"$last": "$created_time"},
+            }},
+            {"$project": {
+                "_id": 0,
+                "stock_ticker": "$_id.stock_ticker",
+                "days": "$_id.days",
+                "hour": "$_id.hour",
+                "count": 1,
+                "gain_sum": 1,
+                "target_sum": 1,
+                "gain_mean": {"$divide": ["$gain_sum", "$count"]},
+                "target_mean": {"$divide": ["$target_sum", "$count"]},
+                "latest_forecast_id": 1,
+                "latest_created_time": 1,
+                "modified_time": "$$NOW",
+            }},
+            {"$merge": {
+                "into": COLLECTIONS["forecast_summary"],
+                "on": ["stock_ticker", "days", "hour"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ]
+        await self.forecasts.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+        # Hours before a partial rebuild stay covered only if they already were
+        covered_since = rebuilt_since if previous is None else min(previous, rebuilt_since)
+        await self.coverage.update_one(
+            {"_id": "coverage"},
+            {"$set": {"covered_since": covered_since, "rebuilt_time": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        return await self.collection.count_documents(bucket_filter)
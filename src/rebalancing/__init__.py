@@ -0,0 +1,16 @@
+"""
+Rebalancing engines that turn target weights into integer share orders.
+"""
+
+from .bands import CostModel, DriftBands, plan_band_rebalance
+from .solver import solve_rebalance
+from .vectorized import evaluate_scenarios, scenario_grid
+
+__all__ = [
+    "solve_rebalance",
+    "evaluate_scenarios",
+    "scenario_grid",
+    "DriftBands",
+    "CostModel",
+    "plan_band_rebalance",
+]
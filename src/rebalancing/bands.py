@@ -0,0 +1,211 @@
+"""
+Drift-band rebalancing.
+
+Instead of trading every ticker whose value differs from target by more than
+the minimum order value, each ticker gets a no-trade band around its target
+weight. Only tickers whose weight has drifted outside their band are traded,
+and by default only back to the band edge (partial rebalancing), which keeps
+small drifts from turning into a stream of tiny orders.
+
+The half-width of a band is the larger of an absolute tolerance (in weight,
+0.01 = one percentage point) and a tolerance relative to the target weight
+(0.2 = 20% of the weight). Tickers held but not in the basket have no band
+and are always sold down to zero.
+
+An optional cost model (brokerage, STT, slippage) reserves cash for charges
+and drops orders that cost more than the deviation they remove.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from .solver import solve_rebalance
+
+logger = logging.getLogger(__name__)
+
+# Zerodha equity delivery: no brokerage, STT 0.1% on both buys and sells
+DEFAULT_BROKERAGE_PER_ORDER = 0.0
+DEFAULT_STT_PCT = 0.1
+# Expected market-order slippage for small caps, in percent of order value
+DEFAULT_SLIPPAGE_PCT = 0.05
+
+
+class DriftBands:
+    """Per-ticker tolerance bands around target weights."""
+
+    def __init__(self, absolute: float = 0.0, relative: float = 0.0,
+                 overrides: Optional[Dict[str, float]] = None):
+        """Initialize the bands.
+
+        Args:
+            absolute: Band half-width in weight (0.01 = ±1 percentage point)
+            relative: Band half-width as a fraction of the target weight (0.2 = ±20%)
+            overrides: Band half-width in weight for specific tickers
+        """
+        if absolute < 0 or relative < 0:
+            raise ValueError("Drift band widths must not be negative")
+        self.absolute = absolute
+        self.relative = relative
+        self.overrides = overrides or {}
+
+    def width(self, ticker: str, target_weight: float) -> float:
+        """Band half-width (in weight) for a ticker with the given target weight."""
+        if ticker in self.overrides:
+            return self.overrides[ticker]
+        return max(self.absolute, self.relative * target_weight)
+
+    def describe(self) -> str:
+        parts = []
+        if self.absolute:
+            parts.append(f"±{self.absolute * 100:.2f}pp")
+        if self.relative:
+            parts.append(f"±{self.relative * 100:.0f}% of weight")
+        return " or ".join(parts) or "no band"
+
+
+class CostModel:
+    """Trading costs of a delivery order, in rupees."""
+
+    def __init__(self, brokerage_per_order: float = DEFAULT_BROKERAGE_PER_ORDER, brokerage_pct: float = 0.0,
+                 stt_pct: float = DEFAULT_STT_PCT, slippage_pct: float = DEFAULT_SLIPPAGE_PCT):
+        """Initialize the cost model.
+
+        Args:
+            brokerage_per_order: Flat brokerage per order in rupees
+            brokerage_pct: Brokerage in percent of order value
+            stt_pct: Securities transaction tax in percent of order value
+            slippage_pct: Expected slippage in percent of order value
+        """
+        self.brokerage_per_order = brokerage_per_order
+        self.brokerage_pct = brokerage_pct
+        self.stt_pct = stt_pct
+        self.slippage_pct = slippage_pct
+
+    @property
+    def rate(self) -> float:
+        """Value-proportional cost as a fraction of order value."""
+        return (self.brokerage_pct + self.stt_pct + self.slippage_pct) / 100
+
+    def order_cost(self, value: float) -> float:
+        """Cost of one order of the given value."""
+        return self.brokerage_per_order + abs(value) * self.rate
+
+
+def band_breaches(total_value: float, target_weights: Dict[str, float], prices: Dict[str, float],
+                  current_quantities: Dict[str, int], bands: DriftBands,
+                  partial: bool = True) -> Dict[str, Dict[str, float]]:
+    """Find the tickers whose weight has drifted outside their band.
+
+    Returns:
+        Dictionary per breaching ticker with 'weight', 'target_weight', 'band',
+        'excess' (rupees beyond the band edge) and 'rebalance_weight' (band
+        edge when partial, else the target weight)
+    """
+    breaches = {}
+    if total_value <= 0:
+        return breaches
+    tickers = set(target_weights) | {t for t, q in current_quantities.items() if q}
+    for ticker in tickers:
+        price = prices.get(ticker)
+        if not price:
+            continue
+        weight = current_quantities.get(ticker, 0) * price / total_value
+        if ticker not in target_weights:
+            if weight > 0:
+                breaches[ticker] = {'weight': weight, 'target_weight': 0.0, 'band': 0.0,
+                                    'excess': weight * total_value, 'rebalance_weight': 0.0}
+            continue
+        target_weight = target_weights[ticker]
+        band = bands.width(ticker, target_weight)
+        drift = weight - target_weight
+        if abs(drift) <= band:
+            continue
+        edge = target_weight + band if drift > 0 else max(target_weight - band, 0.0)
+        breaches[ticker] = {
+            'weight': weight,
+            'target_weight': target_weight,
+            'band': band,
+            'excess': (abs(drift) - band) * total_value,
+            'rebalance_weight': edge if partial else target_weight,
+        }
+    return breaches
+
+
+def plan_band_rebalance(
+    total_value: float,
+    target_weights: Dict[str, float],
+    prices: Dict[str, float],
+    current_quantities: Dict[str, int],
+    cash: float,
+    bands: DriftBands,
+    partial: bool = True,
+    min_order_value: float = 0.0,
+    buy_cost_buffer: float = 0.0,
+    cost_model: Optional[CostModel] = None,
+) -> Dict[str, Any]:
+    """Plan integer trades for the tickers outside their drift band.
+
+    Breaching tickers are solved with ``solve_rebalance`` towards their band
+    edge (or target when ``partial`` is False); tickers inside their band are
+    left untouched.
+
+    Args:
+        total_value: Portfolio value (holdings + positions + cash) the weights apply to
+        target_weights: Target weight per ticker
+        prices: Price per ticker
+        current_quantities: Currently held quantity per ticker
+        cash: Cash available for buys before any sell proceeds
+        bands: Tolerance bands
+        partial: Trade back to the band edge instead of the target
+        min_order_value: Smallest order value allowed
+        buy_cost_buffer: Fraction added to buy prices when checking cash
+        cost_model: Optional trading costs; reserved on buys and used to drop
+                    orders that cost more than the deviation they remove
+
+    Returns:
+        Dictionary with 'quantities', 'trades', 'orders', 'turnover', 'costs',
+        'deviation' and 'deviation_pct' (against the full targets), 'band_excess'
+        (rupees outside the bands before trading), 'breaches' and 'cash_left'
+    """
+    breaches = band_breaches(total_value, target_weights, prices, current_quantities, bands, partial)
+    quantities = {t: q for t, q in current_quantities.items() if q}
+    trades: Dict[str, int] = {}
+    cash_left = cash
+
+    if breaches:
+        order_cost = 0.0
+        if cost_model is not None:
+            order_cost = lambda ticker, quantity_change, price: cost_model.order_cost(quantity_change * price)
+            buy_cost_buffer += cost_model.rate
+        solution = solve_rebalance(
+            total_value,
+            {t: b['rebalance_weight'] for t, b in breaches.items() if b['rebalance_weight'] > 0},
+            {t: prices[t] for t in breaches},
+            {t: current_quantities.get(t, 0) for t in breaches},
+            cash,
+            min_order_value=min_order_value,
+            buy_cost_buffer=buy_cost_buffer,
+            order_cost=order_cost,
+        )
+        quantities.update(solution['quantities'])
+        trades = solution['trades']
+        cash_left = solution['cash_left']
+
+    turnover = sum(abs(q) * prices[t] for t, q in trades.items())
+    deviation = sum(
+        abs(total_value * target_weights.get(t, 0.0) - quantities.get(t, 0) * price)
+        for t, price in prices.items() if price
+    )
+    logger.debug(f"Drift bands ({bands.describe()}): {len(breaches)} breaches, {len(trades)} orders")
+    return {
+        'quantities': {t: q for t, q in quantities.items() if q},
+        'trades': trades,
+        'orders': len(trades),
+        'turnover': turnover,
+        'costs': sum(cost_model.order_cost(abs(q) * prices[t]) for t, q in trades.items()) if cost_model else 0.0,
+        'deviation': deviation,
+        'deviation_pct': deviation / total_value * 100 if total_value else 0.0,
+        'band_excess': sum(b['excess'] for b in breaches.values()),
+        'breaches': breaches,
+        'cash_left': cash_left,
+    }
@@ -0,0 +1,240 @@
+"""
+Integer rebalancing solver.
+
+Given the portfolio value, target weights, prices, current quantities and
+available cash, choose whole-share target quantities that minimize the total
+absolute deviation from the target values in a single pass, subject to cash
+and a minimum order value, while avoiding orders that do not pay for
+themselves.
+
+The solver is a greedy heuristic for the underlying integer program:
+
+1. Start from the floor of each target quantity (never overshooting a target).
+2. Cancel trades smaller than the minimum order value.
+3. If buys exceed the cash (plus sell proceeds), shrink them, always taking
+   the cut that costs the least deviation per rupee freed.
+4. Spend what is left on the whole-share steps with the best deviation
+   reduction per rupee.
+5. Drop orders whose deviation reduction is below ``order_cost``, smallest
+   first, and spend the cash they free on the orders that remain. The cost is
+   zero unless the caller sets one, so by default every order that reduces
+   the deviation is placed.
+
+Steps 3 and 4 are exact for a single share per ticker and the floor start
+leaves less than one share of deviation per ticker, so the result is within
+one share per ticker of the integer optimum.
+"""
+
+import heapq
+import logging
+import math
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class _Problem:
+    """Mutable solver state shared by the solver phases."""
+
+    def __init__(self, total_value: float, target_weights: Dict[str, float], prices: Dict[str, float],
+                 current_quantities: Dict[str, int], cash: float, min_order_value: float, buy_cost_buffer: float):
+        self.prices = prices
+        self.current = current_quantities
+        self.targets = {t: total_value * target_weights.get(t, 0.0) for t in prices}
+        self.cash = cash
+        self.min_order_value = min_order_value
+        self.buy_cost_buffer = buy_cost_buffer
+        self.quantities: Dict[str, int] = {}
+
+    def deviation(self, ticker: str, quantity: int) -> float:
+        return abs(self.targets[ticker] - self.prices[ticker] * quantity)
+
+    def cash_cost(self, ticker: str, quantity: int) -> float:
+        """Net cash needed to move the ticker from its current quantity to ``quantity``."""
+        delta = quantity - self.current.get(ticker, 0)
+        price = self.prices[ticker]
+        return delta * price * (1 + self.buy_cost_buffer) if delta > 0 else delta * price
+
+    def spend(self) -> float:
+        return sum(self.cash_cost(t, q) for t, q in self.quantities.items())
+
+    def tradable(self, ticker: str, quantity: int) -> bool:
+        """True if moving to ``quantity`` is no trade or a trade above the minimum order value."""
+        delta = abs(quantity - self.current.get(ticker, 0))
+        return delta == 0 or delta * self.prices[ticker] >= self.min_order_value
+
+    def step_up(self, ticker: str) -> Optional[Tuple[int, float, float]]:
+        """Smallest valid increase for a ticker as (new_quantity, deviation_gain, cash_cost)."""
+        quantity = self.quantities[ticker]
+        current = self.current.get(ticker, 0)
+        new_quantity = quantity + 1
+        if not self.tradable(ticker, new_quantity):
+            if new_quantity < current:
+                # Shrinking a sell below the minimum: cancel it instead
+                new_quantity = current
+            else:
+                new_quantity = current + math.ceil(self.min_order_value / self.prices[ticker])
+        gain = self.deviation(ticker, quantity) - self.deviation(ticker, new_quantity)
+        cost = self.cash_cost(ticker, new_quantity) - self.cash_cost(ticker, quantity)
+        return new_quantity, gain, cost
+
+    def step_down(self, ticker: str) -> Optional[Tuple[int, float, float]]:
+        """Smallest valid decrease of a buy as (new_quantity, deviation_loss, cash_freed)."""
+        quantity = self.quantities[ticker]
+        current = self.current.get(ticker, 0)
+        if quantity <= current:
+            return None
+        new_quantity = quantity - 1
+        if not self.tradable(ticker, new_quantity):
+            new_quantity = current
+        loss = self.deviation(ticker, new_quantity) - self.deviation(ticker, quantity)
+        freed = self.cash_cost(ticker, quantity) - self.cash_cost(ticker, new_quantity)
+        return new_quantity, loss, freed
+
+
+def _initial_quantities(problem: _Problem) -> None:
+    for ticker, price in problem.prices.items():
+        quantity = int(problem.targets[ticker] // price)
+        if not problem.tradable(ticker, quantity):
+            quantity = problem.current.get(ticker, 0)
+        problem.quantities[ticker] = quantity
+
+
+def _repair_cash(problem: _Problem) -> None:
+    overspend = problem.spend() - problem.cash
+    if overspend <= 0:
+        return
+
+    # Scale every buy down at once, then let the greedy fix the remainder
+    buy_cost = sum(max(problem.cash_cost(t, q), 0.0) for t, q in problem.quantities.items())
+    if buy_cost > 0:
+        ratio = max(0.0, 1.0 - overspend / buy_cost)
+        for ticker, quantity in problem.quantities.items():
+            current = problem.current.get(ticker, 0)
+            if quantity > current:
+                scaled = current + int((quantity - current) * ratio)
+                problem.quantities[ticker] = scaled if problem.tradable(ticker, scaled) else current
+
+    while problem.spend() > problem.cash:
+        best = None
+        for ticker in problem.quantities:
+            step = problem.step_down(ticker)
+            if step is None:
+                continue
+            new_quantity, loss, freed = step
+            score = loss / freed if freed > 0 else math.inf
+            if best is None or score < best[0]:
+                best = (score, ticker, new_quantity)
+        if best is None:
+            break
+        problem.quantities[best[1]] = best[2]
+
+
+def _fill(problem: _Problem, new_orders: bool = True) -> None:
+    leftover = problem.cash - problem.spend()
+    heap = []
+
+    def push(ticker: str) -> None:
+        if not new_orders and problem.quantities[ticker] == problem.current.get(ticker, 0):
+            return
+        new_quantity, gain, cost = problem.step_up(ticker)
+        if gain > 0:
+            # Max-heap on deviation reduction per rupee spent
+            heapq.heappush(heap, (-gain / max(cost, 1e-9), ticker, new_quantity, cost))
+
+    for ticker in problem.quantities:
+        push(ticker)
+
+    while heap:
+        _, ticker, new_quantity, cost = heapq.heappop(heap)
+        if cost > leftover:
+            continue
+        problem.quantities[ticker] = new_quantity
+        leftover -= cost
+        push(ticker)
+
+
+def _drop_marginal_orders(problem: _Problem, order_cost: Union[float, Callable[[str, int, float], float]]) -> None:
+    """Drop orders whose deviation reduction does not cover their cost, smallest first.
+
+    The cash a dropped buy frees is spent on the orders that remain, so the
+    order count falls without opening new orders elsewhere.
+    """
+    while True:
+        marginal = []
+        for ticker, quantity in problem.quantities.items():
+            current = problem.current.get(ticker, 0)
+            if quantity == current:
+                continue
+            improvement = problem.deviation(ticker, current) - problem.deviation(ticker, quantity)
+            cost = order_cost(ticker, quantity - current, problem.prices[ticker]) if callable(order_cost) else order_cost
+            if improvement <= cost:
+                marginal.append((improvement - cost, ticker))
+
+        for _, ticker in sorted(marginal):
+            # Cancelling a sell also removes its proceeds; keep it if the buys need them
+            spend_after = problem.spend() - problem.cash_cost(ticker, problem.quantities[ticker])
+            if spend_after <= problem.cash:
+                problem.quantities[ticker] = problem.current.get(ticker, 0)
+                break
+        else:
+            return
+        _fill(problem, new_orders=False)
+
+
+def solve_rebalance(
+    total_value: float,
+    target_weights: Dict[str, float],
+    prices: Dict[str, float],
+    current_quantities: Dict[str, int],
+    cash: float,
+    min_order_value: float = 0.0,
+    buy_cost_buffer: float = 0.0,
+    order_cost: Union[float, Callable[[str, int, float], float]] = 0.0,
+) -> Dict[str, Any]:
+    """Compute integer target quantities in one pass.
+
+    Args:
+        total_value: Portfolio value (holdings + positions + cash) the weights apply to
+        target_weights: Target weight per ticker (tickers absent here are sold down to zero)
+        prices: Price per ticker; tickers without a price are left untouched
+        current_quantities: Currently held quantity per ticker
+        cash: Cash available for buys before any sell proceeds
+        min_order_value: Smallest order value allowed (smaller trades are not placed)
+        buy_cost_buffer: Fraction added to buy prices when checking cash (charges, slippage)
+        order_cost: Minimum deviation reduction (in rupees) an order must achieve to be kept,
+                    or a callable (ticker, quantity_change, price) returning it per order
+                    (default: 0, keeps every order that reduces the deviation)
+
+    Returns:
+        Dictionary with 'quantities' (target quantity per ticker), 'trades'
+        (non-zero quantity changes), 'orders', 'deviation' (total absolute
+        deviation in rupees), 'deviation_pct' (of total value) and 'cash_left'
+    """
+    tickers = set(target_weights) | {t for t, q in current_quantities.items() if q}
+    unpriced = sorted(t for t in tickers if not prices.get(t))
+    if unpriced:
+        logger.warning(f"No price for {', '.join(unpriced)}; leaving them untouched")
+    priced = {t: float(prices[t]) for t in tickers if prices.get(t)}
+
+    problem = _Problem(total_value, target_weights, priced, current_quantities, cash,
+                       min_order_value, buy_cost_buffer)
+    _initial_quantities(problem)
+    _repair_cash(problem)
+    _fill(problem)
+    _drop_marginal_orders(problem, order_cost)
+
+    trades = {
+        t: q - current_quantities.get(t, 0)
+        for t, q in problem.quantities.items()
+        if q != current_quantities.get(t, 0)
+    }
+    deviation = sum(problem.deviation(t, q) for t, q in problem.quantities.items())
+    return {
+        "quantities": dict(problem.quantities),
+        "trades": trades,
+        "orders": len(trades),
+        "deviation": deviation,
+        "deviation_pct": deviation / total_value * 100 if total_value else 0.0,
+        "cash_left": cash - problem.spend(),
+    }
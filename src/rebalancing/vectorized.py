@@ -0,0 +1,182 @@
+"""
+Vectorized rebalance engine for large baskets and what-if grids.
+
+Every input is broadcast to a ``(scenarios, tickers)`` array, so one call
+plans many scenarios at once, e.g. a grid over the minimum order value, the
+target deficit, portfolio values or candidate baskets, without placing
+anything. Planning follows ``solve_rebalance`` in a closed form:
+
+1. Floor each target quantity and cancel trades below the minimum order value.
+2. Skip the scenario if the total deficit is already within the target deficit.
+3. Scale buys down proportionally when cash (plus sell proceeds) falls short.
+4. Add one share to the tickers with the best deviation reduction per rupee
+   while the leftover cash lasts.
+5. Drop orders whose deviation reduction is below ``order_cost``, smallest
+   first and one per scenario per round, keeping sells whose proceeds the buys
+   need, and re-spend the freed cash on the orders that remain.
+
+The result matches ``solve_rebalance`` with the same ``order_cost`` except
+where a ticker would need more than one extra share, which the floor start
+makes rare.
+"""
+
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+def align(tickers: Sequence[str], values: Dict[str, float]) -> np.ndarray:
+    """Return a float array of ``values`` in ticker order (missing tickers are 0)."""
+    return np.array([float(values.get(ticker, 0.0)) for ticker in tickers])
+
+
+def evaluate_scenarios(
+    target_weights: np.ndarray,
+    prices: np.ndarray,
+    quantities: np.ndarray,
+    cash: Any,
+    min_order_value: Any = 0.0,
+    target_deficit: Any = 0.0,
+    buy_cost_buffer: float = 0.0,
+    order_cost: Any = 0.0,
+) -> Dict[str, np.ndarray]:
+    """Plan integer rebalancing trades for many scenarios at once.
+
+    Args:
+        target_weights: Target weights, shape (tickers,) or (scenarios, tickers)
+        prices: Prices, shape (tickers,) or (scenarios, tickers); must be positive
+        quantities: Current quantities, shape (tickers,) or (scenarios, tickers)
+        cash: Available cash, scalar or shape (scenarios,)
+        min_order_value: Minimum order value, scalar or shape (scenarios,)
+        target_deficit: Total deficit below which no trade is made, scalar or shape (scenarios,)
+        buy_cost_buffer: Fraction added to buy prices when checking cash
+        order_cost: Minimum deviation reduction (in rupees) an order must achieve to be kept,
+                    scalar or shape (scenarios,)
+
+    Returns:
+        Dictionary of arrays: 'quantities' and 'trades' of shape (scenarios, tickers),
+        and per scenario 'orders', 'buys', 'sells', 'turnover' (traded value),
+        'deficit' (before trading), 'residual' and 'residual_pct' (after trading),
+        'cash_left' and 'total_value'
+    """
+    weights = np.atleast_2d(np.asarray(target_weights, dtype=float))
+    prices = np.atleast_2d(np.asarray(prices, dtype=float))
+    current = np.atleast_2d(np.asarray(quantities, dtype=float))
+    scenarios = max(weights.shape[0], prices.shape[0], current.shape[0],
+                    np.size(cash), np.size(min_order_value), np.size(target_deficit), np.size(order_cost))
+    shape = (scenarios, max(weights.shape[1], prices.shape[1], current.shape[1]))
+    weights, prices, current = (np.broadcast_to(a, shape) for a in (weights, prices, current))
+    cash = np.broadcast_to(np.asarray(cash, dtype=float), (scenarios,))
+    min_order = np.broadcast_to(np.asarray(min_order_value, dtype=float), (scenarios,))[:, None]
+    target_deficit = np.broadcast_to(np.asarray(target_deficit, dtype=float), (scenarios,))
+    order_cost = np.broadcast_to(np.asarray(order_cost, dtype=float), (scenarios,))[:, None]
+    buy_factor = 1.0 + buy_cost_buffer
+
+    total_value = (prices * current).sum(axis=1) + cash
+    targets = total_value[:, None] * weights
+    deficit = np.abs(targets - prices * current).sum(axis=1)
+
+    def net_cost(trades: np.ndarray) -> np.ndarray:
+        return np.where(trades > 0, trades * prices * buy_factor, trades * prices).sum(axis=1)
+
+    def tradable(trades: np.ndarray) -> np.ndarray:
+        return (trades == 0) | (np.abs(trades) * prices >= min_order)
+
+    # 1. Floor start, cancelling trades below the minimum order value
+    planned = np.floor(targets / prices)
+    planned = np.where(tradable(planned - current), planned, current)
+
+    # 2. Nothing to do where the deficit is already within target
+    planned = np.where((deficit <= target_deficit)[:, None], current, planned)
+    active = deficit > target_deficit
+
+    # 3. Scale buys when short of cash
+    trades = planned - current
+    overspend = net_cost(trades) - cash
+    buy_cost = np.where(trades > 0, trades * prices * buy_factor, 0.0).sum(axis=1)
+    short = overspend > 0
+    ratio = np.where(short & (buy_cost > 0), 1.0 - overspend / np.where(buy_cost > 0, buy_cost, 1.0), 1.0)
+    ratio = np.clip(ratio, 0.0, 1.0)[:, None]
+    scaled = np.where(trades > 0, np.floor(trades * ratio), trades)
+    scaled = np.where(tradable(scaled), scaled, 0.0)
+    # Flooring can leave a sliver of overspend when sell proceeds alone fall short
+    while True:
+        over = net_cost(scaled) - cash > 1e-9
+        if not over.any():
+            break
+        largest = np.argmax(np.where(scaled > 0, scaled * prices, -1.0), axis=1)
+        rows = np.nonzero(over & (scaled.max(axis=1) > 0))[0]
+        if rows.size == 0:
+            break
+        scaled[rows, largest[rows]] -= 1
+        scaled = np.where(tradable(scaled), scaled, 0.0)
+    planned = current + scaled
+
+    def top_up(planned: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+        """Add one share where allowed, best deviation reduction per rupee first, within leftover cash."""
+        leftover = cash - net_cost(planned - current)
+        gain = np.abs(targets - prices * planned) - np.abs(targets - prices * (planned + 1))
+        step_trades = planned + 1 - current
+        step_cost = np.where(step_trades > 0, prices * buy_factor, prices)
+        eligible = (gain > 0) & tradable(step_trades) & allowed
+        score = np.where(eligible, gain / step_cost, -np.inf)
+        order = np.argsort(-score, axis=1)
+        ranked_cost = np.take_along_axis(np.where(eligible, step_cost, np.inf), order, axis=1)
+        accepted_ranked = np.cumsum(ranked_cost, axis=1) <= leftover[:, None]
+        accepted = np.zeros(shape, dtype=bool)
+        np.put_along_axis(accepted, order, accepted_ranked, axis=1)
+        return planned + accepted
+
+    # 4. Spend leftover cash on one more share where it reduces the deviation most per rupee
+    planned = top_up(planned, np.broadcast_to(active[:, None], shape))
+
+    # 5. Drop orders that do not cover their cost, one per scenario per round, and
+    # re-spend the freed cash on the orders that remain
+    while True:
+        trades = planned - current
+        improvement = np.abs(targets - prices * current) - np.abs(targets - prices * planned)
+        marginal = (trades != 0) & (improvement <= order_cost)
+        # Cancelling a sell also removes its proceeds; keep it if the buys need them
+        spend_after = net_cost(trades)[:, None] - np.where(trades > 0, trades * prices * buy_factor, trades * prices)
+        droppable = marginal & (spend_after <= cash[:, None] + 1e-9)
+        rows = np.nonzero(droppable.any(axis=1))[0]
+        if rows.size == 0:
+            break
+        smallest = np.argmin(np.where(droppable, improvement - order_cost, np.inf), axis=1)
+        planned[rows, smallest[rows]] = current[rows, smallest[rows]]
+        dropped = np.zeros(scenarios, dtype=bool)
+        dropped[rows] = True
+        planned = top_up(planned, (planned != current) & dropped[:, None])
+
+    trades = planned - current
+    residual = np.abs(targets - prices * planned).sum(axis=1)
+    return {
+        "quantities": planned.astype(int),
+        "trades": trades.astype(int),
+        "orders": (trades != 0).sum(axis=1),
+        "buys": (trades > 0).sum(axis=1),
+        "sells": (trades < 0).sum(axis=1),
+        "turnover": (np.abs(trades) * prices).sum(axis=1),
+        "deficit": deficit,
+        "residual": residual,
+        "residual_pct": np.where(total_value > 0, residual / np.where(total_value > 0, total_value, 1.0) * 100, 0.0),
+        "cash_left": cash - net_cost(trades),
+        "total_value": total_value,
+    }
+
+
+def scenario_grid(**axes: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Cartesian product of named parameter axes, one dict per scenario."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(axes[n]) for n in names))]
+
+
+def summarize(results: Dict[str, np.ndarray], scenarios: List[Dict[str, Any]],
+              keys: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Flatten per-scenario results into one row per scenario, alongside its parameters."""
+    keys = keys or ("orders", "buys", "sells", "turnover", "deficit", "residual", "residual_pct", "cash_left")
+    return [
+        {**scenario, **{key: results[key][i].item() for key in keys}}
+        for i, scenario in enumerate(scenarios)
+    ]
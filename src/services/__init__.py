@@ -4,5 +4,9 @@ Services module for external API integrations and data fetching.
 
 from .zerodha_service import ZerodhaService
 from .yfinance_service import YFinanceService
+from .price_store import PriceStore
+from .ticker_info_cache import TickerInfoCache
+from .market_data import MarketDataProvider
+from .instruments import InstrumentMaster
 
-__all__ = ["ZerodhaService", "YFinanceService"] 
\ No newline at end of file
+__all__ = ["ZerodhaService", "YFinanceService", "PriceStore", "TickerInfoCache", "MarketDataProvider", "InstrumentMaster"] 
\ No newline at end of file
@@ -5,17 +5,22 @@ Authentication server service for handling OAuth callbacks.
 import asyncio
 import signal
 import sys
-from typing import Dict, Tuple
+from typing import Any, Callable, Dict, Tuple
 import webbrowser
 
 from fastapi import FastAPI, HTTPException, Request
 import uvicorn
 
+from src.config.settings import settings
+from src.services.order_tracker import verify_postback_checksum
 from src.services.zerodha_service import ZerodhaService
 from src.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Port for the order postback receiver (the OAuth callback uses 8080)
+POSTBACK_PORT = 8081
+
 
 class AuthServerManager:
     """Context manager for managing the authentication server lifecycle."""
@@ -115,6 +120,42 @@ class AuthServerManager:
                 pass
 
 
+def add_postback_route(app: FastAPI, on_order_update: Callable[[Dict[str, Any]], None]):
+    """Register the Kite order postback endpoint (POST /postback) on an app.
+    
+    Postbacks with an invalid checksum are rejected; valid ones are passed to
+    ``on_order_update``.
+    """
+    @app.post("/postback")
+    async def postback(request: Request):
+        payload = await request.json()
+        if not verify_postback_checksum(payload, settings.zerodha_api_secret):
+            logger.warning(f"Rejected postback with invalid checksum for order {payload.get('order_id')}")
+            raise HTTPException(status_code=403, detail="Invalid checksum")
+        on_order_update(payload)
+        return {"success": True}
+
+
+async def start_postback_server(on_order_update: Callable[[Dict[str, Any]], None],
+                                host: str = "0.0.0.0", port: int = POSTBACK_PORT) -> Tuple[asyncio.Task, uvicorn.Server]:
+    """Start a background server that receives Kite order postbacks.
+    
+    The postback URL configured for the Kite Connect app must reach
+    ``http://<host>:<port>/postback``.
+    """
+    app = FastAPI()
+    add_postback_route(app, on_order_update)
+    
+    config = uvicorn.Config(app, host=host, port=port, log_level="error")
+    server = uvicorn.Server(config)
+    server_task = asyncio.create_task(server.serve())
+    
+    # Wait a moment for server to start
+    await asyncio.sleep(0.5)
+    logger.info(f"Postback server listening on {host}:{port}")
+    return server_task, server
+
+
 async def start_auth_server() -> Tuple[Dict, asyncio.Event, asyncio.Task, uvicorn.Server]:
     """Start FastAPI server for OAuth callback and return user_id when authentication completes."""
     app = FastAPI()
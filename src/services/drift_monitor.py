@@ -0,0 +1,283 @@
+"""
+Long-running weight-drift monitor that rebalances only when drift leaves a band.
+
+``DriftMonitor`` holds the target basket and the account's holdings and cash,
+follows live prices (pushed by a ``PriceTable`` fed from the Kite ticker, or
+polled with one LTP request per interval) and keeps the value of every
+position and the portfolio total current on each price update. Each update
+re-checks only the ticker that moved; all tickers are re-checked once the
+portfolio total has moved by ``resweep_pct`` since the last full check, since
+that is the only way a tick can move the weight of another ticker.
+
+When a ticker is outside its ``DriftBands`` band, the ``trigger`` coroutine is
+called (normally a ``PortfolioRebalancer`` run in drift-band mode), at most
+once per ``cooldown`` seconds, and holdings are reloaded afterwards.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.rebalancing import DriftBands
+from src.services.portfolio_state import PortfolioState
+from src.services.price_feed import PriceTable
+from src.services.zerodha_service import ZerodhaService
+from src.utils.market_hours import is_market_open_ist, next_market_open, now_ist, sleep_until
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 5.0  # seconds between LTP requests when not streaming
+DEFAULT_COOLDOWN = 300.0  # minimum seconds between two triggered rebalances
+# Re-check every ticker once the portfolio total has moved this much (percent) since the last full check
+DEFAULT_RESWEEP_PCT = 0.1
+
+
+class DriftMonitor:
+    """Follow live prices for one account and trigger a rebalance on band breaches."""
+
+    def __init__(
+        self,
+        zerodha_service: ZerodhaService,
+        user_id: str,
+        target_weights: Dict[str, float],
+        bands: DriftBands,
+        trigger: Callable[[Dict[str, Any]], Awaitable[Any]],
+        price_table: Optional[PriceTable] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        cooldown: float = DEFAULT_COOLDOWN,
+        resweep_pct: float = DEFAULT_RESWEEP_PCT,
+        respect_market_hours: bool = True,
+        max_rebalances: Optional[int] = None,
+    ):
+        """Initialize the monitor.
+
+        Args:
+            zerodha_service: Service used to load holdings and poll prices
+            user_id: Zerodha user ID of the monitored account
+            target_weights: Target weight per ticker
+            bands: Tolerance bands; a ticker outside its band triggers a rebalance
+            trigger: Coroutine run with the breach details to rebalance the account
+            price_table: Streamed price table to listen to (None polls LTPs instead)
+            poll_interval: Seconds between LTP requests when polling
+            cooldown: Minimum seconds between two rebalances
+            resweep_pct: Portfolio move (percent) after which every ticker is re-checked
+            respect_market_hours: Only poll and trigger while the market is open
+            max_rebalances: Stop after this many rebalances (None runs until the deadline)
+        """
+        self.zerodha_service = zerodha_service
+        self.user_id = user_id
+        self.target_weights = target_weights
+        self.bands = bands
+        self.trigger = trigger
+        self.price_table = price_table
+        self.poll_interval = poll_interval
+        self.cooldown = cooldown
+        self.resweep_pct = resweep_pct
+        self.respect_market_hours = respect_market_hours
+        self.max_rebalances = max_rebalances
+
+        self.portfolio_state = PortfolioState(zerodha_service, user_id)
+        self.quantities: Dict[str, int] = {}
+        self.exchanges: Dict[str, str] = {}
+        self.prices: Dict[str, float] = {}
+        self.values: Dict[str, float] = {}
+        self.cash = 0.0
+        self.total_value = 0.0
+        # Weight drift (actual - target) of every ticker outside its band
+        self.breaches: Dict[str, float] = {}
+        self.updates = 0
+        self.sweeps = 0
+        self.rebalances: List[Dict[str, Any]] = []
+        self._swept_total = 0.0
+        self._last_rebalance: Optional[float] = None
+        self._breached = asyncio.Event()
+
+    def instruments(self) -> List[str]:
+        """Instruments ('EXCHANGE:SYMBOL') of every basket and held ticker."""
+        return [f"{self.exchanges.get(ticker, 'NSE')}:{ticker}" for ticker in sorted(self.prices)]
+
+    async def load(self) -> None:
+        """Load holdings and cash, price every ticker and run a full band check."""
+        await self.portfolio_state.load()
+        portfolio = self.portfolio_state.snapshot()
+        holdings = portfolio['current_holdings']
+        self.cash = portfolio['available_cash']
+        self.quantities = {ticker: entry['quantity'] for ticker, entry in holdings.items()}
+        self.exchanges = {ticker: entry.get('exchange', 'NSE') for ticker, entry in holdings.items()}
+        prices = {ticker: entry['ltp'] for ticker, entry in holdings.items()}
+
+        missing = [f"NSE:{ticker}" for ticker in self.target_weights if ticker not in prices]
+        if missing:
+            fresh = self.price_table.get_ltps(missing) if self.price_table is not None else {}
+            still_missing = [instrument for instrument in missing if instrument not in fresh]
+            if still_missing:
+                quotes = await self.zerodha_service.get_ltp(self.user_id, still_missing)
+                fresh.update({instrument: quote['last_price'] for instrument, quote in quotes.items()})
+            for instrument, price in fresh.items():
+                prices[instrument.split(":", 1)[1]] = float(price)
+        unpriced = sorted(t for t in self.target_weights if t not in prices)
+        if unpriced:
+            logger.warning(f"No price for {', '.join(unpriced)}; their drift is not monitored")
+        self.prices = prices
+        self.sweep()
+
+    def _drift(self, ticker: str) -> Optional[float]:
+        """Weight drift of a ticker if it is outside its band, else None."""
+        target_weight = self.target_weights.get(ticker, 0.0)
+        drift = self.values.get(ticker, 0.0) / self.total_value - target_weight if self.total_value > 0 else 0.0
+        if ticker not in self.target_weights:
+            # Held but not in the basket: always to be sold
+            return drift if self.values.get(ticker, 0.0) > 0 else None
+        return drift if abs(drift) > self.bands.width(ticker, target_weight) else None
+
+    def _check(self, ticker: str) -> None:
+        drift = self._drift(ticker)
+        if drift is None:
+            self.breaches.pop(ticker, None)
+        else:
+            self.breaches[ticker] = drift
+
+    def sweep(self) -> None:
+        """Recompute every position value and check every ticker against its band."""
+        self.values = {ticker: self.quantities.get(ticker, 0) * price for ticker, price in self.prices.items()}
+        self.total_value = self.cash + sum(self.values.values())
+        self._swept_total = self.total_value
+        self.sweeps += 1
+        self.breaches = {}
+        for ticker in self.prices:
+            self._check(ticker)
+        if self.breaches:
+            self._breached.set()
+
+    def on_price(self, instrument: str, last_price: float) -> None:
+        """Apply one price update: O(1) unless the portfolio total has moved enough for a full check."""
+        ticker = instrument.split(":", 1)[-1]
+        if ticker not in self.prices or not last_price:
+            return
+        self.updates += 1
+        self.prices[ticker] = float(last_price)
+        value = self.quantities.get(ticker, 0) * self.prices[ticker]
+        self.total_value += value - self.values.get(ticker, 0.0)
+        self.values[ticker] = value
+
+        if abs(self.total_value - self._swept_total) > abs(self._swept_total) * self.resweep_pct / 100:
+            self.sweep()
+            return
+        self._check(ticker)
+        if self.breaches:
+            self._breached.set()
+
+    def status(self) -> Dict[str, Any]:
+        """Current total value, largest drift and breaches."""
+        drifts = {
+            ticker: value / self.total_value - self.target_weights.get(ticker, 0.0)
+            for ticker, value in self.values.items()
+        } if self.total_value > 0 else {}
+        worst = max(drifts, key=lambda t: abs(drifts[t]), default=None)
+        return {
+            'total_value': self.total_value,
+            'max_drift_ticker': worst,
+            'max_drift': drifts.get(worst, 0.0),
+            'breaches': dict(self.breaches),
+            'updates': self.updates,
+            'sweeps': self.sweeps,
+            'rebalances': len(self.rebalances),
+        }
+
+    async def _poll(self) -> None:
+        """Feed prices from one LTP request per interval."""
+        while True:
+            if not self.respect_market_hours or is_market_open_ist():
+                try:
+                    quotes = await self.zerodha_service.get_ltp(self.user_id, self.instruments())
+                    for instrument, quote in quotes.items():
+                        self.on_price(instrument, quote['last_price'])
+                except Exception as e:
+                    logger.warning(f"LTP poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _rebalance(self) -> None:
+        event = {
+            'triggered_at': datetime.now().isoformat(),
+            'total_value': self.total_value,
+            'breaches': dict(self.breaches),
+            'result': None,
+            'error': None,
+        }
+        logger.info(f"Drift outside band for {len(self.breaches)} tickers "
+                    f"({', '.join(f'{t} {d * 100:+.2f}pp' for t, d in sorted(self.breaches.items()))}); rebalancing")
+        try:
+            event['result'] = await self.trigger(event)
+        except Exception as e:
+            logger.error(f"Triggered rebalance failed: {e}")
+            event['error'] = str(e)
+        self.rebalances.append(event)
+        self._last_rebalance = time.monotonic()
+        # Holdings and cash changed; start again from the account
+        await self.load()
+
+    async def run(self, duration: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Monitor until ``duration`` seconds have passed or ``max_rebalances`` is reached.
+
+        Returns:
+            One entry per triggered rebalance ('triggered_at', 'total_value',
+            'breaches', 'result', 'error')
+        """
+        await self.load()
+        deadline = time.monotonic() + duration if duration is not None else None
+        loop = asyncio.get_running_loop()
+
+        listener = None
+        poller = None
+        if self.price_table is not None:
+            # Ticks arrive on the ticker thread; apply them on the event loop
+            def listener(instrument: str, entry: Dict[str, Any]) -> None:
+                loop.call_soon_threadsafe(self.on_price, instrument, entry['last_price'])
+            self.price_table.add_listener(listener)
+        else:
+            poller = asyncio.create_task(self._poll())
+
+        try:
+            while self.max_rebalances is None or len(self.rebalances) < self.max_rebalances:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+
+                if self.respect_market_hours and not is_market_open_ist():
+                    open_at = next_market_open()
+                    if remaining is not None and (open_at - now_ist()).total_seconds() >= remaining:
+                        break
+                    logger.info(f"Market closed; monitoring resumes at {open_at.strftime('%Y-%m-%d %H:%M %Z')}")
+                    await sleep_until(open_at)
+                    await self.load()
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._breached.wait(), timeout=min(remaining or 60.0, 60.0))
+                except asyncio.TimeoutError:
+                    continue
+                self._breached.clear()
+                if not self.breaches:
+                    continue
+
+                if self._last_rebalance is not None:
+                    wait = self.cooldown - (time.monotonic() - self._last_rebalance)
+                    if wait > 0:
+                        if remaining is not None and wait >= remaining:
+                            break
+                        logger.info(f"Drift outside band; waiting {wait:.0f}s of rebalance cooldown")
+                        await asyncio.sleep(wait)
+                        self.sweep()
+                        self._breached.clear()
+                        if not self.breaches:
+                            continue
+
+                await self._rebalance()
+        finally:
+            if listener is not None:
+                self.price_table.remove_listener(listener)
+            if poller is not None:
+                poller.cancel()
+        return self.rebalances
@@ -0,0 +1,213 @@
+"""
+Cached, indexed Kite instrument master.
+
+Kite publishes the instrument dump once per trading day. The dump for an
+exchange is downloaded at most once per IST calendar day, trimmed to the
+columns needed for order placement and persisted as a gzip CSV under
+``settings.cache_dir / "instruments"``. In memory it is indexed by
+tradingsymbol and by instrument_token, so lookups are dictionary hits instead
+of a multi-MB download and a linear scan.
+"""
+
+import asyncio
+import csv
+import gzip
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from kiteconnect import KiteConnect
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IST = ZoneInfo("Asia/Kolkata")
+
+# Columns kept from the Kite dump and their types
+INSTRUMENT_FIELDS = {
+    "instrument_token": int,
+    "exchange_token": int,
+    "tradingsymbol": str,
+    "name": str,
+    "instrument_type": str,
+    "segment": str,
+    "exchange": str,
+    "tick_size": float,
+    "lot_size": int,
+    "freeze_quantity": int,
+}
+
+# Tolerance when checking that a price is a whole number of ticks
+_TICK_EPSILON = 1e-6
+
+
+def _trading_day() -> str:
+    """Return the current IST date, which identifies the day's instrument dump."""
+    return datetime.now(IST).strftime("%Y-%m-%d")
+
+
+def _parse_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the master's columns from a Kite (or cached CSV) row and coerce their types."""
+    parsed = {}
+    for field, cast in INSTRUMENT_FIELDS.items():
+        value = row.get(field)
+        if value in (None, ""):
+            # Kite's dump has no freeze quantity; it stays None unless supplied
+            parsed[field] = None
+            continue
+        parsed[field] = cast(value)
+    return parsed
+
+
+class InstrumentMaster:
+    """Per-exchange instrument master refreshed once per trading day."""
+
+    def __init__(self, root: Optional[Path] = None):
+        """Initialize the instrument master.
+
+        Args:
+            root: Directory for the cached dumps. Defaults to
+                  ``settings.cache_dir / "instruments"``.
+        """
+        self.root = Path(root) if root is not None else settings.cache_dir / "instruments"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._by_symbol: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._by_token: Dict[int, Dict[str, Any]] = {}
+        self._loaded_day: Dict[str, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _dump_path(self, exchange: str, day: str) -> Path:
+        return self.root / f"{exchange}-{day}.csv.gz"
+
+    def _read_dump(self, path: Path) -> List[Dict[str, Any]]:
+        with gzip.open(path, "rt", newline="") as f:
+            return [_parse_row(row) for row in csv.DictReader(f)]
+
+    def _write_dump(self, exchange: str, day: str, rows: List[Dict[str, Any]]) -> None:
+        path = self._dump_path(exchange, day)
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(INSTRUMENT_FIELDS))
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+
+        # Previous days' dumps are never read again
+        for old in self.root.glob(f"{exchange}-*.csv.gz"):
+            if old != path:
+                old.unlink(missing_ok=True)
+
+    def _index(self, exchange: str, day: str, rows: List[Dict[str, Any]]) -> None:
+        # Tokens of a previous day's dump must not stay resolvable after a reload
+        for row in self._by_symbol.get(exchange, {}).values():
+            if self._by_token.get(row["instrument_token"]) is row:
+                del self._by_token[row["instrument_token"]]
+        self._by_symbol[exchange] = {row["tradingsymbol"]: row for row in rows}
+        for row in rows:
+            self._by_token[row["instrument_token"]] = row
+        self._loaded_day[exchange] = day
+
+    def _load_sync(self, exchange: str, kite: Optional[KiteConnect], day: str) -> None:
+        path = self._dump_path(exchange, day)
+        if path.exists():
+            try:
+                rows = self._read_dump(path)
+                self._index(exchange, day, rows)
+                logger.info(f"Loaded {len(rows)} {exchange} instruments from {path.name}")
+                return
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable instrument dump {path}: {e}")
+
+        if kite is None:
+            raise ValueError(f"No cached {exchange} instrument dump for {day} and no Kite session to download it")
+
+        rows = [_parse_row(row) for row in kite.instruments(exchange)]
+        self._write_dump(exchange, day, rows)
+        self._index(exchange, day, rows)
+        logger.info(f"Downloaded {len(rows)} {exchange} instruments for {day}")
+
+    async def ensure_loaded(self, exchange: str = "NSE", kite: Optional[KiteConnect] = None) -> None:
+        """Make sure today's dump for an exchange is indexed in memory.
+
+        Args:
+            exchange: Exchange code (e.g., 'NSE')
+            kite: Authenticated Kite client, used only if today's dump is not cached on disk
+        """
+        day = _trading_day()
+        if self._loaded_day.get(exchange) == day:
+            return
+        lock = self._locks.setdefault(exchange, asyncio.Lock())
+        async with lock:
+            if self._loaded_day.get(exchange) != day:
+                # Parsing ~10k rows and the download both block, keep them off the event loop
+                await asyncio.to_thread(self._load_sync, exchange, kite, day)
+
+    def get(self, tradingsymbol: str, exchange: str = "NSE") -> Optional[Dict[str, Any]]:
+        """Look up an instrument by tradingsymbol (requires ``ensure_loaded``)."""
+        return self._by_symbol.get(exchange, {}).get(tradingsymbol)
+
+    def get_by_token(self, instrument_token: int) -> Optional[Dict[str, Any]]:
+        """Look up an instrument by instrument_token (requires ``ensure_loaded``)."""
+        return self._by_token.get(instrument_token)
+
+    def round_to_tick(self, tradingsymbol: str, price: float, exchange: str = "NSE") -> float:
+        """Round a price to the nearest valid tick for an instrument."""
+        instrument = self.get(tradingsymbol, exchange)
+        tick_size = (instrument or {}).get("tick_size") or 0.05
+        return round(round(price / tick_size) * tick_size, 2)
+
+    def validate_order(self, tradingsymbol: str, quantity: int, exchange: str = "NSE",
+                       price: Optional[float] = None) -> Dict[str, Any]:
+        """Check an order against the instrument's tick size, lot size and freeze quantity.
+
+        Args:
+            tradingsymbol: Trading symbol (e.g., 'RELIANCE')
+            quantity: Order quantity
+            exchange: Exchange code
+            price: Limit/trigger price, if any
+
+        Returns:
+            The instrument record
+
+        Raises:
+            ValueError: If the instrument is unknown or the order violates its constraints
+        """
+        instrument = self.get(tradingsymbol, exchange)
+        if instrument is None:
+            raise ValueError(f"Unknown instrument {exchange}:{tradingsymbol}")
+
+        lot_size = instrument.get("lot_size") or 1
+        if quantity <= 0 or quantity % lot_size != 0:
+            raise ValueError(
+                f"Quantity {quantity} for {exchange}:{tradingsymbol} must be a positive multiple of lot size {lot_size}"
+            )
+
+        freeze_quantity = instrument.get("freeze_quantity")
+        if freeze_quantity and quantity > freeze_quantity:
+            raise ValueError(
+                f"Quantity {quantity} for {exchange}:{tradingsymbol} exceeds freeze quantity {freeze_quantity}"
+            )
+
+        tick_size = instrument.get("tick_size")
+        if price is not None and tick_size:
+            ticks = price / tick_size
+            if abs(ticks - round(ticks)) > _TICK_EPSILON * max(1.0, abs(ticks)):
+                raise ValueError(
+                    f"Price {price} for {exchange}:{tradingsymbol} is not a multiple of tick size {tick_size}"
+                )
+        return instrument
+
+
+_default_master: Optional[InstrumentMaster] = None
+
+
+def get_default_instrument_master() -> InstrumentMaster:
+    """Return the process-wide instrument master."""
+    global _default_master
+    if _default_master is None:
+        _default_master = InstrumentMaster()
+    return _default_master
@@ -0,0 +1,316 @@
+"""
+Offline stand-in for the Kite Connect API.
+
+``SimulatedKite`` implements the subset of ``KiteConnect`` used by
+``ZerodhaService`` (holdings, positions, margins, instruments, quotes, order
+placement, the order book and basket margins) against an in-memory account.
+Calls block for a configurable latency like real HTTP requests, order
+placement is rate limited, and orders fill after a delay with optional
+partial fills and rejections. Inject it with ``ZerodhaService(kite=...)``.
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from kiteconnect import exceptions as kite_exceptions
+
+from src.utils.market_hours import is_market_open_ist, now_ist
+
+# First instrument token handed out to simulated symbols
+_FIRST_TOKEN = 100001
+
+
+class SimulatedKite:
+    """In-memory Kite Connect account with configurable exchange behavior."""
+
+    def __init__(
+        self,
+        prices: Dict[str, float],
+        holdings: Optional[Dict[str, int]] = None,
+        cash: float = 0.0,
+        latency: float = 0.05,
+        latency_jitter: float = 0.5,
+        orders_per_second: float = 10.0,
+        fill_delay: float = 0.2,
+        partial_fill_probability: float = 0.0,
+        reject_probability: float = 0.0,
+        enforce_market_hours: bool = False,
+        clock: Callable[[], datetime] = now_ist,
+        seed: Optional[int] = None,
+        user_id: str = "SIM001",
+    ):
+        """Initialize the simulator.
+
+        Args:
+            prices: LTP per NSE tradingsymbol; every symbol is tradable
+            holdings: Opening quantity per tradingsymbol
+            cash: Available cash (``margins()['equity']['net']``)
+            latency: Mean seconds each API call blocks for
+            latency_jitter: Random +/- fraction applied to the latency
+            orders_per_second: Order placement rate limit (token bucket, burst of one second)
+            fill_delay: Seconds after placement at which an order fills
+            partial_fill_probability: Chance that an order fills only partly (rest cancelled)
+            reject_probability: Chance that an order is rejected by the exchange
+            enforce_market_hours: Reject orders outside 09:15-15:30 IST on weekdays
+            clock: Returns the current IST time for market-hours checks
+            seed: Random seed for reproducible runs
+            user_id: User ID reported by ``profile()``
+        """
+        self.prices = dict(prices)
+        self.cash = float(cash)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.orders_per_second = orders_per_second
+        self.fill_delay = fill_delay
+        self.partial_fill_probability = partial_fill_probability
+        self.reject_probability = reject_probability
+        self.enforce_market_hours = enforce_market_hours
+        self.clock = clock
+        self.user_id = user_id
+        self.access_token = "simulated"
+        self.api_calls: Counter = Counter()
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._holdings = {symbol: {"quantity": int(qty), "average_price": self.prices[symbol]}
+                          for symbol, qty in (holdings or {}).items()}
+        self._positions: Dict[str, Dict[str, float]] = {}
+        # Cash blocked by open buy orders, as Kite blocks margin at placement
+        self._blocked = 0.0
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._order_ids = itertools.count(1)
+        self._tokens = {symbol: _FIRST_TOKEN + i for i, symbol in enumerate(sorted(self.prices))}
+        self._bucket = float(orders_per_second)
+        self._bucket_updated = time.monotonic()
+
+    # Internal helpers
+
+    def _call(self, name: str) -> None:
+        """Count an API call and block for its simulated latency."""
+        with self._lock:
+            self.api_calls[name] += 1
+            delay = self.latency * self._random.uniform(1 - self.latency_jitter, 1 + self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _take_order_token(self) -> None:
+        now = time.monotonic()
+        self._bucket = min(self.orders_per_second, self._bucket + (now - self._bucket_updated) * self.orders_per_second)
+        self._bucket_updated = now
+        if self._bucket < 1:
+            raise kite_exceptions.NetworkException("Too many requests", code=429)
+        self._bucket -= 1
+
+    def _symbol(self, instrument: str) -> str:
+        return instrument.split(":", 1)[-1]
+
+    def _settle(self) -> None:
+        """Fill every open order whose fill delay has elapsed."""
+        now = time.monotonic()
+        for order in self._orders.values():
+            if order["status"] != "OPEN" or now - order["_placed_at"] < self.fill_delay:
+                continue
+            symbol, quantity = order["tradingsymbol"], order["quantity"]
+            price = self.prices[symbol]
+            if order["transaction_type"] == "BUY":
+                self._blocked -= order["_blocked"]
+            if self._random.random() < self.partial_fill_probability and quantity > 1:
+                filled = self._random.randint(1, quantity - 1)
+                order["status"] = "CANCELLED"
+                order["status_message"] = "Partially filled; remaining quantity cancelled"
+            else:
+                filled = quantity
+                order["status"] = "COMPLETE"
+            order.update(filled_quantity=filled, pending_quantity=0, average_price=price)
+
+            sign = 1 if order["transaction_type"] == "BUY" else -1
+            position = self._positions.setdefault(symbol, {"quantity": 0, "value": 0.0})
+            position["quantity"] += sign * filled
+            position["value"] += sign * filled * price
+            self.cash -= sign * filled * price
+
+    def _net_quantity(self, symbol: str) -> int:
+        return self._holdings.get(symbol, {}).get("quantity", 0) + int(self._positions.get(symbol, {}).get("quantity", 0))
+
+    # KiteConnect API
+
+    def set_access_token(self, access_token: str) -> None:
+        self.access_token = access_token
+
+    def set_session_expiry_hook(self, method: Callable[[], None]) -> None:
+        pass
+
+    def profile(self) -> Dict[str, Any]:
+        self._call("profile")
+        return {"user_id": self.user_id, "user_name": "Simulated User"}
+
+    def holdings(self) -> List[Dict[str, Any]]:
+        self._call("holdings")
+        with self._lock:
+            self._settle()
+            return [
+                {
+                    "tradingsymbol": symbol,
+                    "exchange": "NSE",
+                    "instrument_token": self._tokens[symbol],
+                    "opening_quantity": holding["quantity"],
+                    "quantity": holding["quantity"],
+                    "average_price": holding["average_price"],
+                    "last_price": self.prices[symbol],
+                }
+                for symbol, holding in self._holdings.items()
+            ]
+
+    def positions(self) -> Dict[str, List[Dict[str, Any]]]:
+        self._call("positions")
+        with self._lock:
+            self._settle()
+            net = [
+                {
+                    "tradingsymbol": symbol,
+                    "exchange": "NSE",
+                    "product": "CNC",
+                    "quantity": int(position["quantity"]),
+                    "average_price": abs(position["value"] / position["quantity"]) if position["quantity"] else 0.0,
+                    "last_price": self.prices[symbol],
+                    "multiplier": 1,
+                }
+                for symbol, position in self._positions.items()
+            ]
+            return {"net": net, "day": [dict(p) for p in net]}
+
+    def margins(self, segment: Optional[str] = None) -> Dict[str, Any]:
+        self._call("margins")
+        with self._lock:
+            self._settle()
+            net = self.cash - self._blocked
+            equity = {"enabled": True, "net": net, "available": {"cash": self.cash, "live_balance": net}}
+        return equity if segment == "equity" else {"equity": equity}
+
+    def instruments(self, exchange: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._call("instruments")
+        return [
+            {
+                "instrument_token": token,
+                "exchange_token": token,
+                "tradingsymbol": symbol,
+                "name": symbol,
+                "last_price": 0.0,
+                "expiry": "",
+                "strike": 0.0,
+                "tick_size": 0.05,
+                "lot_size": 1,
+                "instrument_type": "EQ",
+                "segment": "NSE",
+                "exchange": "NSE",
+            }
+            for symbol, token in self._tokens.items()
+        ]
+
+    def ltp(self, *instruments) -> Dict[str, Dict[str, Any]]:
+        self._call("ltp")
+        if instruments and isinstance(instruments[0], list):
+            instruments = instruments[0]
+        return {
+            instrument: {"instrument_token": self._tokens[self._symbol(instrument)],
+                         "last_price": self.prices[self._symbol(instrument)]}
+            for instrument in instruments
+            if self._symbol(instrument) in self.prices
+        }
+
+    def quote(self, *instruments) -> Dict[str, Dict[str, Any]]:
+        self._call("quote")
+        if instruments and isinstance(instruments[0], list):
+            instruments = instruments[0]
+        quotes = {}
+        for instrument in instruments:
+            symbol = self._symbol(instrument)
+            if symbol not in self.prices:
+                continue
+            price = self.prices[symbol]
+            quotes[instrument] = {
+                "instrument_token": self._tokens[symbol],
+                "last_price": price,
+                "depth": {
+                    "buy": [{"price": round(price - 0.05, 2), "quantity": 1000, "orders": 10}],
+                    "sell": [{"price": round(price + 0.05, 2), "quantity": 1000, "orders": 10}],
+                },
+            }
+        return quotes
+
+    def place_order(self, variety: str, exchange: str, tradingsymbol: str, transaction_type: str,
+                    quantity: int, product: str, order_type: str, price: Optional[float] = None,
+                    tag: Optional[str] = None, **kwargs) -> str:
+        self._call("place_order")
+        with self._lock:
+            self._take_order_token()
+            if tradingsymbol not in self.prices:
+                raise kite_exceptions.InputException(f"Invalid instrument {exchange}:{tradingsymbol}")
+            if self.enforce_market_hours and variety != "amo" and not is_market_open_ist(self.clock()):
+                raise kite_exceptions.InputException("Markets are closed right now")
+            self._settle()
+
+            order_id = f"SIM{next(self._order_ids):012d}"
+            status, message = "OPEN", None
+            value = quantity * self.prices[tradingsymbol]
+            if transaction_type == "BUY" and value > self.cash - self._blocked:
+                status, message = "REJECTED", "Insufficient funds"
+            elif transaction_type == "SELL" and quantity > self._net_quantity(tradingsymbol):
+                status, message = "REJECTED", "Insufficient holdings"
+            elif self._random.random() < self.reject_probability:
+                status, message = "REJECTED", "Simulated exchange rejection"
+
+            self._orders[order_id] = {
+                "order_id": order_id,
+                "variety": variety,
+                "exchange": exchange,
+                "tradingsymbol": tradingsymbol,
+                "transaction_type": transaction_type,
+                "quantity": quantity,
+                "product": product,
+                "order_type": order_type,
+                "price": price or 0.0,
+                "status": status,
+                "status_message": message,
+                "filled_quantity": 0,
+                "pending_quantity": quantity if status == "OPEN" else 0,
+                "average_price": 0.0,
+                "tag": tag,
+                "order_timestamp": self.clock().strftime("%Y-%m-%d %H:%M:%S"),
+                "_placed_at": time.monotonic(),
+                "_blocked": value if status == "OPEN" and transaction_type == "BUY" else 0.0,
+            }
+            self._blocked += self._orders[order_id]["_blocked"]
+            return order_id
+
+    def orders(self) -> List[Dict[str, Any]]:
+        self._call("orders")
+        with self._lock:
+            self._settle()
+            return [{k: v for k, v in order.items() if not k.startswith("_")} for order in self._orders.values()]
+
+    def order_history(self, order_id: str) -> List[Dict[str, Any]]:
+        self._call("order_history")
+        with self._lock:
+            self._settle()
+            order = self._orders.get(order_id)
+            if order is None:
+                raise kite_exceptions.InputException(f"Unknown order {order_id}")
+            return [{k: v for k, v in order.items() if not k.startswith("_")}]
+
+    def basket_order_margins(self, params: List[Dict[str, Any]], consider_positions: bool = True,
+                             mode: Optional[str] = None) -> Dict[str, Any]:
+        self._call("basket_order_margins")
+        orders = []
+        for order in params:
+            value = order["quantity"] * (order.get("price") or self.prices.get(order["tradingsymbol"], 0.0))
+            # CNC sells of held stock need no margin
+            required = value if order["transaction_type"] == "BUY" else 0.0
+            orders.append({"tradingsymbol": order["tradingsymbol"], "total": required})
+        total = sum(order["total"] for order in orders)
+        return {"initial": {"total": total}, "final": {"total": total}, "orders": orders}
@@ -0,0 +1,181 @@
+"""
+Pluggable market data providers for last traded prices.
+
+Instruments are always identified as ``EXCHANGE:TRADINGSYMBOL`` (e.g.
+``NSE:RELIANCE``), matching the Kite Connect convention.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+from kiteconnect import KiteConnect
+
+from src.config.settings import settings
+from src.services.yfinance_service import YFinanceService
+
+logger = logging.getLogger(__name__)
+
+# Kite Connect accepts up to 1000 instruments per LTP request
+KITE_MAX_INSTRUMENTS_PER_REQUEST = 1000
+
+
+class MarketDataProvider(ABC):
+    """Source of last traded prices."""
+
+    name = "base"
+
+    @abstractmethod
+    async def get_ltp(self, instruments: List[str]) -> Dict[str, float]:
+        """Get last traded prices.
+
+        Args:
+            instruments: Instruments like ["NSE:RELIANCE", "BSE:SBIN"]
+
+        Returns:
+            Dictionary mapping each priced instrument to its LTP. Instruments
+            that could not be priced are omitted.
+        """
+
+    async def get_ticker_ltp(self, tickers: Iterable[str], exchange: str = "NSE") -> Dict[str, float]:
+        """Get last traded prices keyed by plain ticker (e.g., 'RELIANCE')."""
+        tickers = list(tickers)
+        prices = await self.get_ltp([f"{exchange}:{ticker}" for ticker in tickers])
+        return {
+            ticker: prices[f"{exchange}:{ticker}"]
+            for ticker in tickers
+            if f"{exchange}:{ticker}" in prices
+        }
+
+
+class YFinanceMarketDataProvider(MarketDataProvider):
+    """LTPs from yfinance (one Yahoo request per instrument, run concurrently)."""
+
+    name = "yfinance"
+
+    def __init__(self, yfinance_service: Optional[YFinanceService] = None):
+        self.yfinance_service = yfinance_service or YFinanceService()
+
+    @staticmethod
+    def to_yf_symbol(instrument: str) -> Optional[str]:
+        """Convert 'NSE:X' to 'X' (service adds .NS) and 'BSE:X' to 'X.BO'."""
+        try:
+            exchange, symbol = instrument.split(":", 1)
+        except ValueError:
+            return None
+        exchange = exchange.upper().strip()
+        if exchange == "NSE":
+            return symbol.strip()
+        elif exchange == "BSE":
+            return f"{symbol.strip()}.BO"
+        return None
+
+    async def get_ltp(self, instruments: List[str]) -> Dict[str, float]:
+        inst_to_yf: Dict[str, str] = {}
+        for inst in instruments:
+            yf_symbol = self.to_yf_symbol(inst)
+            if not yf_symbol:
+                logger.warning(f"Invalid instrument format: {inst}")
+                continue
+            inst_to_yf[inst] = yf_symbol
+
+        prices = await self.yfinance_service.aget_ltp_many(list(set(inst_to_yf.values())))
+        return {
+            inst: prices[yf_symbol]
+            for inst, yf_symbol in inst_to_yf.items()
+            if yf_symbol in prices
+        }
+
+
+class KiteMarketDataProvider(MarketDataProvider):
+    """LTPs from an authenticated Kite Connect session in bulk requests."""
+
+    name = "kite"
+
+    def __init__(self, kite: KiteConnect):
+        self.kite = kite
+
+    async def get_ltp(self, instruments: List[str]) -> Dict[str, float]:
+        results: Dict[str, float] = {}
+        for start in range(0, len(instruments), KITE_MAX_INSTRUMENTS_PER_REQUEST):
+            chunk = instruments[start:start + KITE_MAX_INSTRUMENTS_PER_REQUEST]
+            quotes = await asyncio.to_thread(self.kite.ltp, chunk)
+            for inst, quote in (quotes or {}).items():
+                last_price = quote.get("last_price")
+                if last_price:
+                    results[inst] = float(last_price)
+        return results
+
+
+class FallbackMarketDataProvider(MarketDataProvider):
+    """Try providers in order, asking each only for instruments still unpriced."""
+
+    name = "fallback"
+
+    def __init__(self, providers: List[MarketDataProvider]):
+        if not providers:
+            raise ValueError("At least one market data provider is required")
+        self.providers = providers
+
+    async def get_ltp(self, instruments: List[str]) -> Dict[str, float]:
+        results: Dict[str, float] = {}
+        remaining = list(dict.fromkeys(instruments))
+        for provider in self.providers:
+            if not remaining:
+                break
+            try:
+                prices = await provider.get_ltp(remaining)
+            except Exception as e:
+                logger.warning(f"{provider.name} LTP fetch failed for {len(remaining)} instruments: {e}")
+                continue
+            results.update(prices)
+            remaining = [inst for inst in remaining if inst not in results]
+            logger.debug(f"{provider.name} priced {len(prices)} instruments; {len(remaining)} remaining")
+
+        if remaining:
+            logger.warning(f"No LTP available for: {', '.join(remaining)}")
+        return results
+
+
+_default_provider: Optional[MarketDataProvider] = None
+_default_provider_lock: Optional[asyncio.Lock] = None
+
+
+async def build_market_data_provider(user_id: Optional[str] = None) -> MarketDataProvider:
+    """Build a Kite -> yfinance fallback chain.
+
+    Kite is included when Zerodha credentials are configured and a valid stored
+    session exists (for ``user_id``, or the first active user if None).
+    Otherwise only yfinance is used.
+    """
+    providers: List[MarketDataProvider] = []
+    if settings.zerodha_api_key and settings.zerodha_api_secret and settings.encryption_key:
+        try:
+            # Imported here because the Zerodha service itself prices through this module
+            from src.db.repositories import ZerodhaTokenRepository
+            from src.services.zerodha_service import ZerodhaService
+
+            if user_id is None:
+                active_tokens = await ZerodhaTokenRepository().list_active()
+                user_id = active_tokens[0]["user_id"] if active_tokens else None
+            if user_id:
+                kite = await ZerodhaService().get_authenticated_kite(user_id)
+                providers.append(KiteMarketDataProvider(kite))
+        except Exception as e:
+            logger.info(f"Kite quotes unavailable, using yfinance only: {e}")
+    providers.append(YFinanceMarketDataProvider())
+    logger.info(f"Market data providers: {' -> '.join(p.name for p in providers)}")
+    return FallbackMarketDataProvider(providers)
+
+
+async def get_default_market_data_provider() -> MarketDataProvider:
+    """Return the process-wide provider chain, building it on first use."""
+    global _default_provider, _default_provider_lock
+    if _default_provider is None:
+        if _default_provider_lock is None:
+            _default_provider_lock = asyncio.Lock()
+        async with _default_provider_lock:
+            if _default_provider is None:
+                _default_provider = await build_market_data_provider()
+    return _default_provider
@@ -0,0 +1,89 @@
+"""
+Per-ticker news store that remembers which headlines have already been seen.
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from src.db.database import COLLECTIONS
+from src.db.database import async_db
+from src.db.models import NewsItem
+
+logger = logging.getLogger(__name__)
+
+
+def news_content_hash(headline: str, publisher: str) -> str:
+    """Hash a headline so the same story is recognized across runs.
+
+    Whitespace and case are normalized so trivial re-formatting by the
+    provider does not make an old story look new.
+    """
+    normalized = " ".join(f"{headline}\n{publisher}".lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """Store of headlines per ticker with content hashes and first-seen times."""
+
+    async def record(self, ticker: str, headlines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Record headlines and return them annotated with their first-seen time.
+
+        Args:
+            ticker: Stock ticker (e.g., 'RELIANCE')
+            headlines: Headlines as returned in ``get_stock_info()['news_headlines']``
+
+        Returns:
+            Copies of the headlines with ``content_hash`` and ``first_seen_time`` added
+        """
+        annotated = []
+        for headline in headlines:
+            title = headline.get("headline", "N/A")
+            publisher = headline.get("publisher", "N/A")
+            if title == "N/A":
+                # Nothing meaningful to hash; never treat it as news
+                continue
+            item = NewsItem(
+                stock_ticker=ticker,
+                content_hash=news_content_hash(title, publisher),
+                headline=title,
+                publisher=publisher,
+                published=headline.get("timestamp", "N/A"),
+            )
+            # Keep the original first-seen time if the headline is already known
+            await async_db[COLLECTIONS["news"]].update_one(
+                {"stock_ticker": ticker, "content_hash": item.content_hash},
+                {"$setOnInsert": item.model_dump()},
+                upsert=True,
+            )
+            annotated.append({**headline, "content_hash": item.content_hash})
+
+        if not annotated:
+            return []
+
+        stored = await async_db[COLLECTIONS["news"]].find(
+            {
+                "stock_ticker": ticker,
+                "content_hash": {"$in": [h["content_hash"] for h in annotated]},
+            },
+            {"content_hash": 1, "first_seen_time": 1},
+        ).to_list(length=None)
+        first_seen = {doc["content_hash"]: doc["first_seen_time"] for doc in stored}
+
+        for headline in annotated:
+            headline["first_seen_time"] = first_seen.get(
+                headline["content_hash"], datetime.now(timezone.utc)
+            )
+        return annotated
+
+    @staticmethod
+    def mark_new(headlines: List[Dict[str, Any]], since: Optional[datetime]) -> List[Dict[str, Any]]:
+        """Flag headlines first seen after ``since`` (all are new if ``since`` is None)."""
+        for headline in headlines:
+            first_seen = headline.get("first_seen_time")
+            if first_seen is not None and first_seen.tzinfo is None:
+                # Mongo returns naive UTC datetimes
+                first_seen = first_seen.replace(tzinfo=timezone.utc)
+            headline["is_new"] = since is None or (first_seen is not None and first_seen > since)
+        return headlines
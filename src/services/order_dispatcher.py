@@ -0,0 +1,358 @@
+"""
+Rate-limited concurrent order dispatch for rebalancing.
+
+Orders are submitted concurrently under a token bucket matching Kite's
+per-second order limit. All sells are placed before any buy so the cash they
+free up is committed first, and every order is retried according to a
+``RetryPolicy`` until it is placed, fails permanently or the market closes.
+
+Placement is idempotent: every order carries a tag derived from its plan and
+contents, and before any retry the order book is checked for an order with
+that tag, so an attempt that timed out after Kite accepted it is adopted
+instead of placed twice. Intents can also be logged to Mongo, which extends
+the deduplication across process restarts. An earlier order that was
+rejected or cancelled without any fill is placed again instead of adopted.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from kiteconnect import exceptions as kite_exceptions
+
+from src.db.models import OrderIntent
+from src.db.repositories import OrderIntentRepository
+from src.services.order_tracker import OrderTracker
+from src.services.zerodha_service import ZerodhaService
+from src.utils.market_hours import IST, MARKET_CLOSE, MARKET_OPEN, now_ist
+from src.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Kite Connect allows 10 order requests per second per API key
+KITE_ORDERS_PER_SECOND = 10
+
+# Kite accepts order tags of up to 20 alphanumeric characters
+ORDER_TAG_LENGTH = 20
+ORDER_TAG_PREFIX = "rb"
+
+# Errors that will not go away by retrying once the market is open
+NON_RETRYABLE_ERRORS = (
+    kite_exceptions.InputException,
+    kite_exceptions.PermissionException,
+    kite_exceptions.TokenException,
+    ValueError,
+)
+
+
+def ended_unfilled(order: Dict[str, Any]) -> bool:
+    """Return True if an order-book entry was rejected or cancelled without any fill."""
+    return order.get("status") in ("REJECTED", "CANCELLED") and not order.get("filled_quantity")
+
+
+def order_tag(plan_id: str, action: Dict[str, Any]) -> str:
+    """Deterministic Kite order tag for an action of a plan.
+
+    The same plan, ticker, side and quantity always give the same tag, so a
+    re-sent order can be recognized in the order book.
+    """
+    key = f"{plan_id}|{action.get('exchange', 'NSE')}|{action['ticker']}|{action['action']}|{action['quantity']}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return ORDER_TAG_PREFIX + digest[:ORDER_TAG_LENGTH - len(ORDER_TAG_PREFIX)]
+
+
+class RetryPolicy:
+    """When and how often a failed order placement is retried."""
+
+    def __init__(
+        self,
+        pre_open_interval: float = 3.0,
+        initial_backoff: float = 0.5,
+        backoff_factor: float = 1.7,
+        max_backoff: float = 60.0,
+        max_attempts: Optional[int] = None,
+        jitter: float = 0.2,
+        respect_market_hours: bool = True,
+    ):
+        """Initialize the policy.
+
+        Args:
+            pre_open_interval: Fixed delay between attempts before 09:15 IST
+            initial_backoff: First delay after the open
+            backoff_factor: Multiplier applied to the delay after each failure
+            max_backoff: Upper bound for the delay
+            max_attempts: Give up after this many attempts (None retries until market close)
+            jitter: Random +/- fraction applied to every delay
+            respect_market_hours: Use the pre-open schedule and stop at market close.
+                                  Disable for simulated exchanges.
+        """
+        self.pre_open_interval = pre_open_interval
+        self.initial_backoff = initial_backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.jitter = jitter
+        self.respect_market_hours = respect_market_hours
+
+    def should_retry(self, error: Exception, attempt: int, now: datetime) -> bool:
+        """Return True if an order that failed with ``error`` should be retried."""
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return False
+        if self.respect_market_hours:
+            if now >= datetime.combine(now.date(), MARKET_CLOSE, tzinfo=IST):
+                return False
+            # Before the open every rejection is expected, so keep trying
+            if now.time() < MARKET_OPEN:
+                return True
+        return not isinstance(error, NON_RETRYABLE_ERRORS)
+
+    def next_delay(self, attempt: int, now: datetime) -> float:
+        """Seconds to wait before the next attempt (``attempt`` failures so far)."""
+        if self.respect_market_hours and now.time() < MARKET_OPEN:
+            delay = self.pre_open_interval
+        else:
+            delay = min(self.initial_backoff * self.backoff_factor ** (attempt - 1), self.max_backoff)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class OrderDispatcher:
+    """Place a batch of rebalancing orders concurrently within Kite's rate limits."""
+
+    def __init__(
+        self,
+        zerodha_service: ZerodhaService,
+        user_id: str,
+        retry_policy: Optional[RetryPolicy] = None,
+        orders_per_second: float = KITE_ORDERS_PER_SECOND,
+        rate_limiter: Optional[TokenBucket] = None,
+        intent_log: Optional[OrderIntentRepository] = None,
+    ):
+        """Initialize the dispatcher.
+
+        Args:
+            zerodha_service: Service used to place orders
+            user_id: Zerodha user ID to place orders for
+            retry_policy: Retry policy for failed placements. Defaults to ``RetryPolicy()``.
+            orders_per_second: Order rate budget when no limiter is given
+            rate_limiter: Shared limiter, e.g. when several accounts use one API key
+            intent_log: Optional persisted intent log, for deduplication across restarts
+        """
+        self.zerodha_service = zerodha_service
+        self.user_id = user_id
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter or TokenBucket(orders_per_second)
+        self.intent_log = intent_log
+        self._order_book: Dict[str, Dict[str, Any]] = {}
+        self._order_book_fetched_at = 0.0
+        self._order_book_lock = asyncio.Lock()
+
+    async def _find_by_tag(self, tag: str, newer_than: float) -> Optional[Dict[str, Any]]:
+        """Look up an order by tag in an order book requested after ``newer_than`` (monotonic time).
+
+        Concurrent retries share one order book request as long as it started
+        after their failed attempt.
+        """
+        async with self._order_book_lock:
+            if self._order_book_fetched_at <= newer_than:
+                requested_at = time.monotonic()
+                orders = await self.zerodha_service.get_orders(self.user_id)
+                self._order_book = {order["tag"]: order for order in orders if order.get("tag")}
+                self._order_book_fetched_at = requested_at
+        return self._order_book.get(tag)
+
+    async def _log_intent(self, method: str, *args) -> Any:
+        """Call the intent log, never letting a logging failure block placement."""
+        if self.intent_log is None:
+            return None
+        try:
+            return await getattr(self.intent_log, method)(*args)
+        except Exception as e:
+            logger.warning(f"Order intent log unavailable ({method}): {e}")
+            return None
+
+    async def _place(self, action: Dict[str, Any], plan_id: str,
+                     tracker: Optional[OrderTracker] = None) -> Dict[str, Any]:
+        """Place one order with retries and return its result record.
+
+        The order is tracked as soon as its order ID is known, so updates for
+        it are not missed while other orders of the phase are still retrying.
+        """
+        started = time.monotonic()
+        attempt = 0
+        tag = action.get("tag") or order_tag(plan_id, action)
+        result = {
+            "ticker": action["ticker"],
+            "action": action["action"],
+            "quantity": action["quantity"],
+            "tag": tag,
+            "order_id": None,
+            "status": "FAILED",
+            "attempts": 0,
+            "latency_ms": None,
+            "api_latency_ms": None,
+            "placed_at": None,
+            "deduplicated": False,
+            "error": None,
+        }
+
+        # An intent logged by an earlier run means the order may already exist
+        intent = await self._log_intent("find", self.user_id, tag)
+        if intent is not None and intent.order_id:
+            try:
+                existing = await self._find_by_tag(tag, started)
+            except Exception as e:
+                logger.warning(f"Order book unavailable to check {intent.order_id}: {e}")
+                existing = None
+            if existing is not None and ended_unfilled(existing):
+                logger.info(f"{action['action']} {action['ticker']} was placed as {existing['order_id']} "
+                            f"but ended {existing['status']} unfilled; placing it again")
+            else:
+                logger.info(f"{action['action']} {action['ticker']} already placed as {intent.order_id} (tag {tag})")
+                result.update(order_id=intent.order_id, status="PLACED", placed_at=time.time(), deduplicated=True)
+                result["latency_ms"] = (time.monotonic() - started) * 1000
+                if tracker is not None:
+                    tracker.track(result["order_id"], action)
+                return result
+        if intent is None:
+            await self._log_intent("record", OrderIntent(
+                user_id=self.user_id,
+                tag=tag,
+                plan_id=plan_id,
+                ticker=action["ticker"],
+                exchange=action.get("exchange", "NSE"),
+                action=action["action"],
+                quantity=action["quantity"],
+            ))
+        # Monotonic time after which an earlier attempt may have reached Kite
+        # (an intent with an order ID was checked against the order book above)
+        failed_at = started if intent is not None and not intent.order_id else None
+
+        while True:
+            if failed_at is not None:
+                # A previous attempt may have reached Kite even though it raised
+                try:
+                    existing = await self._find_by_tag(tag, failed_at)
+                except Exception as e:
+                    result["error"] = f"Order book unavailable: {e}"
+                    attempt += 1
+                    now = now_ist()
+                    if not self.retry_policy.should_retry(e, attempt, now):
+                        logger.error(f"Giving up on {action['action']} {action['ticker']}: cannot rule out a "
+                                     f"duplicate without the order book: {e}")
+                        break
+                    await asyncio.sleep(self.retry_policy.next_delay(attempt, now))
+                    continue
+                if existing is not None and ended_unfilled(existing):
+                    # Nothing of it executed: it must be placed again rather than adopted
+                    logger.info(f"{action['action']} {action['ticker']} order {existing['order_id']} "
+                                f"ended {existing['status']} unfilled (tag {tag}); placing it again")
+                elif existing is not None:
+                    logger.warning(f"{action['action']} {action['ticker']} was already accepted as "
+                                   f"{existing['order_id']} (tag {tag}); not placing it again")
+                    result.update(order_id=existing["order_id"], status="PLACED", placed_at=time.time(),
+                                  deduplicated=True, error=None)
+                    break
+
+            await self.rate_limiter.acquire_async()
+            attempt += 1
+            call_started = time.monotonic()
+            try:
+                order_id = await self.zerodha_service.place_order(
+                    user_id=self.user_id,
+                    variety=action.get("variety", "regular"),
+                    exchange=action.get("exchange", "NSE"),
+                    tradingsymbol=action["ticker"],
+                    transaction_type=action["action"],
+                    quantity=action["quantity"],
+                    product=action.get("product", "CNC"),  # Cash and Carry for delivery
+                    order_type=action.get("order_type", "MARKET"),
+                    price=action.get("limit_price"),
+                    tag=tag,
+                )
+                result.update(
+                    order_id=order_id,
+                    status="PLACED",
+                    api_latency_ms=(time.monotonic() - call_started) * 1000,
+                    placed_at=time.time(),
+                    error=None,
+                )
+                break
+            except Exception as e:
+                failed_at = time.monotonic()
+                result["error"] = str(e)
+                now = now_ist()
+                if not self.retry_policy.should_retry(e, attempt, now):
+                    logger.error(f"Giving up on {action['action']} {action['ticker']} after {attempt} attempts: {e}")
+                    break
+                delay = self.retry_policy.next_delay(attempt, now)
+                logger.warning(
+                    f"Order attempt {attempt} for {action['ticker']} failed: {e}. Retrying in {delay:.1f}s..."
+                )
+                await asyncio.sleep(delay)
+
+        result["attempts"] = attempt
+        result["latency_ms"] = (time.monotonic() - started) * 1000
+        if result["status"] == "PLACED":
+            if tracker is not None:
+                tracker.track(result["order_id"], action)
+            await self._log_intent("mark_placed", self.user_id, tag, result["order_id"])
+        else:
+            await self._log_intent("mark_failed", self.user_id, tag, result["error"] or "unknown error")
+        return result
+
+    async def dispatch(self, actions: List[Dict[str, Any]], tracker: Optional[OrderTracker] = None,
+                       sell_fill_timeout: float = 60.0, plan_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Place all orders: every sell first (concurrently), then every buy (concurrently).
+
+        With a tracker, every placed order is tracked and buys are only sent
+        once the sells have reached a terminal status (or ``sell_fill_timeout``
+        expired), so the cash they free up is actually available.
+
+        Args:
+            actions: Rebalancing actions with 'ticker', 'action' ('BUY'/'SELL') and 'quantity'
+            tracker: Optional order tracker for fill state
+            sell_fill_timeout: Maximum seconds to wait for sell fills before buying
+            plan_id: Identifies the plan in order tags. Use the same ID when
+                     re-sending a plan so its orders are deduplicated; defaults
+                     to a random ID (deduplicates retries within this call).
+
+        Returns:
+            One result per action (sells first) with 'tag', 'order_id', 'status'
+            ('PLACED' or 'FAILED'), 'deduplicated' (adopted an existing order), 'attempts'
+            (placements and failed order book checks), 'latency_ms' (first attempt to
+            placement, including retries), 'api_latency_ms' (the successful
+            call), 'placed_at' (epoch seconds) and 'error'
+        """
+        plan_id = plan_id or uuid.uuid4().hex
+        sells = [a for a in actions if a["action"] == "SELL"]
+        buys = [a for a in actions if a["action"] == "BUY"]
+
+        results: List[Dict[str, Any]] = []
+        for phase in (sells, buys):
+            if not phase:
+                continue
+            if phase is buys and tracker is not None:
+                sell_ids = [r["order_id"] for r in results if r["status"] == "PLACED"]
+                if sell_ids:
+                    logger.info(f"Waiting for {len(sell_ids)} sell orders to fill before placing buys")
+                    await tracker.wait_for(sell_ids, timeout=sell_fill_timeout)
+            phase_results = await asyncio.gather(*(self._place(action, plan_id, tracker) for action in phase))
+            results.extend(phase_results)
+        return results
+
+
+def summarize_latencies(results: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Summarize placement latency of dispatched orders (placed orders only)."""
+    latencies = sorted(r["latency_ms"] for r in results if r["status"] == "PLACED")
+    if not latencies:
+        return {"placed": 0}
+    return {
+        "placed": len(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "max_ms": latencies[-1],
+    }
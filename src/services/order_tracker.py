@@ -0,0 +1,242 @@
+"""
+Order-update tracking from Kite postbacks or bulk order-book polling.
+
+The tracker keeps the latest known state of every order placed during a
+rebalance in memory. Updates arrive either as Kite postbacks (pushed to the
+FastAPI route in ``src.services.auth_server``) or from one ``kite.orders()``
+call per poll interval, and callers await fills instead of re-fetching the
+whole portfolio.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.services.zerodha_service import ZerodhaService
+
+logger = logging.getLogger(__name__)
+
+# Kite order statuses after which an order will not change any more
+TERMINAL_STATUSES = {"COMPLETE", "REJECTED", "CANCELLED"}
+DEFAULT_POLL_INTERVAL = 1.0  # seconds
+DEFAULT_FILL_TIMEOUT = 120.0  # seconds
+
+
+def postback_checksum(order_id: str, order_timestamp: str, api_secret: str) -> str:
+    """Compute the checksum Kite attaches to a postback: SHA-256 of order_id + order_timestamp + api_secret."""
+    return hashlib.sha256(f"{order_id}{order_timestamp}{api_secret}".encode("utf-8")).hexdigest()
+
+
+def verify_postback_checksum(payload: Dict[str, Any], api_secret: str) -> bool:
+    """Return True if a postback payload carries a valid checksum."""
+    expected = postback_checksum(
+        str(payload.get("order_id", "")), str(payload.get("order_timestamp", "")), api_secret
+    )
+    return payload.get("checksum") == expected
+
+
+class OrderTracker:
+    """In-memory fill state of the orders placed in one rebalance run."""
+
+    def __init__(
+        self,
+        zerodha_service: Optional[ZerodhaService],
+        user_id: str,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_polling: bool = True,
+    ):
+        """Initialize the tracker.
+
+        Args:
+            zerodha_service: Service used for bulk order polling (may be None if
+                             only postbacks are used)
+            user_id: Zerodha user ID whose orders are tracked
+            poll_interval: Seconds between ``kite.orders()`` calls while waiting
+            use_polling: Poll the order book while waiting. Disable when
+                         postbacks are delivered to ``handle_postback``.
+        """
+        self.zerodha_service = zerodha_service
+        self.user_id = user_id
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling and zerodha_service is not None
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        # Latest postback per order ID that arrived before the order was tracked
+        self._early_updates: Dict[str, Dict[str, Any]] = {}
+
+    def track(self, order_id: str, action: Dict[str, Any]) -> None:
+        """Start tracking an order placed for a rebalancing action.
+
+        A postback that arrived for the order before it was tracked (the
+        exchange can fill a market order before ``place_order`` returns) is
+        applied now.
+        """
+        self.orders.setdefault(order_id, {
+            "order_id": order_id,
+            "ticker": action["ticker"],
+            "exchange": action.get("exchange", "NSE"),
+            "action": action["action"],
+            "quantity": int(action["quantity"]),
+            "price": action.get("price"),
+            "status": "PLACED",
+            "filled_quantity": 0,
+            "average_price": None,
+            "status_message": None,
+            "placed_at": time.monotonic(),
+            "updated_at": None,
+        })
+        self._events.setdefault(order_id, asyncio.Event())
+        early_update = self._early_updates.pop(order_id, None)
+        if early_update is not None:
+            self.apply_update(early_update)
+
+    def apply_update(self, update: Dict[str, Any]) -> bool:
+        """Apply an order update from a postback or the order book.
+
+        Returns:
+            True if the update belonged to a tracked order
+        """
+        order_id = str(update.get("order_id", ""))
+        order = self.orders.get(order_id)
+        if order is None:
+            return False
+
+        # A late, older update must not move a terminal order back to an open state
+        if order["status"] in TERMINAL_STATUSES and update.get("status") not in TERMINAL_STATUSES:
+            return True
+
+        order["status"] = update.get("status", order["status"])
+        order["filled_quantity"] = int(update.get("filled_quantity") or 0)
+        order["average_price"] = float(update.get("average_price") or 0.0) or order["average_price"]
+        order["status_message"] = update.get("status_message")
+        order["updated_at"] = datetime.now().isoformat()
+        if order["status"] in TERMINAL_STATUSES:
+            self._events[order_id].set()
+            logger.info(
+                f"{order['action']} {order['ticker']} {order['status']}: "
+                f"{order['filled_quantity']}/{order['quantity']} filled"
+            )
+        return True
+
+    def handle_postback(self, payload: Dict[str, Any]) -> None:
+        """Postback handler (checksum already verified by the receiving route).
+
+        Postbacks for orders not tracked yet are kept until ``track`` is called
+        for them; orders of other runs are simply never tracked.
+        """
+        if self.apply_update(payload):
+            return
+        order_id = str(payload.get("order_id", ""))
+        earlier = self._early_updates.get(order_id)
+        if earlier is None or earlier.get("status") not in TERMINAL_STATUSES:
+            logger.debug(f"Holding postback for untracked order {order_id} until it is tracked")
+            self._early_updates[order_id] = payload
+
+    async def poll_once(self) -> None:
+        """Refresh every tracked order from a single ``kite.orders()`` call."""
+        for order in await self.zerodha_service.get_orders(self.user_id):
+            self.apply_update(order)
+
+    def is_terminal(self, order_id: str) -> bool:
+        return self.orders.get(order_id, {}).get("status") in TERMINAL_STATUSES
+
+    async def wait_for(self, order_ids: Iterable[str], timeout: float = DEFAULT_FILL_TIMEOUT) -> List[Dict[str, Any]]:
+        """Wait until the given orders reach a terminal status or the timeout expires.
+
+        Returns:
+            Current state of each requested order
+        """
+        order_ids = [order_id for order_id in order_ids if order_id in self.orders]
+        deadline = time.monotonic() + timeout
+        while True:
+            pending = [order_id for order_id in order_ids if not self.is_terminal(order_id)]
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+
+            if self.use_polling:
+                try:
+                    await self.poll_once()
+                except Exception as e:
+                    logger.warning(f"Order book poll failed: {e}")
+                if any(not self.is_terminal(order_id) for order_id in pending):
+                    await asyncio.sleep(min(self.poll_interval, max(remaining, 0.0)))
+            else:
+                waiters = [asyncio.create_task(self._events[order_id].wait()) for order_id in pending]
+                try:
+                    await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.ALL_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+
+        pending = [order_id for order_id in order_ids if not self.is_terminal(order_id)]
+        if pending:
+            logger.warning(f"{len(pending)} orders still open after {timeout:.0f}s: {', '.join(pending)}")
+        return [self.orders[order_id] for order_id in order_ids]
+
+    def fully_filled(self, order_ids: Iterable[str]) -> bool:
+        """Return True if every given order completed for its full quantity."""
+        return all(
+            self.orders[order_id]["status"] == "COMPLETE"
+            and self.orders[order_id]["filled_quantity"] >= self.orders[order_id]["quantity"]
+            for order_id in order_ids
+        )
+
+    def fills_by_ticker(self) -> Dict[str, int]:
+        """Net filled quantity per ticker (buys positive, sells negative)."""
+        fills: Dict[str, int] = {}
+        for order in self.orders.values():
+            sign = 1 if order["action"] == "BUY" else -1
+            fills[order["ticker"]] = fills.get(order["ticker"], 0) + sign * order["filled_quantity"]
+        return fills
+
+
+class FakePostbackSource:
+    """Emit Kite-style postbacks for tracked orders without a network.
+
+    Payloads carry a valid checksum for ``api_secret`` so they can also be
+    POSTed to the postback route in tests.
+    """
+
+    def __init__(self, tracker: OrderTracker, api_secret: str = "test-secret"):
+        self.tracker = tracker
+        self.api_secret = api_secret
+
+    def payload(self, order_id: str, status: str = "COMPLETE", filled_quantity: Optional[int] = None,
+                average_price: float = 0.0, status_message: Optional[str] = None,
+                action: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build a postback payload for a tracked order, or for ``action`` if it is not tracked yet."""
+        order = self.tracker.orders.get(order_id) or {
+            "ticker": action["ticker"], "action": action["action"], "quantity": int(action["quantity"])
+        }
+        if filled_quantity is None:
+            filled_quantity = order["quantity"] if status == "COMPLETE" else 0
+        order_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return {
+            "user_id": self.tracker.user_id,
+            "order_id": order_id,
+            "status": status,
+            "tradingsymbol": order["ticker"],
+            "transaction_type": order["action"],
+            "quantity": order["quantity"],
+            "filled_quantity": filled_quantity,
+            "pending_quantity": order["quantity"] - filled_quantity,
+            "average_price": average_price,
+            "status_message": status_message,
+            "order_timestamp": order_timestamp,
+            "checksum": postback_checksum(order_id, order_timestamp, self.api_secret),
+        }
+
+    def emit(self, order_id: str, **kwargs) -> Dict[str, Any]:
+        """Deliver a postback for an order directly to the tracker."""
+        payload = self.payload(order_id, **kwargs)
+        self.tracker.handle_postback(payload)
+        return payload
+
+    async def emit_after(self, delay: float, order_id: str, **kwargs) -> Dict[str, Any]:
+        """Deliver a postback after ``delay`` seconds (simulates exchange latency)."""
+        await asyncio.sleep(delay)
+        return self.emit(order_id, **kwargs)
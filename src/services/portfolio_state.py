@@ -0,0 +1,192 @@
+"""
+In-memory portfolio model kept current from order fills.
+
+``PortfolioState`` loads holdings, positions and cash once, then applies the
+fills reported by an ``OrderTracker`` so later rebalance iterations need no
+portfolio requests. A full reconcile against Kite is done at the end of a
+run, or earlier when the model can no longer be trusted (an order whose fill
+state is unknown, or a quantity or cash balance that went negative).
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.services.order_tracker import OrderTracker, TERMINAL_STATUSES
+from src.services.zerodha_service import ZerodhaService
+
+logger = logging.getLogger(__name__)
+
+
+def holdings_from_summary(portfolio: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Merge holdings and net positions from a portfolio summary into one entry per ticker."""
+    current_holdings = {}
+    for holding in portfolio['holdings']:
+        ticker = holding['tradingsymbol']
+        current_holdings[ticker] = {
+            'quantity': int(holding.get('opening_quantity') or 0),
+            'average_price': float(holding['average_price']),
+            # Per API: use last_price for value computations
+            'current_value': float(holding.get('last_price') or 0.0) * int(holding.get('opening_quantity') or 0),
+            'ltp': float(holding.get('last_price', holding['average_price'])),
+            'exchange': holding.get('exchange', 'NSE')
+        }
+
+    # Add positions using net positions (per API, 'net' is actual current portfolio)
+    for position in portfolio['positions']['net']:
+        ticker = position['tradingsymbol']
+        exchange = position.get('exchange', 'NSE')
+        qty = int(position.get('quantity') or 0)
+        ltp = float(position.get('last_price', position.get('average_price', 0.0)))
+        multiplier = int(position.get('multiplier') or 1)
+        if ticker in current_holdings:
+            # Update quantity if position exists
+            current_holdings[ticker]['quantity'] += qty
+            # Update latest ltp and exchange if available
+            current_holdings[ticker]['ltp'] = ltp or current_holdings[ticker]['ltp']
+            current_holdings[ticker]['exchange'] = current_holdings[ticker].get('exchange') or exchange
+        elif qty != 0:
+            # Add new position
+            current_holdings[ticker] = {
+                'quantity': qty,
+                'average_price': float(position.get('average_price') or 0.0),
+                # For positions, value = last_price * quantity * multiplier
+                'current_value': ltp * qty * multiplier,
+                'ltp': ltp,
+                'exchange': exchange
+            }
+    return current_holdings
+
+
+class PortfolioState:
+    """Holdings and cash of one account, updated incrementally from fills."""
+
+    def __init__(self, zerodha_service: ZerodhaService, user_id: str,
+                 order_tracker: Optional[OrderTracker] = None):
+        """Initialize an empty state; call ``load`` before use.
+
+        Args:
+            zerodha_service: Service used for the initial load and reconciles
+            user_id: Zerodha user ID of the account
+            order_tracker: Tracker whose fills are applied; a load counts its
+                           fills so far as already in the account
+        """
+        self.zerodha_service = zerodha_service
+        self.user_id = user_id
+        self.order_tracker = order_tracker
+        self.holdings: Dict[str, Dict[str, Any]] = {}
+        self.cash = 0.0
+        self.loaded = False
+        # Set when the model may have diverged from the account
+        self.needs_reconcile = False
+        # Filled quantity already applied per order ID
+        self._applied: Dict[str, int] = {}
+
+    async def load(self, portfolio: Optional[Dict[str, Any]] = None) -> None:
+        """Load holdings, positions and cash from Kite (three concurrent requests).
+
+        Args:
+            portfolio: Portfolio summary fetched already for this account; skips the requests
+        """
+        if portfolio is None:
+            portfolio = await self.zerodha_service.get_portfolio_summary(self.user_id)
+        self.holdings = holdings_from_summary(portfolio)
+        self.cash = float(portfolio['available_cash'])
+        self.loaded = True
+        self.needs_reconcile = False
+        # The loaded account already includes every fill known so far; only later ones are applied
+        if self.order_tracker is not None:
+            self._applied = {
+                order_id: order['filled_quantity'] for order_id, order in self.order_tracker.orders.items()
+            }
+
+    def apply_fills(self, tracker: OrderTracker, order_ids: Optional[Iterable[str]] = None) -> int:
+        """Apply fills reported by a tracker since the last call.
+
+        Fills of orders that are still open are applied by a later call once
+        they arrive, so an open order only forces a reconcile when it was
+        placed in the current iteration (``order_ids``), whose plan assumed it
+        would fill.
+
+        Args:
+            tracker: Tracker with the fill state of the run's orders
+            order_ids: Orders placed in the current iteration (default: every tracked order)
+
+        Returns:
+            Number of orders whose fills changed the state
+        """
+        current = set(order_ids) if order_ids is not None else set(tracker.orders)
+        changed = 0
+        for order_id, order in tracker.orders.items():
+            if order_id in current and order['status'] not in TERMINAL_STATUSES:
+                # Its outcome is unknown, so the next plan cannot be made from this state
+                self.needs_reconcile = True
+            filled = order['filled_quantity'] - self._applied.get(order_id, 0)
+            if filled <= 0:
+                continue
+            self._applied[order_id] = order['filled_quantity']
+            self._apply_fill(order, filled)
+            changed += 1
+
+        negative = [ticker for ticker, entry in self.holdings.items() if entry['quantity'] < 0]
+        if negative or self.cash < 0:
+            logger.warning(f"Portfolio state for {self.user_id} went negative "
+                           f"({', '.join(negative) or 'cash'}); will reconcile")
+            self.needs_reconcile = True
+        return changed
+
+    def _apply_fill(self, order: Dict[str, Any], filled: int) -> None:
+        ticker = order['ticker']
+        price = order['average_price'] or order.get('price') or self.holdings.get(ticker, {}).get('ltp', 0.0)
+        sign = 1 if order['action'] == 'BUY' else -1
+
+        entry = self.holdings.setdefault(ticker, {
+            'quantity': 0,
+            'average_price': price,
+            'current_value': 0.0,
+            'ltp': price,
+            'exchange': order.get('exchange', 'NSE'),
+        })
+        entry['quantity'] += sign * filled
+        entry['ltp'] = price or entry['ltp']
+        entry['current_value'] = entry['quantity'] * entry['ltp']
+        self.cash -= sign * filled * price
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state in the shape of ``PortfolioRebalancer.get_current_portfolio``."""
+        current_holdings = {ticker: dict(entry) for ticker, entry in self.holdings.items() if entry['quantity']}
+        invested = sum(entry['quantity'] * entry['ltp'] for entry in current_holdings.values())
+        return {
+            'current_holdings': current_holdings,
+            'holdings_value': invested,
+            'positions_value': 0.0,
+            'available_cash': self.cash,
+            'total_value': invested + self.cash,
+        }
+
+    async def reconcile(self, cash_tolerance: float = 100.0) -> List[Dict[str, Any]]:
+        """Reload the account from Kite and report where the model had diverged.
+
+        Args:
+            cash_tolerance: Cash difference (in rupees) ignored when comparing, since
+                            charges are debited without a fill
+
+        Returns:
+            One entry per mismatching ticker ('ticker', 'expected', 'actual'),
+            plus a '_cash' entry if the cash differs by more than ``cash_tolerance``
+        """
+        expected_quantities = {ticker: entry['quantity'] for ticker, entry in self.holdings.items()}
+        expected_cash = self.cash
+        await self.load()
+
+        mismatches = []
+        for ticker in sorted(set(expected_quantities) | set(self.holdings)):
+            expected = expected_quantities.get(ticker, 0)
+            actual = self.holdings.get(ticker, {}).get('quantity', 0)
+            if expected != actual:
+                mismatches.append({'ticker': ticker, 'expected': expected, 'actual': actual})
+        if abs(expected_cash - self.cash) > cash_tolerance:
+            mismatches.append({'ticker': '_cash', 'expected': expected_cash, 'actual': self.cash})
+
+        if mismatches:
+            logger.warning(f"Portfolio state for {self.user_id} differed from Kite on {len(mismatches)} entries")
+        return mismatches
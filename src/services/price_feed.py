@@ -0,0 +1,220 @@
+"""
+Live in-memory price table fed by the Kite WebSocket ticker.
+
+``KiteTickerFeed`` subscribes to instruments over KiteTicker (in quote mode,
+which carries the best bid/ask) and writes every tick into a ``PriceTable``.
+Readers get the latest LTP with its timestamp without any request, and
+``StreamingMarketDataProvider`` exposes the table as the first link of a
+market data provider chain. ``FakeTickSource`` drives the same table offline.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from kiteconnect import KiteTicker
+
+from src.services.instruments import InstrumentMaster
+from src.services.market_data import MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+# Prices older than this are treated as missing
+DEFAULT_MAX_AGE = 30.0  # seconds
+
+
+class PriceTable:
+    """Thread-safe table of the latest price per instrument ('EXCHANGE:SYMBOL')."""
+
+    def __init__(self):
+        self._prices: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Call ``callback(instrument, entry)`` after every update, on the updating thread."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def update(self, instrument: str, last_price: float, bid: Optional[float] = None,
+               ask: Optional[float] = None, timestamp: Optional[float] = None) -> None:
+        """Record a tick for an instrument."""
+        entry = {
+            "last_price": float(last_price),
+            "bid": bid,
+            "ask": ask,
+            "timestamp": timestamp if timestamp is not None else time.time(),
+        }
+        with self._lock:
+            self._prices[instrument] = entry
+        for listener in list(self._listeners):
+            try:
+                listener(instrument, dict(entry))
+            except Exception as e:
+                logger.warning(f"Price listener failed for {instrument}: {e}")
+
+    def get(self, instrument: str, max_age: Optional[float] = DEFAULT_MAX_AGE) -> Optional[Dict[str, Any]]:
+        """Return the latest entry for an instrument, or None if missing or older than ``max_age``."""
+        with self._lock:
+            entry = self._prices.get(instrument)
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry["timestamp"] > max_age:
+            return None
+        return dict(entry)
+
+    def get_ltps(self, instruments: Iterable[str], max_age: Optional[float] = DEFAULT_MAX_AGE) -> Dict[str, float]:
+        """Return fresh LTPs for the given instruments (stale or missing ones are omitted)."""
+        prices = {}
+        for instrument in instruments:
+            entry = self.get(instrument, max_age)
+            if entry is not None:
+                prices[instrument] = entry["last_price"]
+        return prices
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of every entry."""
+        with self._lock:
+            return {instrument: dict(entry) for instrument, entry in self._prices.items()}
+
+
+class StreamingMarketDataProvider(MarketDataProvider):
+    """LTPs read from a live price table (no network requests)."""
+
+    name = "stream"
+
+    def __init__(self, price_table: PriceTable, max_age: Optional[float] = DEFAULT_MAX_AGE):
+        self.price_table = price_table
+        self.max_age = max_age
+
+    async def get_ltp(self, instruments: List[str]) -> Dict[str, float]:
+        return self.price_table.get_ltps(instruments, self.max_age)
+
+
+class KiteTickerFeed:
+    """Stream quotes for a set of instruments from KiteTicker into a price table."""
+
+    def __init__(self, api_key: str, access_token: str, instrument_master: InstrumentMaster,
+                 price_table: Optional[PriceTable] = None):
+        """Initialize the feed.
+
+        Args:
+            api_key: Kite Connect API key
+            access_token: Access token of an authenticated session
+            instrument_master: Loaded instrument master used to map symbols to tokens
+            price_table: Table to write ticks into. Defaults to a new table.
+        """
+        self.instrument_master = instrument_master
+        self.price_table = price_table or PriceTable()
+        self._token_to_instrument: Dict[int, str] = {}
+        self._connected = threading.Event()
+        self._ticker = KiteTicker(api_key, access_token)
+        self._ticker.on_ticks = self._on_ticks
+        self._ticker.on_connect = self._on_connect
+        self._ticker.on_close = self._on_close
+        self._ticker.on_error = self._on_error
+
+    def _resolve(self, instruments: Iterable[str]) -> List[int]:
+        tokens = []
+        for instrument in instruments:
+            exchange, _, symbol = instrument.partition(":")
+            record = self.instrument_master.get(symbol, exchange)
+            if record is None:
+                logger.warning(f"Cannot stream {instrument}: not in the instrument master")
+                continue
+            self._token_to_instrument[record["instrument_token"]] = instrument
+            tokens.append(record["instrument_token"])
+        return tokens
+
+    def _on_ticks(self, ws, ticks: List[Dict[str, Any]]) -> None:
+        for tick in ticks:
+            instrument = self._token_to_instrument.get(tick.get("instrument_token"))
+            if instrument is None or not tick.get("last_price"):
+                continue
+            depth = tick.get("depth") or {}
+            best_bid = (depth.get("buy") or [{}])[0].get("price") or None
+            best_ask = (depth.get("sell") or [{}])[0].get("price") or None
+            # Timestamped on receipt: Kite's exchange_timestamp is a naive IST datetime
+            self.price_table.update(instrument, tick["last_price"], bid=best_bid, ask=best_ask)
+
+    def _on_connect(self, ws, response) -> None:
+        tokens = list(self._token_to_instrument)
+        if tokens:
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_QUOTE, tokens)
+        logger.info(f"Kite ticker connected; streaming {len(tokens)} instruments")
+        self._connected.set()
+
+    def _on_close(self, ws, code, reason) -> None:
+        logger.info(f"Kite ticker closed ({code}): {reason}")
+        self._connected.clear()
+
+    def _on_error(self, ws, code, reason) -> None:
+        logger.warning(f"Kite ticker error ({code}): {reason}")
+
+    async def start(self, instruments: Iterable[str], timeout: float = 10.0) -> None:
+        """Connect in a background thread and subscribe to the instruments."""
+        self._resolve(instruments)
+        self._ticker.connect(threaded=True)
+        connected = await asyncio.to_thread(self._connected.wait, timeout)
+        if not connected:
+            logger.warning(f"Kite ticker did not connect within {timeout:.0f}s; prices will fall back to polling")
+
+    def subscribe(self, instruments: Iterable[str]) -> None:
+        """Add instruments to a running feed."""
+        tokens = self._resolve(instruments)
+        if tokens and self._ticker.is_connected():
+            self._ticker.subscribe(tokens)
+            self._ticker.set_mode(self._ticker.MODE_QUOTE, tokens)
+
+    def stop(self) -> None:
+        """Close the WebSocket connection."""
+        self._ticker.stop_retry()
+        self._ticker.close()
+
+
+class FakeTickSource:
+    """Write synthetic ticks into a price table for offline runs and tests."""
+
+    def __init__(self, price_table: PriceTable, spread_pct: float = 0.05, seed: Optional[int] = None):
+        """Initialize the fake source.
+
+        Args:
+            price_table: Table to write ticks into
+            spread_pct: Bid/ask spread around the LTP, in percent
+            seed: Optional random seed for reproducible random walks
+        """
+        self.price_table = price_table
+        self.spread_pct = spread_pct
+        self._random = random.Random(seed)
+
+    def push(self, instrument: str, last_price: float) -> None:
+        """Write one tick with a symmetric spread around ``last_price``."""
+        half_spread = last_price * self.spread_pct / 200
+        self.price_table.update(instrument, last_price, bid=last_price - half_spread, ask=last_price + half_spread)
+
+    async def run(self, prices: Dict[str, float], interval: float = 0.5, steps: Optional[int] = None,
+                  volatility_pct: float = 0.1) -> None:
+        """Random-walk the given starting prices, pushing a tick for each every ``interval`` seconds.
+
+        Args:
+            prices: Starting LTP per instrument
+            interval: Seconds between rounds of ticks
+            steps: Number of rounds (None runs until cancelled)
+            volatility_pct: Standard deviation of each move, in percent
+        """
+        prices = dict(prices)
+        step = 0
+        while steps is None or step < steps:
+            for instrument, price in prices.items():
+                price *= 1 + self._random.gauss(0.0, volatility_pct / 100)
+                prices[instrument] = price
+                self.push(instrument, round(price, 2))
+            step += 1
+            await asyncio.sleep(interval)
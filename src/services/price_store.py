@@ -0,0 +1,250 @@
+"""
+Local incremental OHLCV store backed by NumPy files.
+
+Each ticker is persisted as a single ``.npy`` array of daily bars under
+``settings.cache_dir / "ohlcv"`` with a small JSON index recording the last
+stored bar. Reads memory-map the array, so slicing the most recent N bars does
+not copy data; refreshes only download the bars missing since the last stored
+date.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from src.config.settings import settings
+from src.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Column layout of every per-ticker array (one row per trading day, oldest first).
+# Dates are stored as days since the Unix epoch so the whole array stays float64.
+COLUMNS = ("date", "open", "high", "low", "close", "volume")
+DATE, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(COLUMNS))
+
+# History downloaded the first time a ticker is seen
+INITIAL_HISTORY_PERIOD = "1y"
+# Skip the network entirely if the ticker was refreshed this recently
+REFRESH_INTERVAL = timedelta(minutes=15)
+
+
+def epoch_day_to_str(value: float) -> str:
+    """Convert a stored epoch-day value to a YYYY-MM-DD string."""
+    return str(np.datetime64(int(value), "D"))
+
+
+def bars_to_records(bars: np.ndarray, include_volume: bool = True) -> List[Dict[str, Any]]:
+    """Convert an array of bars into a list of dictionaries.
+
+    Args:
+        bars: Array slice with the column layout described by ``COLUMNS``
+        include_volume: Whether to include the volume field
+
+    Returns:
+        List of dictionaries with date, open, high, low, close (and volume)
+    """
+    records = []
+    for row in bars:
+        record = {
+            "date": epoch_day_to_str(row[DATE]),
+            "open": float(row[OPEN]),
+            "high": float(row[HIGH]),
+            "low": float(row[LOW]),
+            "close": float(row[CLOSE]),
+        }
+        if include_volume:
+            record["volume"] = int(row[VOLUME])
+        records.append(record)
+    return records
+
+
+def _history_to_array(hist: pd.DataFrame) -> np.ndarray:
+    """Convert a yfinance history DataFrame into the store's array layout."""
+    hist = hist.dropna(subset=["Open", "High", "Low", "Close"])
+    if hist.empty:
+        return np.empty((0, len(COLUMNS)), dtype=np.float64)
+
+    days = np.array([ts.date() for ts in hist.index], dtype="datetime64[D]").astype(np.int64)
+    bars = np.empty((len(hist), len(COLUMNS)), dtype=np.float64)
+    bars[:, DATE] = days
+    bars[:, OPEN] = hist["Open"].to_numpy(dtype=np.float64)
+    bars[:, HIGH] = hist["High"].to_numpy(dtype=np.float64)
+    bars[:, LOW] = hist["Low"].to_numpy(dtype=np.float64)
+    bars[:, CLOSE] = hist["Close"].to_numpy(dtype=np.float64)
+    bars[:, VOLUME] = hist["Volume"].fillna(0).to_numpy(dtype=np.float64)
+    return bars
+
+
+class PriceStore:
+    """Persistent, incrementally refreshed store of daily OHLCV bars."""
+
+    def __init__(self, root: Optional[Path] = None):
+        """Initialize the price store.
+
+        Args:
+            root: Directory holding the arrays and index. Defaults to
+                  ``settings.cache_dir / "ohlcv"``.
+        """
+        self.root = Path(root) if root is not None else settings.cache_dir / "ohlcv"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.root / "index.json"
+        self._lock = threading.RLock()
+        self._index: Dict[str, Dict[str, Any]] = self._read_index()
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self._index_path.exists():
+            return {}
+        try:
+            with open(self._index_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable price store index {self._index_path}: {e}")
+            return {}
+
+    def _write_index(self) -> None:
+        tmp_path = self._index_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def _array_path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.npy"
+
+    def _write_array(self, symbol: str, bars: np.ndarray) -> None:
+        path = self._array_path(symbol)
+        tmp_path = path.with_suffix(".npy.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, bars)
+        # Readers holding a memmap of the previous file keep a valid view
+        os.replace(tmp_path, path)
+
+    def last_date(self, symbol: str) -> Optional[str]:
+        """Return the date (YYYY-MM-DD) of the last stored bar for a symbol."""
+        entry = self._index.get(symbol)
+        return entry.get("last_date") if entry else None
+
+    def refresh(self, symbol: str, force: bool = False, rate_limiter: Optional[TokenBucket] = None) -> int:
+        """Download any bars missing since the last stored bar.
+
+        The last stored bar is always re-downloaded because it may have been
+        captured intraday before the session closed.
+
+        Args:
+            symbol: Normalized yfinance symbol (e.g., 'RELIANCE.NS')
+            force: Refresh even if the symbol was refreshed recently
+            rate_limiter: Limiter acquired before the download, only if one is made
+
+        Returns:
+            Number of bars written (0 if the store was already fresh or on error)
+        """
+        with self._lock:
+            entry = self._index.get(symbol)
+            now = datetime.now(timezone.utc)
+            if entry and not force:
+                refreshed_at = datetime.fromisoformat(entry["refreshed_at"])
+                if now - refreshed_at < REFRESH_INTERVAL:
+                    return 0
+
+            existing = self.get_bars(symbol) if entry else None
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            try:
+                ticker = yf.Ticker(symbol)
+                if existing is not None and len(existing):
+                    hist = ticker.history(start=entry["last_date"])
+                else:
+                    hist = ticker.history(period=INITIAL_HISTORY_PERIOD)
+            except Exception as e:
+                logger.warning(f"Failed to refresh price history for {symbol}: {e}")
+                return 0
+
+            new_bars = _history_to_array(hist)
+            if existing is not None and len(existing) and len(new_bars):
+                # Keep stored bars strictly before the first downloaded day
+                keep = existing[existing[:, DATE] < new_bars[0, DATE]]
+                bars = np.concatenate([keep, new_bars])
+            elif len(new_bars):
+                bars = new_bars
+            else:
+                bars = existing
+
+            if bars is not None and len(bars):
+                if len(new_bars):
+                    self._write_array(symbol, bars)
+                self._index[symbol] = {
+                    "rows": int(len(bars)),
+                    "last_date": epoch_day_to_str(bars[-1, DATE]),
+                    "refreshed_at": now.isoformat(),
+                }
+                self._write_index()
+
+            logger.debug(f"Refreshed {symbol}: {len(new_bars)} bars downloaded")
+            return int(len(new_bars))
+
+    def get_bars(self, symbol: str, days: Optional[int] = None) -> np.ndarray:
+        """Return the most recent bars for a symbol as a read-only view.
+
+        Args:
+            symbol: Normalized yfinance symbol (e.g., 'RELIANCE.NS')
+            days: Number of most recent bars to return. Returns all bars if None.
+
+        Returns:
+            Array of shape (n_days, len(COLUMNS)); empty if nothing is stored
+        """
+        path = self._array_path(symbol)
+        if not path.exists():
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        bars = np.load(path, mmap_mode="r")
+        if days is not None:
+            return bars[-days:] if days > 0 else bars[:0]
+        return bars
+
+    def get_panel(self, symbols: List[str], days: int) -> Dict[str, np.ndarray]:
+        """Return date-aligned OHLCV arrays for several symbols.
+
+        The panel covers the most recent ``days`` trading dates seen across all
+        symbols. A date a symbol has no bar for (not traded, or not downloaded
+        yet) repeats its previous close as open, high, low and close with zero
+        volume, so the last column always holds a symbol's latest close; dates
+        before a symbol's first stored bar are NaN.
+
+        Args:
+            symbols: Normalized yfinance symbols
+            days: Number of most recent trading dates to include
+
+        Returns:
+            Dictionary with 'dates' (shape (n_days,), epoch days) and 'open',
+            'high', 'low', 'close', 'volume' arrays of shape (n_symbols, n_days)
+        """
+        per_symbol = [self.get_bars(symbol, days) for symbol in symbols]
+        dates = np.unique(np.concatenate([bars[:, DATE] for bars in per_symbol] or [np.empty(0)]))[-days:]
+
+        panel = {
+            name: np.full((len(symbols), len(dates)), np.nan)
+            for name in COLUMNS if name != "date"
+        }
+        for row, bars in enumerate(per_symbol):
+            bars = bars[bars[:, DATE] >= dates[0]] if len(dates) else bars[:0]
+            cols = np.searchsorted(dates, bars[:, DATE])
+            for name in panel:
+                panel[name][row, cols] = bars[:, COLUMNS.index(name)]
+
+        # Carry the last close forward over gaps, leaving dates before the first bar empty
+        present = ~np.isnan(panel["close"])
+        last = np.maximum.accumulate(np.where(present, np.arange(len(dates)), 0), axis=1)
+        started = np.logical_or.accumulate(present, axis=1)
+        gap = started & ~present
+        carried = np.take_along_axis(panel["close"], last, axis=1)
+        for name in ("open", "high", "low", "close"):
+            panel[name] = np.where(gap, carried, panel[name])
+        panel["volume"] = np.where(gap, 0.0, panel["volume"])
+        panel["dates"] = dates
+        return panel
@@ -0,0 +1,99 @@
+"""
+Parallel prefetch of yfinance stock info ahead of LLM analysis.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+from src.services.yfinance_service import YFinanceService
+from src.utils.rate_limit import get_host_limiter
+
+logger = logging.getLogger(__name__)
+
+# All yfinance requests go to Yahoo Finance, so they share one host budget
+YAHOO_HOST = "finance.yahoo.com"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+
+# Retry configuration
+MAX_RETRIES = 3
+INITIAL_RETRY_DELAY = 1.0  # seconds
+JITTER_FACTOR = 0.5  # +/-50% jitter
+
+
+class StockInfoPrefetcher:
+    """Fetch ``get_stock_info`` for many tickers on a bounded thread pool.
+
+    Results are kept as futures in a shared in-memory store, so an analysis
+    coroutine can await its ticker's data while the rest is still loading.
+    """
+
+    def __init__(
+        self,
+        yfinance_service: Optional[YFinanceService] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+    ):
+        """Initialize the prefetcher.
+
+        Args:
+            yfinance_service: Service used for fetching. Defaults to a new instance.
+            max_workers: Maximum number of concurrent fetch threads
+            requests_per_second: Request budget for the Yahoo Finance host
+        """
+        self.yfinance_service = yfinance_service or YFinanceService()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yf-prefetch")
+        self._rate_limiter = get_host_limiter(YAHOO_HOST, requests_per_second)
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, symbol: str) -> Dict[str, Any]:
+        """Fetch stock info with retries, exponential backoff and jitter.
+
+        Every request to Yahoo (info, history, news) takes a limiter token;
+        cache hits take none. Retries bypass the short empty-info cache, whose
+        TTL is longer than the backoff.
+        """
+        attempt = 0
+        while True:
+            data = self.yfinance_service.get_stock_info(symbol, retry=attempt > 0,
+                                                        rate_limiter=self._rate_limiter)
+            if "error" not in data or attempt >= MAX_RETRIES:
+                return data
+
+            attempt += 1
+            delay = INITIAL_RETRY_DELAY * (2 ** (attempt - 1))
+            delay *= random.uniform(1 - JITTER_FACTOR, 1 + JITTER_FACTOR)
+            logger.warning(
+                f"Prefetch of {symbol} failed ({data['error']}), retrying in {delay:.2f} seconds "
+                f"(attempt {attempt}/{MAX_RETRIES})"
+            )
+            time.sleep(delay)
+
+    def _submit(self, symbol: str) -> Future:
+        with self._lock:
+            future = self._futures.get(symbol)
+            if future is None:
+                future = self._executor.submit(self._fetch, symbol)
+                self._futures[symbol] = future
+            return future
+
+    def start(self, symbols: Iterable[str]) -> None:
+        """Queue every symbol for fetching without waiting for results."""
+        symbols = list(symbols)
+        for symbol in symbols:
+            self._submit(symbol)
+        logger.info(f"Prefetching yfinance data for {len(symbols)} stocks")
+
+    async def get(self, symbol: str) -> Dict[str, Any]:
+        """Await the stock info for a symbol, queueing it if it was not prefetched."""
+        return await asyncio.wrap_future(self._submit(symbol))
+
+    def shutdown(self) -> None:
+        """Cancel pending fetches and release the worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
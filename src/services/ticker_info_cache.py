@@ -0,0 +1,280 @@
+"""
+Field-level TTL cache for yfinance ``Ticker.info`` and ``Ticker.news``.
+
+``Ticker.info`` returns every field in one request, but the fields age at very
+different rates: the current price is stale after seconds while the company
+name or beta barely changes within a day. Each field belongs to a freshness
+class, and a cached info payload is reused for as long as every requested
+field is still within its class TTL. Entries live in an in-memory LRU backed
+by small JSON files under ``settings.cache_dir``. Symbols that yfinance
+definitely reports as unknown or delisted (HTTP 404, ``YFTickerMissingError``)
+are negatively cached on disk; an info payload without quote data, which a
+throttled request also returns, is only skipped briefly and in memory.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import yfinance as yf
+from yfinance.exceptions import YFTickerMissingError
+
+from src.config.settings import settings
+from src.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Freshness classes: class name -> (TTL in seconds, fields in that class)
+FRESHNESS_CLASSES: Dict[str, tuple] = {
+    "price": (30, (
+        "currentPrice", "regularMarketPrice", "bid", "ask",
+        "volume", "regularMarketVolume",
+    )),
+    "intraday": (5 * 60, (
+        "dayHigh", "dayLow", "open", "previousClose",
+        "regularMarketDayHigh", "regularMarketDayLow",
+        "regularMarketOpen", "regularMarketPreviousClose",
+    )),
+    "fundamentals": (24 * 60 * 60, (
+        "longName", "shortName", "quoteType", "sector", "industry",
+        "beta", "fiftyTwoWeekHigh", "fiftyTwoWeekLow", "marketCap",
+        "sharesOutstanding", "trailingPE", "forwardPE", "dividendYield",
+        "averageVolume", "averageVolume10days",
+    )),
+}
+# TTL for fields not listed in any freshness class
+DEFAULT_FIELD_TTL = 5 * 60
+NEWS_TTL = 15 * 60
+# How long a symbol reported as unknown/delisted is skipped
+NEGATIVE_TTL = 24 * 60 * 60
+# How long a symbol whose info came back without quote data is skipped (memory only)
+EMPTY_INFO_TTL = 60
+MAX_MEMORY_ENTRIES = 512
+
+# Fields whose absence marks an info payload as carrying no quote data
+_IDENTITY_FIELDS = ("quoteType", "longName", "shortName", "regularMarketPrice", "currentPrice")
+
+FIELD_TTLS: Dict[str, int] = {
+    field: ttl
+    for ttl, fields in FRESHNESS_CLASSES.values()
+    for field in fields
+}
+
+
+class InvalidSymbolError(ValueError):
+    """Raised when a symbol is known (or cached) to be invalid or delisted."""
+
+
+class EmptyInfoError(ValueError):
+    """Raised when yfinance returned (or recently returned) no quote data for a symbol."""
+
+
+def _is_not_found(error: Exception) -> bool:
+    """Return True if a fetch error definitely means the symbol does not exist."""
+    if isinstance(error, YFTickerMissingError):
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 404
+
+
+def _default_fetch_info(symbol: str) -> Dict[str, Any]:
+    return yf.Ticker(symbol).info or {}
+
+
+def _default_fetch_news(symbol: str) -> List[Dict[str, Any]]:
+    return yf.Ticker(symbol).news or []
+
+
+class TickerInfoCache:
+    """Two-level (memory + disk) cache of yfinance info and news per symbol."""
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_entries: int = MAX_MEMORY_ENTRIES,
+        fetch_info: Callable[[str], Dict[str, Any]] = _default_fetch_info,
+        fetch_news: Callable[[str], List[Dict[str, Any]]] = _default_fetch_news,
+    ):
+        """Initialize the cache.
+
+        Args:
+            root: Directory for persisted entries. Defaults to
+                  ``settings.cache_dir / "ticker_info"``.
+            max_entries: Maximum number of symbols kept in memory
+            fetch_info: Function returning ``Ticker.info`` for a symbol
+            fetch_news: Function returning ``Ticker.news`` for a symbol
+        """
+        self.root = Path(root) if root is not None else settings.cache_dir / "ticker_info"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._fetch_info = fetch_info
+        self._fetch_news = fetch_news
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Time of the last info payload without quote data per symbol (never persisted)
+        self._empty_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "negative_hits": 0,
+            "empty_hits": 0,
+            "news_hits": 0,
+            "news_misses": 0,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of hit/miss counters for telemetry."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _entry_path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.json"
+
+    def _get_entry(self, symbol: str) -> Dict[str, Any]:
+        """Return the entry for a symbol from memory, falling back to disk."""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                self._entries.move_to_end(symbol)
+                return entry
+
+            entry = {}
+            path = self._entry_path(symbol)
+            if path.exists():
+                try:
+                    with open(path, "r") as f:
+                        entry = json.load(f)
+                    self._stats["disk_hits"] += 1
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+                    entry = {}
+
+            self._entries[symbol] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def _persist(self, symbol: str, entry: Dict[str, Any]) -> None:
+        path = self._entry_path(symbol)
+        tmp_path = path.with_suffix(".json.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist cache entry for {symbol}: {e}")
+
+    def _check_negative(self, symbol: str, entry: Dict[str, Any]) -> None:
+        invalid_time = entry.get("invalid_time")
+        if invalid_time is not None and time.time() - invalid_time < NEGATIVE_TTL:
+            self._stats["negative_hits"] += 1
+            raise InvalidSymbolError(f"{symbol} is cached as invalid or delisted")
+
+    def _mark_invalid(self, symbol: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            entry["invalid_time"] = time.time()
+            self._persist(symbol, entry)
+
+    def get_info(
+        self,
+        symbol: str,
+        fields: Optional[Iterable[str]] = None,
+        retry: bool = False,
+        rate_limiter: Optional[TokenBucket] = None,
+    ) -> Dict[str, Any]:
+        """Return ``Ticker.info`` for a symbol, refetching only if a requested field is stale.
+
+        Args:
+            symbol: Normalized yfinance symbol (e.g., 'RELIANCE.NS')
+            fields: Fields the caller needs fresh. If None, ``DEFAULT_FIELD_TTL`` applies.
+            retry: Fetch again even if the last payload had no quote data, e.g. when
+                   retrying after a backoff shorter than ``EMPTY_INFO_TTL``
+            rate_limiter: Limiter acquired before the request, only if one is made
+
+        Returns:
+            The (possibly cached) info dictionary
+
+        Raises:
+            InvalidSymbolError: If the symbol is unknown or delisted
+            EmptyInfoError: If yfinance returned no quote data within the last ``EMPTY_INFO_TTL``
+        """
+        with self._lock:
+            entry = self._get_entry(symbol)
+            self._check_negative(symbol, entry)
+            empty_time = self._empty_times.get(symbol)
+            if not retry and empty_time is not None and time.time() - empty_time < EMPTY_INFO_TTL:
+                self._stats["empty_hits"] += 1
+                raise EmptyInfoError(f"No quote data for {symbol} in the last {EMPTY_INFO_TTL}s")
+
+            # The payload is only as fresh as the most volatile requested field
+            ttl = DEFAULT_FIELD_TTL
+            if fields is not None:
+                ttl = min(
+                    (FIELD_TTLS.get(field, DEFAULT_FIELD_TTL) for field in fields),
+                    default=DEFAULT_FIELD_TTL,
+                )
+            info_time = entry.get("info_time")
+            if info_time is not None and time.time() - info_time < ttl:
+                self._stats["hits"] += 1
+                return entry["info"]
+            self._stats["misses"] += 1
+
+        # Fetch outside the lock so other symbols can be served concurrently
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            info = self._fetch_info(symbol)
+        except Exception as e:
+            if _is_not_found(e):
+                self._mark_invalid(symbol, entry)
+                raise InvalidSymbolError(f"{symbol} not found: {e}") from e
+            raise
+
+        if not any(info.get(field) is not None for field in _IDENTITY_FIELDS):
+            # Also what a throttled request returns, so the symbol is not marked invalid
+            with self._lock:
+                self._empty_times[symbol] = time.time()
+            raise EmptyInfoError(f"No quote data for {symbol}; it may be delisted or the request was throttled")
+
+        with self._lock:
+            self._empty_times.pop(symbol, None)
+            entry["info"] = info
+            entry["info_time"] = time.time()
+            entry.pop("invalid_time", None)
+            self._persist(symbol, entry)
+        return info
+
+    def get_news(self, symbol: str, rate_limiter: Optional[TokenBucket] = None) -> List[Dict[str, Any]]:
+        """Return ``Ticker.news`` for a symbol, refetching after ``NEWS_TTL``.
+
+        Args:
+            symbol: Normalized yfinance symbol (e.g., 'RELIANCE.NS')
+            rate_limiter: Limiter acquired before the request, only if one is made
+
+        Raises:
+            InvalidSymbolError: If the symbol is cached as invalid or delisted
+        """
+        with self._lock:
+            entry = self._get_entry(symbol)
+            self._check_negative(symbol, entry)
+            news_time = entry.get("news_time")
+            if news_time is not None and time.time() - news_time < NEWS_TTL:
+                self._stats["news_hits"] += 1
+                return entry["news"]
+            self._stats["news_misses"] += 1
+
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        news = self._fetch_news(symbol)
+
+        with self._lock:
+            entry["news"] = news
+            entry["news_time"] = time.time()
+            self._persist(symbol, entry)
+        return news
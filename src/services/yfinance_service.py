@@ -2,21 +2,94 @@
 YFinance service for fetching stock data and market information.
 """
 
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
-import yfinance as yf
+from typing import Callable, Dict, Any, Optional, List, TypeVar
+import numpy as np
 import pandas as pd
 
+from src.services.price_store import PriceStore, VOLUME, bars_to_records
+from src.services.ticker_info_cache import TickerInfoCache
+from src.utils.rate_limit import TokenBucket
+from src.utils.indicators import TRADING_DAYS_PER_YEAR, compute_indicators
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Threads shared by the async API of all service instances
+ASYNC_EXECUTOR_WORKERS = 16
+# Default number of in-flight requests per service instance for the async API
+DEFAULT_ASYNC_CONCURRENCY = 8
+
+# Ticker.info fields read by get_stock_info (currentPrice is only used as a
+# data-quality flag, so it does not force a refetch every 30 seconds)
+STOCK_INFO_FIELDS = (
+    "longName", "beta", "fiftyTwoWeekHigh", "fiftyTwoWeekLow",
+    "previousClose", "dayHigh", "dayLow",
+)
+
+# Trading days of history loaded to compute technical indicators
+INDICATOR_LOOKBACK_DAYS = TRADING_DAYS_PER_YEAR
+
+# Shared caches used by every service instance in the process
+_default_price_store: Optional[PriceStore] = None
+_default_info_cache: Optional[TickerInfoCache] = None
+_async_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_default_price_store() -> PriceStore:
+    """Return the process-wide price store, creating it on first use."""
+    global _default_price_store
+    if _default_price_store is None:
+        _default_price_store = PriceStore()
+    return _default_price_store
+
+
+def get_default_info_cache() -> TickerInfoCache:
+    """Return the process-wide Ticker.info/news cache, creating it on first use."""
+    global _default_info_cache
+    if _default_info_cache is None:
+        _default_info_cache = TickerInfoCache()
+    return _default_info_cache
+
+
+def _get_async_executor() -> ThreadPoolExecutor:
+    global _async_executor
+    if _async_executor is None:
+        _async_executor = ThreadPoolExecutor(
+            max_workers=ASYNC_EXECUTOR_WORKERS, thread_name_prefix="yfinance"
+        )
+    return _async_executor
+
 
 class YFinanceService:
     """Service for fetching stock data using yfinance."""
     
-    def __init__(self):
-        """Initialize the yfinance service."""
-        pass
+    def __init__(
+        self,
+        price_store: Optional[PriceStore] = None,
+        info_cache: Optional[TickerInfoCache] = None,
+        max_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+    ):
+        """Initialize the yfinance service.
+        
+        Args:
+            price_store: Optional OHLCV store. Defaults to the shared store under
+                         ``settings.cache_dir``.
+            info_cache: Optional Ticker.info/news cache. Defaults to the shared cache.
+            max_concurrency: Maximum in-flight requests issued through the async API
+        """
+        self.price_store = price_store or get_default_price_store()
+        self.info_cache = info_cache or get_default_info_cache()
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters of the Ticker.info/news cache."""
+        return self.info_cache.stats()
     
     def _normalize_symbol(self, symbol: str) -> str:
         """Normalize stock symbol to ensure .NS suffix for NSE stocks.
@@ -40,11 +113,41 @@ class YFinanceService:
         # If no suffix exists, add .NS for NSE stocks
         return f"{symbol}.NS"
     
-    def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+    def _parse_news_article(self, article: Dict[str, Any]) -> Dict[str, str]:
+        """Extract timestamp, headline and publisher from a yfinance news item.
+        
+        Handles both the flat legacy layout and the newer layout where the
+        fields are nested under ``content``.
+        """
+        content = article.get('content')
+        if isinstance(content, dict):
+            pub_date = content.get('pubDate') or content.get('displayTime')
+            timestamp = "N/A"
+            if pub_date:
+                try:
+                    timestamp = datetime.fromisoformat(pub_date.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M")
+                except ValueError:
+                    timestamp = pub_date
+            return {
+                "timestamp": timestamp,
+                "headline": content.get('title') or 'N/A',
+                "publisher": (content.get('provider') or {}).get('displayName') or 'N/A'
+            }
+        
+        return {
+            "timestamp": datetime.fromtimestamp(article.get('providerPublishTime', 0), tz=timezone.utc).strftime("%Y-%m-%d %H:%M") if article.get('providerPublishTime') else "N/A",
+            "headline": article.get('title', 'N/A'),
+            "publisher": article.get('publisher', 'N/A')
+        }
+    
+    def get_stock_info(self, symbol: str, retry: bool = False,
+                       rate_limiter: Optional[TokenBucket] = None) -> Dict[str, Any]:
         """Get stock information in the new format for LLM consumption.
         
         Args:
             symbol: Stock symbol (e.g., 'RELIANCE', 'RELIANCE.NS', 'OLECTRA')
+            retry: Request Ticker.info again even if it recently came back without quote data
+            rate_limiter: Limiter acquired before each request to Yahoo (info, history, news)
             
         Returns:
             Dictionary containing stock information in the new format
@@ -54,16 +157,17 @@ class YFinanceService:
             normalized_symbol = self._normalize_symbol(symbol)
             logger.info(f"Fetching stock info for {symbol} (normalized to {normalized_symbol})")
             
-            ticker = yf.Ticker(normalized_symbol)
-            
-            # Get basic info
-            info = ticker.info
+            # Get basic info (served from cache while the requested fields are fresh)
+            info = self.info_cache.get_info(normalized_symbol, STOCK_INFO_FIELDS, retry=retry,
+                                            rate_limiter=rate_limiter)
             
-            # Get historical data for last 20 trading days
-            hist = ticker.history(period='1mo')  # Get more data to ensure we have 20 trading days
+            # Get historical data for last 20 trading days from the local store,
+            # downloading only the bars missing since the last stored one
+            self.price_store.refresh(normalized_symbol, rate_limiter=rate_limiter)
+            bars = self.price_store.get_bars(normalized_symbol, 20)
             
             # Get news headlines
-            news = ticker.news
+            news = self.info_cache.get_news(normalized_symbol, rate_limiter=rate_limiter)
             
             # Helper function to safely get values
             def safe_get(key, default="N/A"):
@@ -86,35 +190,17 @@ class YFinanceService:
             
             # Get 10-day average volume
             ten_day_avg_volume = None
-            if not hist.empty and len(hist) >= 10:
-                ten_day_avg_volume = hist['Volume'].tail(10).mean()
-            elif not hist.empty:
-                ten_day_avg_volume = hist['Volume'].mean()
+            if len(bars):
+                ten_day_avg_volume = float(bars[-10:, VOLUME].mean())
             
             # Process historical data for last 20 days
-            historical_data = []
-            if not hist.empty:
-                # Get last 20 trading days
-                last_20_days = hist.tail(20)
-                for date, row in last_20_days.iterrows():
-                    historical_data.append({
-                        "date": date.strftime("%Y-%m-%d"),
-                        "open": float(row['Open']),
-                        "high": float(row['High']),
-                        "low": float(row['Low']),
-                        "close": float(row['Close']),
-                        "volume": int(row['Volume'])
-                    })
+            historical_data = bars_to_records(bars)
             
             # Process news headlines (limit to 3 most recent)
             news_headlines = []
             if news:
                 for article in news[:3]:  # Limit to 3 most recent
-                    news_headlines.append({
-                        "timestamp": datetime.fromtimestamp(article.get('providerPublishTime', 0), tz=timezone.utc).strftime("%Y-%m-%d %H:%M") if article.get('providerPublishTime') else "N/A",
-                        "headline": article.get('title', 'N/A'),
-                        "publisher": article.get('publisher', 'N/A')
-                    })
+                    news_headlines.append(self._parse_news_article(article))
             
             # Compile data in new format
             stock_data = {
@@ -137,10 +223,13 @@ class YFinanceService:
                 # Historical data
                 "historical_data": historical_data,
                 
+                # Precomputed technical indicators
+                "indicators": self.get_indicators([normalized_symbol]).get(normalized_symbol, {}),
+                
                 # Data quality indicators
                 "data_quality": {
                     "has_real_time_data": info.get("currentPrice") is not None,
-                    "has_historical_data": not hist.empty,
+                    "has_historical_data": len(bars) > 0,
                     "has_news": len(news) > 0,
                     "last_updated": datetime.now(timezone.utc).isoformat()
                 }
@@ -179,8 +268,8 @@ class YFinanceService:
             normalized_symbol = self._normalize_symbol(symbol)
             logger.info(f"Fetching LTP for {symbol} (normalized to {normalized_symbol})")
             
-            ticker = yf.Ticker(normalized_symbol)
-            current_price = ticker.info.get("currentPrice")
+            info = self.info_cache.get_info(normalized_symbol, ("currentPrice",))
+            current_price = info.get("currentPrice")
             
             if current_price is not None:
                 logger.info(f"Successfully fetched LTP for {normalized_symbol}: {current_price}")
@@ -226,28 +315,96 @@ class YFinanceService:
         """
         try:
             normalized_symbol = self._normalize_symbol(symbol)
-            ticker = yf.Ticker(normalized_symbol)
             
-            # Get historical data for last 5 trading days
-            hist = ticker.history(period='5d')
+            # Read the last 5 trading days from the local store
+            self.price_store.refresh(normalized_symbol)
+            bars = self.price_store.get_bars(normalized_symbol, 5)
             
-            if hist.empty:
+            if not len(bars):
                 logger.warning(f"No historical data available for {symbol}")
                 return []
             
-            # Convert to list of dictionaries
-            ohlc_data = []
-            for date, row in hist.tail(5).iterrows():
-                ohlc_data.append({
-                    "date": date.strftime('%Y-%m-%d'),
-                    "open": float(row['Open']) if pd.notna(row['Open']) else None,
-                    "high": float(row['High']) if pd.notna(row['High']) else None,
-                    "low": float(row['Low']) if pd.notna(row['Low']) else None,
-                    "close": float(row['Close']) if pd.notna(row['Close']) else None
-                })
-            
-            return ohlc_data
+            return bars_to_records(bars, include_volume=False)
             
         except Exception as e:
             logger.error(f"Error fetching OHLC data for {symbol}: {e}")
             return []
+
+    def get_indicators(self, symbols: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+        """Compute technical indicators for several stocks in one vectorized pass.
+        
+        Args:
+            symbols: List of stock symbols (e.g., ['RELIANCE', 'SBIN', 'OLECTRA'])
+            
+        Returns:
+            Dictionary mapping each symbol to its indicators (None where unavailable),
+            e.g. rsi_14, atr_14, return_20d_pct, volatility_20d_pct, range_52w_position
+        """
+        if not symbols:
+            return {}
+        
+        normalized = [self._normalize_symbol(symbol) for symbol in symbols]
+        for normalized_symbol in set(normalized):
+            self.price_store.refresh(normalized_symbol)
+        
+        panel = self.price_store.get_panel(normalized, INDICATOR_LOOKBACK_DAYS)
+        if not len(panel["dates"]):
+            return {symbol: {} for symbol in symbols}
+        indicators = compute_indicators(panel)
+        
+        results = {}
+        for row, symbol in enumerate(symbols):
+            results[symbol] = {
+                name: (float(values[row]) if np.isfinite(values[row]) else None)
+                for name, values in indicators.items()
+            }
+        return results
+    
+    # ------------------------------------------------------------------
+    # Async API
+    #
+    # The methods above block on HTTP requests to Yahoo. The a* variants run
+    # them on a shared thread pool so the event loop keeps serving other
+    # coroutines (LLM calls, Mongo writes) while market data loads. Cancelling
+    # an awaiting task drops requests that have not started yet; a request
+    # already running in a worker thread finishes and its result is discarded.
+    # ------------------------------------------------------------------
+
+    async def _run_in_executor(self, func: Callable[..., T], *args: Any) -> T:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_async_executor(), func, *args)
+
+    async def aget_stock_info(self, symbol: str) -> Dict[str, Any]:
+        """Async version of :meth:`get_stock_info`."""
+        return await self._run_in_executor(self.get_stock_info, symbol)
+
+    async def aget_stock_ltp(self, symbol: str) -> Optional[float]:
+        """Async version of :meth:`get_stock_ltp`."""
+        return await self._run_in_executor(self.get_stock_ltp, symbol)
+
+    async def aget_ltp_many(self, symbols: List[str]) -> Dict[str, float]:
+        """Get LTP for multiple stocks concurrently.
+        
+        Args:
+            symbols: List of stock symbols (e.g., ['RELIANCE', 'SBIN', 'OLECTRA'])
+            
+        Returns:
+            Dictionary mapping symbols to their current prices (failed symbols omitted)
+        """
+        prices = await asyncio.gather(*(self.aget_stock_ltp(symbol) for symbol in symbols))
+        results = {
+            symbol: ltp for symbol, ltp in zip(symbols, prices) if ltp is not None
+        }
+        logger.info(f"Successfully fetched LTP for {len(results)} out of {len(symbols)} stocks")
+        return results
+
+    async def aget_stock_ohlc_last_5_days(self, symbol: str) -> List[Dict[str, Any]]:
+        """Async version of :meth:`get_stock_ohlc_last_5_days`."""
+        return await self._run_in_executor(self.get_stock_ohlc_last_5_days, symbol)
+
+    async def aget_indicators(self, symbols: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+        """Async version of :meth:`get_indicators`."""
+        return await self._run_in_executor(self.get_indicators, symbols)
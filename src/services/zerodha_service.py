@@ -5,32 +5,72 @@ Zerodha Kite API service for authentication and trading operations.
 import asyncio
 import base64
 import json
-from datetime import datetime, timezone
+from datetime import datetime, time as dt_time, timedelta, timezone
 from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
 
 from cryptography.fernet import Fernet
 from kiteconnect import KiteConnect
 
 from src.config.settings import settings
-from src.db.database import db, COLLECTIONS
 from src.db.models import ZerodhaToken
+from src.db.repositories import ZerodhaTokenRepository
 from src.utils.logging import get_logger
+from src.services.instruments import InstrumentMaster, get_default_instrument_master
+from src.services.market_data import (
+    FallbackMarketDataProvider,
+    KiteMarketDataProvider,
+    MarketDataProvider,
+    YFinanceMarketDataProvider,
+)
 from src.services.yfinance_service import YFinanceService
 
 logger = get_logger(__name__)
 
+IST = ZoneInfo("Asia/Kolkata")
+# Kite access tokens are invalidated daily at 06:00 IST
+TOKEN_EXPIRY_TIME_IST = dt_time(hour=6, minute=0)
+
+# Validated Kite sessions shared by every ZerodhaService instance:
+# user_id -> {"kite": KiteConnect, "expires_at": datetime}
+_kite_sessions: Dict[str, Dict] = {}
+_session_locks: Dict[str, asyncio.Lock] = {}
+
+
+def next_token_expiry(after: Optional[datetime] = None) -> datetime:
+    """Return the next 06:00 IST after ``after`` (now if None), when Kite tokens expire."""
+    after = (after or datetime.now(timezone.utc)).astimezone(IST)
+    expiry = datetime.combine(after.date(), TOKEN_EXPIRY_TIME_IST, tzinfo=IST)
+    if after >= expiry:
+        expiry += timedelta(days=1)
+    return expiry
+
+
+def invalidate_kite_session(user_id: str) -> None:
+    """Drop a cached Kite session so the next call re-validates the stored token."""
+    if _kite_sessions.pop(user_id, None) is not None:
+        logger.info(f"Kite session for user {user_id} invalidated")
+
 
 class ZerodhaService:
     """Service for Zerodha Kite API operations."""
     
-    def __init__(self):
-        if not settings.zerodha_api_key or not settings.zerodha_api_secret:
+    def __init__(self, kite: Optional[KiteConnect] = None, instrument_master: Optional[InstrumentMaster] = None):
+        """Initialize the service.
+        
+        Args:
+            kite: Client used for every user instead of stored sessions (e.g., a
+                  ``SimulatedKite`` for offline runs). Credentials are not
+                  required when a client is injected.
+            instrument_master: Instrument master to use. Defaults to the process-wide one.
+        """
+        if kite is None and (not settings.zerodha_api_key or not settings.zerodha_api_secret):
             raise ValueError(
                 "Zerodha API credentials not found. Please set ZERODHA_API_KEY and "
                 "ZERODHA_API_SECRET in your .env file. See README_REBALANCING.md for setup instructions."
             )
         
-        if not settings.encryption_key:
+        if kite is None and not settings.encryption_key:
             raise ValueError(
                 "Encryption key not found. Please set ENCRYPTION_KEY in your .env file. "
                 "Generate one with: python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\""
@@ -39,10 +79,13 @@ class ZerodhaService:
         self.api_key = settings.zerodha_api_key
         self.api_secret = settings.zerodha_api_secret
         self.encryption_key = settings.encryption_key.encode()
-        self.fernet = Fernet(self.encryption_key)
-        self.kite = None
+        self.fernet = Fernet(self.encryption_key) if settings.encryption_key else None
+        self.kite = kite
+        self._injected_kite = kite
         self.redirect_url = "http://localhost:8080/callback"
         self.yfinance_service = YFinanceService()
+        self.instrument_master = instrument_master or get_default_instrument_master()
+        self.tokens = ZerodhaTokenRepository()
         
     def _encrypt_token(self, token: str) -> str:
         """Encrypt access token for storage."""
@@ -52,12 +95,34 @@ class ZerodhaService:
         """Decrypt access token from storage."""
         return self.fernet.decrypt(encrypted_token.encode()).decode()
     
+    def _get_cached_session(self, user_id: str) -> Optional[KiteConnect]:
+        session = _kite_sessions.get(user_id)
+        if session is None:
+            return None
+        if datetime.now(timezone.utc) >= session["expires_at"]:
+            invalidate_kite_session(user_id)
+            return None
+        return session["kite"]
+    
+    def _cache_session(self, user_id: str, access_token: str) -> KiteConnect:
+        kite = KiteConnect(api_key=self.api_key)
+        kite.set_access_token(access_token)
+        # Kite calls this hook right before raising TokenException
+        kite.set_session_expiry_hook(lambda: invalidate_kite_session(user_id))
+        _kite_sessions[user_id] = {"kite": kite, "expires_at": next_token_expiry()}
+        return kite
+    
     async def get_stored_token(self, user_id: str) -> Optional[str]:
-        """Get stored access token for user."""
-        token_doc = db[COLLECTIONS["zerodha_tokens"]].find_one({
-            "user_id": user_id,
-            "is_active": True
-        })
+        """Get stored access token for user.
+        
+        A token already backing a cached session is returned without another
+        validation round-trip.
+        """
+        cached_kite = self._get_cached_session(user_id)
+        if cached_kite is not None:
+            return cached_kite.access_token
+        
+        token_doc = await self.tokens.find_active(user_id)
         
         if not token_doc:
             return None
@@ -69,7 +134,8 @@ class ZerodhaService:
             # Test if token is valid by making a simple API call
             test_kite = KiteConnect(api_key=self.api_key)
             test_kite.set_access_token(decrypted_token)
-            test_kite.profile()  # This will raise an exception if token is invalid
+            # This will raise an exception if token is invalid
+            await asyncio.to_thread(test_kite.profile)
             
             logger.info(f"Valid access token found for user {user_id}")
             return decrypted_token
@@ -77,31 +143,25 @@ class ZerodhaService:
         except Exception as e:
             logger.warning(f"Stored token for user {user_id} is invalid: {e}")
             # Mark token as inactive
-            db[COLLECTIONS["zerodha_tokens"]].update_one(
-                {"user_id": user_id},
-                {"$set": {"is_active": False}}
-            )
+            await self.tokens.deactivate(user_id)
             return None
     
     async def store_token(self, user_id: str, access_token: str):
         """Store encrypted access token in database."""
         encrypted_token = self._encrypt_token(access_token)
         
-        # Deactivate any existing tokens for this user
-        db[COLLECTIONS["zerodha_tokens"]].update_many(
-            {"user_id": user_id},
-            {"$set": {"is_active": False}}
-        )
-        
-        # Store new token
+        # Store new token, replacing any existing one for this user
+        created_time = datetime.now(timezone.utc)
         token_doc = ZerodhaToken(
             user_id=user_id,
             encrypted_access_token=encrypted_token,
-            created_time=datetime.now(timezone.utc),
+            created_time=created_time,
+            expires_at=next_token_expiry(created_time),
             is_active=True
         )
         
-        db[COLLECTIONS["zerodha_tokens"]].insert_one(token_doc.model_dump(exclude={"id"}))
+        await self.tokens.save_active(token_doc)
+        invalidate_kite_session(user_id)
         logger.info(f"Access token stored for user {user_id}")
     
     def get_login_url(self) -> str:
@@ -133,29 +193,43 @@ class ZerodhaService:
             raise HTTPException(status_code=400, detail=f"Authentication failed: {e}")
     
     async def get_authenticated_kite(self, user_id: str) -> KiteConnect:
-        """Get authenticated KiteConnect instance."""
-        access_token = await self.get_stored_token(user_id)
+        """Get authenticated KiteConnect instance.
         
-        if not access_token:
-            raise ValueError(f"No valid access token found for user {user_id}. Please re-authenticate.")
+        The stored token is validated once and the session is reused until the
+        token's daily expiry or the first TokenException, whichever comes first.
+        """
+        if self._injected_kite is not None:
+            return self._injected_kite
         
-        kite = KiteConnect(api_key=self.api_key)
-        kite.set_access_token(access_token)
-        return kite
+        kite = self._get_cached_session(user_id)
+        if kite is not None:
+            return kite
+        
+        lock = _session_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            # Another coroutine may have validated the token while we waited
+            kite = self._get_cached_session(user_id)
+            if kite is not None:
+                return kite
+            
+            access_token = await self.get_stored_token(user_id)
+            
+            if not access_token:
+                raise ValueError(f"No valid access token found for user {user_id}. Please re-authenticate.")
+            
+            return self._cache_session(user_id, access_token)
     
     async def get_portfolio_summary(self, user_id: str) -> Dict:
         """Get complete portfolio summary including holdings, positions, and funds."""
         kite = await self.get_authenticated_kite(user_id)
         
         try:
-            # Get holdings
-            holdings = kite.holdings()
-            
-            # Get positions
-            positions = kite.positions()
-            
-            # Get funds/margins
-            margins = kite.margins()
+            # Get holdings, positions and funds/margins concurrently
+            holdings, positions, margins = await asyncio.gather(
+                asyncio.to_thread(kite.holdings),
+                asyncio.to_thread(kite.positions),
+                asyncio.to_thread(kite.margins),
+            )
             
             # Calculate total portfolio value
             # Holdings: last_price * opening_quantity
@@ -189,10 +263,23 @@ class ZerodhaService:
     
     async def place_order(self, user_id: str, variety: str, exchange: str, 
                          tradingsymbol: str, transaction_type: str, quantity: int,
-                         product: str, order_type: str, price: Optional[float] = None) -> str:
-        """Place an order on Zerodha."""
+                         product: str, order_type: str, price: Optional[float] = None,
+                         tag: Optional[str] = None) -> str:
+        """Place an order on Zerodha.
+        
+        The order is validated against the instrument master (lot size, tick
+        size, freeze quantity) before it is sent. ``tag`` (up to 20
+        alphanumeric characters) is echoed back in the order book.
+        """
         kite = await self.get_authenticated_kite(user_id)
         
+        try:
+            await self.instrument_master.ensure_loaded(exchange, kite)
+        except Exception as e:
+            logger.warning(f"Instrument master unavailable, placing {tradingsymbol} order unvalidated: {e}")
+        else:
+            self.instrument_master.validate_order(tradingsymbol, quantity, exchange, price)
+        
         try:
             order_params = {
                 'variety': variety,
@@ -206,8 +293,11 @@ class ZerodhaService:
             
             if price:
                 order_params['price'] = price
+            if tag:
+                order_params['tag'] = tag
                 
-            order_id = kite.place_order(**order_params)
+            # Run the HTTP call in a worker thread so concurrent orders overlap
+            order_id = await asyncio.to_thread(kite.place_order, **order_params)
             logger.info(f"Order placed successfully: {order_id}")
             return order_id
             
@@ -215,63 +305,97 @@ class ZerodhaService:
             logger.error(f"Failed to place order: {e}")
             raise
     
-    async def get_instrument_token(self, user_id: str, tradingsymbol: str, exchange: str = "NSE") -> Optional[int]:
-        """Get instrument token for a given symbol."""
+    async def get_orders(self, user_id: str) -> List[Dict]:
+        """Get the day's full order book in a single request."""
         kite = await self.get_authenticated_kite(user_id)
         
         try:
-            instruments = kite.instruments(exchange)
-            for instrument in instruments:
-                if instrument['tradingsymbol'] == tradingsymbol:
-                    return instrument['instrument_token']
-            return None
+            return await asyncio.to_thread(kite.orders)
+        except Exception as e:
+            logger.error(f"Failed to get orders: {e}")
+            raise
+    
+    async def get_order_history(self, user_id: str, order_id: str) -> List[Dict]:
+        """Get every state change of one order, oldest first."""
+        kite = await self.get_authenticated_kite(user_id)
+        
+        try:
+            return await asyncio.to_thread(kite.order_history, order_id)
+        except Exception as e:
+            logger.error(f"Failed to get history of order {order_id}: {e}")
+            raise
+    
+    async def get_basket_margins(self, user_id: str, orders: List[Dict]) -> Dict:
+        """Get the margin required for a whole basket of orders in one request.
+        
+        Args:
+            user_id: Zerodha user ID
+            orders: Orders with 'exchange', 'tradingsymbol', 'transaction_type',
+                    'quantity', 'product', 'order_type' and optionally 'variety' and 'price'
+        
+        Returns:
+            Kite's basket margin response with 'initial', 'final' (after margin
+            benefits across the basket) and per-order 'orders' breakdowns
+        """
+        kite = await self.get_authenticated_kite(user_id)
+        params = [
+            {
+                'variety': order.get('variety', 'regular'),
+                'price': order.get('price') or 0,
+                'trigger_price': order.get('trigger_price') or 0,
+                **{key: order[key] for key in (
+                    'exchange', 'tradingsymbol', 'transaction_type', 'quantity', 'product', 'order_type'
+                )},
+            }
+            for order in orders
+        ]
+        
+        try:
+            return await asyncio.to_thread(kite.basket_order_margins, params, consider_positions=True)
+        except Exception as e:
+            logger.error(f"Failed to get basket margins: {e}")
+            raise
+    
+    async def get_instrument_token(self, user_id: str, tradingsymbol: str, exchange: str = "NSE") -> Optional[int]:
+        """Get instrument token for a given symbol from the cached instrument master."""
+        try:
+            kite = await self.get_authenticated_kite(user_id)
+        except ValueError:
+            # Today's dump may already be cached on disk
+            kite = None
+        
+        try:
+            await self.instrument_master.ensure_loaded(exchange, kite)
+            instrument = self.instrument_master.get(tradingsymbol, exchange)
+            return instrument['instrument_token'] if instrument else None
             
         except Exception as e:
             logger.error(f"Failed to get instrument token: {e}")
             raise
     
+    async def get_market_data_provider(self, user_id: str) -> MarketDataProvider:
+        """Get the LTP provider chain for a user: Kite bulk quotes, then yfinance."""
+        providers: List[MarketDataProvider] = []
+        try:
+            kite = await self.get_authenticated_kite(user_id)
+            providers.append(KiteMarketDataProvider(kite))
+        except Exception as e:
+            logger.warning(f"Kite session unavailable for quotes, falling back to yfinance: {e}")
+        providers.append(YFinanceMarketDataProvider(self.yfinance_service))
+        return FallbackMarketDataProvider(providers)
+
     async def get_ltp(self, user_id: str, instruments: List[str]) -> Dict:
-        """Get Last Traded Price (LTP) for given instruments using the yfinance service.
+        """Get Last Traded Price (LTP) for given instruments.
+
+        Prices come from Kite in bulk (the venue orders are placed on), with
+        yfinance as a fallback for anything Kite could not price.
 
         Input instruments are expected as ["NSE:RELIANCE", "BSE:SBIN", ...].
         Returns a dict like {"NSE:RELIANCE": {"last_price": 1234.5}, ...}.
         """
-        results: Dict[str, Dict[str, float]] = {}
-
-        def to_yf_symbol(instrument: str) -> Optional[str]:
-            try:
-                exchange, symbol = instrument.split(":", 1)
-            except ValueError:
-                return None
-            exchange = exchange.upper().strip()
-            # For NSE stocks, just return the symbol (yfinance service will add .NS)
-            # For BSE stocks, return with .BO suffix
-            if exchange == "NSE":
-                return symbol.strip()
-            elif exchange == "BSE":
-                return f"{symbol.strip()}.BO"
-            else:
-                return None
-
-        for inst in instruments:
-            yf_symbol = to_yf_symbol(inst)
-            if not yf_symbol:
-                logger.warning(f"Invalid instrument format: {inst}")
-                continue
-                
-            try:
-                # Use the yfinance service to get LTP
-                ltp = self.yfinance_service.get_stock_ltp(yf_symbol)
-                if ltp is not None:
-                    results[inst] = {"last_price": ltp}
-                    logger.debug(f"Successfully fetched LTP for {inst} ({yf_symbol}): ₹{ltp}")
-                else:
-                    logger.warning(f"No LTP available for {inst} ({yf_symbol})")
-            except Exception as e:
-                logger.warning(f"yfinance LTP fetch failed for {inst} ({yf_symbol}): {e}")
-                continue
-
-        return results
+        provider = await self.get_market_data_provider(user_id)
+        prices = await provider.get_ltp(instruments)
+        return {inst: {"last_price": ltp} for inst, ltp in prices.items()}
 
 
 # Authentication functions are now in src.services.auth_server
@@ -0,0 +1,127 @@
+"""Vectorized technical indicators over (n_tickers x n_days) price panels.
+
+Every function takes 2-D arrays with one row per ticker and one column per
+trading day (oldest first, NaN before a ticker's first bar; ``PriceStore.get_panel``
+carries the last close over later gaps) and returns one
+value per ticker, so indicators for a whole index are computed in a handful
+of NumPy operations instead of a per-ticker pandas loop.
+"""
+
+import warnings
+from typing import Dict
+
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def _last(values: np.ndarray, window: int) -> np.ndarray:
+    return values[:, -window:]
+
+
+def _nanmean(values: np.ndarray) -> np.ndarray:
+    # All-NaN rows (tickers without enough history) legitimately produce NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmean(values, axis=1)
+
+
+def _nanstd(values: np.ndarray) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanstd(values, axis=1, ddof=1)
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index using simple averages of the last ``period`` moves."""
+    deltas = _last(np.diff(close, axis=1), period)
+    # clip keeps NaN (missing bars) so they are excluded from the averages
+    avg_gain = _nanmean(np.clip(deltas, 0.0, None))
+    avg_loss = _nanmean(np.clip(-deltas, 0.0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        result = 100.0 - 100.0 / (1.0 + rs)
+    # No losses in the window means maximal strength
+    return np.where((avg_loss == 0) & (avg_gain > 0), 100.0, result)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range over the last ``period`` days."""
+    prev_close = close[:, :-1]
+    true_range = np.fmax(
+        high[:, 1:] - low[:, 1:],
+        np.fmax(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close)),
+    )
+    return _nanmean(_last(true_range, period))
+
+
+def rolling_return(close: np.ndarray, days: int) -> np.ndarray:
+    """Percentage return over the last ``days`` trading days."""
+    if close.shape[1] <= days:
+        return np.full(close.shape[0], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (close[:, -1] / close[:, -1 - days] - 1.0) * 100.0
+
+
+def realized_volatility(close: np.ndarray, window: int = 20) -> np.ndarray:
+    """Annualized standard deviation of daily log returns, in percent."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(close), axis=1)
+    return _nanstd(_last(log_returns, window)) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100.0
+
+
+def vwap_distance(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, window: int = 20
+) -> np.ndarray:
+    """Percentage distance of the last close from the ``window``-day VWAP."""
+    typical = (_last(high, window) + _last(low, window) + _last(close, window)) / 3.0
+    vol = _last(volume, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.nansum(typical * vol, axis=1) / np.nansum(np.where(np.isnan(typical), np.nan, vol), axis=1)
+        return (close[:, -1] / vwap - 1.0) * 100.0
+
+
+def volume_zscore(volume: np.ndarray, window: int = 20) -> np.ndarray:
+    """Z-score of the last day's volume against the preceding ``window`` days."""
+    history = volume[:, -window - 1:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (volume[:, -1] - _nanmean(history)) / _nanstd(history)
+
+
+def range_position(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                   window: int = TRADING_DAYS_PER_YEAR) -> np.ndarray:
+    """Position of the last close within the ``window``-day range (0 = low, 1 = high)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        range_high = np.nanmax(_last(high, window), axis=1)
+        range_low = np.nanmin(_last(low, window), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (close[:, -1] - range_low) / (range_high - range_low)
+
+
+def compute_indicators(panel: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Compute the standard indicator set for every ticker in a price panel.
+
+    Args:
+        panel: Dictionary with 'open', 'high', 'low', 'close' and 'volume'
+               arrays of shape (n_tickers, n_days)
+
+    Returns:
+        Dictionary mapping indicator names to arrays of shape (n_tickers,)
+    """
+    high, low, close, volume = panel["high"], panel["low"], panel["close"], panel["volume"]
+    atr_14 = atr(high, low, close, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        atr_pct = atr_14 / close[:, -1] * 100.0
+    return {
+        "rsi_14": rsi(close, 14),
+        "atr_14": atr_14,
+        "atr_14_pct": atr_pct,
+        "return_5d_pct": rolling_return(close, 5),
+        "return_20d_pct": rolling_return(close, 20),
+        "return_60d_pct": rolling_return(close, 60),
+        "volatility_20d_pct": realized_volatility(close, 20),
+        "vwap_20d_distance_pct": vwap_distance(high, low, close, volume, 20),
+        "volume_zscore_20d": volume_zscore(volume, 20),
+        "range_52w_position": range_position(high, low, close, TRADING_DAYS_PER_YEAR),
+    }
@@ -0,0 +1,85 @@
+"""Indian market hours (NSE cash segment) in IST."""
+
+import asyncio
+from datetime import datetime, timedelta, time as dt_time
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+
+IST = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = dt_time(hour=9, minute=15)
+MARKET_PREOPEN_TARGET = dt_time(hour=9, minute=14)
+# Pre-open price discovery ends at 09:08; from then on LTPs carry the equilibrium price
+MARKET_ARM_TIME = dt_time(hour=9, minute=10)
+MARKET_CLOSE = dt_time(hour=15, minute=30)
+
+
+def now_ist() -> datetime:
+    return datetime.now(IST)
+
+
+def is_weekday(d: datetime) -> bool:
+    # Monday=0, Sunday=6
+    return d.weekday() < 5
+
+
+def is_market_open_ist(current: Optional[datetime] = None) -> bool:
+    """Return True if current IST time is during market hours (9:15-15:30) on a weekday."""
+    current = current or now_ist()
+    if not is_weekday(current):
+        return False
+    t = current.time()
+    return (t >= MARKET_OPEN) and (t < MARKET_CLOSE)
+
+
+def next_session_time(target: dt_time, after: Optional[datetime] = None) -> datetime:
+    """Compute the next weekday datetime at 'target' IST (a time before the open) starting from 'after'.
+    Special case: if time is between 'target' and 9:15 on a weekday, return 'after' (immediate, no wait).
+    """
+    after = after or now_ist()
+
+    # If weekday and between target and 09:15, start immediately (no wait)
+    if is_weekday(after):
+        t = after.time()
+        if target <= t < MARKET_OPEN:
+            return after
+        if t < target:
+            return datetime.combine(after.date(), target, tzinfo=IST)
+
+    # Otherwise, schedule for next weekday at target
+    date = after.date()
+    if is_weekday(after):
+        # If it's a weekday but already past market open, move to next day
+        date = date + timedelta(days=1)
+    # For weekends, the while loop below will advance to next weekday
+    target_dt = datetime.combine(date, target, tzinfo=IST)
+    while target_dt.weekday() >= 5:  # 5=Sat, 6=Sun
+        date = date + timedelta(days=1)
+        target_dt = datetime.combine(date, target, tzinfo=IST)
+    return target_dt
+
+
+def next_9_14_ist(after: Optional[datetime] = None) -> datetime:
+    """Compute the next 9:14 AM IST on a weekday starting from 'after'.
+    Special case: if time is between 9:14 and 9:15 on a weekday, return 'after' (immediate, no wait).
+    """
+    return next_session_time(MARKET_PREOPEN_TARGET, after)
+
+
+def next_market_open(after: Optional[datetime] = None) -> datetime:
+    """Compute the next 9:15 AM IST on a weekday starting from 'after'."""
+    after = after or now_ist()
+    if is_weekday(after) and after.time() < MARKET_OPEN:
+        return datetime.combine(after.date(), MARKET_OPEN, tzinfo=IST)
+    return next_session_time(MARKET_OPEN, after)
+
+
+async def sleep_until(target_dt: datetime):
+    """Async sleep until target datetime."""
+    while True:
+        now = now_ist()
+        seconds = (target_dt - now).total_seconds()
+        if seconds <= 0:
+            break
+        # Sleep in chunks to allow graceful interruption
+        await asyncio.sleep(min(seconds, 60.0))
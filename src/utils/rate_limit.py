@@ -0,0 +1,70 @@
+"""Rate limiting utilities shared by threads and coroutines."""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Token bucket limiter usable from worker threads and from async code.
+
+    Tokens are reserved up front, so concurrent callers are spaced out in the
+    order they arrive instead of all waking up at once.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size. Defaults to ``max(1, rate)``.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block the calling thread until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_host_limiters: Dict[str, TokenBucket] = {}
+_host_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(host: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """Return the process-wide limiter for a host, creating it on first use.
+
+    The rate and capacity only apply when the limiter is created; later callers
+    share the existing bucket so every client of a host draws from one budget.
+    """
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(rate, capacity)
+            _host_limiters[host] = limiter
+        return limiter
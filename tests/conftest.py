@@ -0,0 +1,17 @@
+"""
+Shared pytest setup.
+
+Settings are read when ``src`` is first imported, so the required variables
+get harmless defaults here (a real ``.env`` or environment still wins). No
+test talks to MongoDB, Gemini or Kite.
+"""
+
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="nifty-tests-")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB_NAME", "nifty_test")
+os.environ.setdefault("CACHE_DIR", os.path.join(_scratch, "cache"))
+os.environ.setdefault("DATA_DIR", os.path.join(_scratch, "data"))
@@ -0,0 +1,22 @@
+"""Tests for InstrumentMaster day reloads."""
+
+import pytest
+
+from src.services import instruments
+from src.services.instruments import InstrumentMaster
+from src.services.kite_simulator import SimulatedKite
+
+
+@pytest.mark.asyncio
+async def test_reload_drops_tokens_of_the_previous_dump(tmp_path, monkeypatch):
+    master = InstrumentMaster(tmp_path)
+    monkeypatch.setattr(instruments, "_trading_day", lambda: "2025-08-18")
+    await master.ensure_loaded("NSE", SimulatedKite({"INFY": 1500.0, "TCS": 3900.0}, latency=0))
+    tcs_token = master.get("TCS")["instrument_token"]
+
+    monkeypatch.setattr(instruments, "_trading_day", lambda: "2025-08-19")
+    await master.ensure_loaded("NSE", SimulatedKite({"INFY": 1500.0}, latency=0))
+
+    assert master.get("TCS") is None
+    assert master.get_by_token(tcs_token) is None
+    assert master.get_by_token(master.get("INFY")["instrument_token"])["tradingsymbol"] == "INFY"
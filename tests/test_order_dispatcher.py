@@ -0,0 +1,121 @@
+"""Tests for OrderDispatcher and OrderTracker against SimulatedKite."""
+
+import pytest
+from kiteconnect import exceptions as kite_exceptions
+
+from src.services.instruments import InstrumentMaster
+from src.services.kite_simulator import SimulatedKite
+from src.services.order_dispatcher import OrderDispatcher, RetryPolicy, order_tag
+from src.services.order_tracker import OrderTracker
+from src.services.zerodha_service import ZerodhaService
+
+PRICES = {"INFY": 1500.0, "TCS": 3900.0, "SBIN": 800.0}
+
+
+class TimeoutAfterAcceptKite(SimulatedKite):
+    """Accepts the first ``timeouts`` orders but raises as if their response never arrived.
+
+    With ``reject_timed_out`` the exchange also rejects those orders.
+    """
+
+    def __init__(self, *args, timeouts: int = 1, reject_timed_out: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeouts = timeouts
+        self.reject_timed_out = reject_timed_out
+
+    def place_order(self, *args, **kwargs) -> str:
+        order_id = super().place_order(*args, **kwargs)
+        if self.timeouts:
+            self.timeouts -= 1
+            if self.reject_timed_out:
+                with self._lock:
+                    order = self._orders[order_id]
+                    self._blocked -= order["_blocked"]
+                    order.update(status="REJECTED", status_message="Simulated rejection",
+                                 pending_quantity=0, _blocked=0.0)
+            raise kite_exceptions.NetworkException("Read timed out")
+        return order_id
+
+
+def make_service(kite: SimulatedKite, tmp_path) -> ZerodhaService:
+    return ZerodhaService(kite=kite, instrument_master=InstrumentMaster(tmp_path / "instruments"))
+
+
+def make_dispatcher(service: ZerodhaService) -> OrderDispatcher:
+    retry_policy = RetryPolicy(initial_backoff=0.01, max_attempts=3, jitter=0.0, respect_market_hours=False)
+    return OrderDispatcher(service, "SIM001", retry_policy=retry_policy, orders_per_second=100)
+
+
+def buy(ticker: str, quantity: int) -> dict:
+    return {"ticker": ticker, "action": "BUY", "quantity": quantity, "exchange": "NSE"}
+
+
+def sell(ticker: str, quantity: int) -> dict:
+    return {"ticker": ticker, "action": "SELL", "quantity": quantity, "exchange": "NSE"}
+
+
+@pytest.mark.asyncio
+async def test_timeout_after_accept_adopts_the_accepted_order(tmp_path):
+    kite = TimeoutAfterAcceptKite(PRICES, cash=100_000, latency=0, fill_delay=0, seed=1)
+    tracker = OrderTracker(make_service(kite, tmp_path), "SIM001", poll_interval=0.01)
+    dispatcher = make_dispatcher(tracker.zerodha_service)
+
+    [result] = await dispatcher.dispatch([buy("INFY", 10)], tracker=tracker, plan_id="plan")
+
+    book = kite.orders()
+    assert len(book) == 1
+    assert result["status"] == "PLACED"
+    assert result["deduplicated"]
+    assert result["order_id"] == book[0]["order_id"]
+    assert book[0]["tag"] == order_tag("plan", buy("INFY", 10))
+    assert result["order_id"] in tracker.orders
+
+
+@pytest.mark.asyncio
+async def test_rejected_tag_match_is_placed_again(tmp_path):
+    kite = TimeoutAfterAcceptKite(PRICES, cash=100_000, latency=0, fill_delay=0, seed=1, reject_timed_out=True)
+    dispatcher = make_dispatcher(make_service(kite, tmp_path))
+
+    [result] = await dispatcher.dispatch([buy("INFY", 10)], plan_id="plan")
+
+    statuses = sorted(order["status"] for order in kite.orders())
+    assert statuses == ["COMPLETE", "REJECTED"]
+    assert result["status"] == "PLACED"
+    assert not result["deduplicated"]
+
+
+@pytest.mark.asyncio
+async def test_sells_fill_before_buys_are_placed(tmp_path):
+    kite = SimulatedKite(PRICES, holdings={"TCS": 10}, cash=0, latency=0, fill_delay=0.02, seed=1)
+    tracker = OrderTracker(make_service(kite, tmp_path), "SIM001", poll_interval=0.01)
+    dispatcher = make_dispatcher(tracker.zerodha_service)
+
+    results = await dispatcher.dispatch([buy("INFY", 20), sell("TCS", 10)], tracker=tracker, plan_id="plan")
+    await tracker.wait_for([r["order_id"] for r in results], timeout=5.0)
+
+    assert [r["action"] for r in results] == ["SELL", "BUY"]
+    # The buy needs the sell proceeds; placed any earlier it would be rejected for funds
+    assert [tracker.orders[r["order_id"]]["status"] for r in results] == ["COMPLETE", "COMPLETE"]
+    assert tracker.fills_by_ticker() == {"TCS": -10, "INFY": 20}
+
+
+@pytest.mark.asyncio
+async def test_simulator_rejects_unfunded_orders(tmp_path):
+    kite = SimulatedKite(PRICES, holdings={"SBIN": 5}, cash=1_000, latency=0, fill_delay=0, seed=1)
+    service = make_service(kite, tmp_path)
+
+    unfunded = await service.place_order("SIM001", "regular", "NSE", "INFY", "BUY", 1, "CNC", "MARKET")
+    oversold = await service.place_order("SIM001", "regular", "NSE", "SBIN", "SELL", 6, "CNC", "MARKET")
+    book = {order["order_id"]: order for order in await service.get_orders("SIM001")}
+
+    assert book[unfunded]["status_message"] == "Insufficient funds"
+    assert book[oversold]["status_message"] == "Insufficient holdings"
+
+
+def test_simulator_rate_limits_order_placement():
+    kite = SimulatedKite(PRICES, cash=1_000_000, latency=0, orders_per_second=2, seed=1)
+    kite.place_order("regular", "NSE", "SBIN", "BUY", 1, "CNC", "MARKET")
+    kite.place_order("regular", "NSE", "SBIN", "BUY", 1, "CNC", "MARKET")
+
+    with pytest.raises(kite_exceptions.NetworkException):
+        kite.place_order("regular", "NSE", "SBIN", "BUY", 1, "CNC", "MARKET")
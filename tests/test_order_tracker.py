@@ -0,0 +1,117 @@
+"""Tests for OrderTracker fed by FakePostbackSource."""
+
+import asyncio
+
+import pytest
+
+from src.services.order_tracker import (
+    FakePostbackSource,
+    OrderTracker,
+    postback_checksum,
+    verify_postback_checksum,
+)
+
+BUY = {"ticker": "INFY", "action": "BUY", "quantity": 10, "price": 1500.0}
+SELL = {"ticker": "TCS", "action": "SELL", "quantity": 4, "price": 3900.0}
+
+
+@pytest.fixture
+def tracker():
+    return OrderTracker(None, "AB1234", use_polling=False)
+
+
+def test_postback_checksum_round_trip(tracker):
+    tracker.track("1001", BUY)
+    payload = FakePostbackSource(tracker, api_secret="secret").payload("1001")
+
+    assert payload["checksum"] == postback_checksum("1001", payload["order_timestamp"], "secret")
+    assert verify_postback_checksum(payload, "secret")
+    assert not verify_postback_checksum(payload, "other-secret")
+
+
+def test_postback_fills_tracked_order(tracker):
+    tracker.track("1001", BUY)
+    FakePostbackSource(tracker).emit("1001", average_price=1501.5)
+
+    order = tracker.orders["1001"]
+    assert order["status"] == "COMPLETE"
+    assert order["filled_quantity"] == 10
+    assert order["average_price"] == 1501.5
+    assert tracker.fully_filled(["1001"])
+
+
+def test_fill_before_track_is_applied_on_track(tracker):
+    postbacks = FakePostbackSource(tracker)
+    postbacks.emit("1001", action=BUY, average_price=1499.0)
+    assert "1001" not in tracker.orders
+
+    tracker.track("1001", BUY)
+
+    assert tracker.orders["1001"]["status"] == "COMPLETE"
+    assert tracker.orders["1001"]["filled_quantity"] == 10
+    assert tracker.is_terminal("1001")
+
+
+def test_early_open_update_does_not_replace_early_fill(tracker):
+    postbacks = FakePostbackSource(tracker)
+    postbacks.emit("1001", action=BUY)
+    postbacks.emit("1001", status="OPEN", action=BUY)
+
+    tracker.track("1001", BUY)
+
+    assert tracker.orders["1001"]["status"] == "COMPLETE"
+
+
+def test_late_open_update_does_not_reopen_terminal_order(tracker):
+    tracker.track("1001", BUY)
+    postbacks = FakePostbackSource(tracker)
+    postbacks.emit("1001")
+    postbacks.emit("1001", status="OPEN", filled_quantity=0)
+
+    assert tracker.orders["1001"]["status"] == "COMPLETE"
+    assert tracker.orders["1001"]["filled_quantity"] == 10
+
+
+def test_partial_fill_is_not_fully_filled(tracker):
+    tracker.track("1001", BUY)
+    FakePostbackSource(tracker).emit("1001", status="CANCELLED", filled_quantity=6)
+
+    assert tracker.is_terminal("1001")
+    assert not tracker.fully_filled(["1001"])
+    assert tracker.fills_by_ticker() == {"INFY": 6}
+
+
+def test_fills_by_ticker_nets_buys_and_sells(tracker):
+    tracker.track("1001", BUY)
+    tracker.track("1002", SELL)
+    postbacks = FakePostbackSource(tracker)
+    postbacks.emit("1001")
+    postbacks.emit("1002")
+
+    assert tracker.fills_by_ticker() == {"INFY": 10, "TCS": -4}
+
+
+@pytest.mark.asyncio
+async def test_wait_for_returns_when_postbacks_arrive(tracker):
+    tracker.track("1001", BUY)
+    tracker.track("1002", SELL)
+    postbacks = FakePostbackSource(tracker)
+    emitters = [
+        asyncio.create_task(postbacks.emit_after(0.01, "1001")),
+        asyncio.create_task(postbacks.emit_after(0.02, "1002", status="REJECTED", filled_quantity=0)),
+    ]
+
+    orders = await tracker.wait_for(["1001", "1002"], timeout=5.0)
+    await asyncio.gather(*emitters)
+
+    assert [order["status"] for order in orders] == ["COMPLETE", "REJECTED"]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_times_out_on_open_orders(tracker):
+    tracker.track("1001", BUY)
+
+    orders = await tracker.wait_for(["1001", "unknown"], timeout=0.05)
+
+    assert [order["order_id"] for order in orders] == ["1001"]
+    assert orders[0]["status"] == "PLACED"
@@ -0,0 +1,70 @@
+"""Tests for PriceTable fed by FakeTickSource."""
+
+import time
+
+import pytest
+
+from src.services.price_feed import FakeTickSource, PriceTable, StreamingMarketDataProvider
+
+
+def test_push_records_ltp_and_spread():
+    table = PriceTable()
+    FakeTickSource(table, spread_pct=0.1).push("NSE:INFY", 1500.0)
+
+    entry = table.get("NSE:INFY")
+    assert entry["last_price"] == 1500.0
+    assert entry["bid"] == pytest.approx(1499.25)
+    assert entry["ask"] == pytest.approx(1500.75)
+
+
+def test_stale_and_missing_prices_are_omitted():
+    table = PriceTable()
+    table.update("NSE:INFY", 1500.0)
+    table.update("NSE:TCS", 3900.0, timestamp=time.time() - 120)
+
+    assert table.get_ltps(["NSE:INFY", "NSE:TCS", "NSE:SBIN"], max_age=30) == {"NSE:INFY": 1500.0}
+    assert table.get("NSE:TCS", max_age=None)["last_price"] == 3900.0
+
+
+def test_listeners_see_every_tick_and_can_be_removed():
+    table = PriceTable()
+    seen = []
+    listener = lambda instrument, entry: seen.append((instrument, entry["last_price"]))
+    table.add_listener(listener)
+    source = FakeTickSource(table)
+    source.push("NSE:INFY", 1500.0)
+    table.remove_listener(listener)
+    source.push("NSE:INFY", 1501.0)
+
+    assert seen == [("NSE:INFY", 1500.0)]
+
+
+def test_failing_listener_does_not_block_updates():
+    table = PriceTable()
+    table.add_listener(lambda instrument, entry: 1 / 0)
+    FakeTickSource(table).push("NSE:INFY", 1500.0)
+
+    assert table.get("NSE:INFY")["last_price"] == 1500.0
+
+
+@pytest.mark.asyncio
+async def test_random_walk_is_reproducible_with_a_seed():
+    start = {"NSE:INFY": 1500.0, "NSE:TCS": 3900.0}
+    tables = []
+    for _ in range(2):
+        table = PriceTable()
+        await FakeTickSource(table, seed=3).run(start, interval=0, steps=5)
+        tables.append(table.get_ltps(start))
+
+    assert tables[0] == tables[1]
+    assert set(tables[0]) == set(start)
+    assert tables[0] != start
+
+
+@pytest.mark.asyncio
+async def test_streaming_provider_reads_the_table():
+    table = PriceTable()
+    FakeTickSource(table).push("NSE:INFY", 1500.0)
+    provider = StreamingMarketDataProvider(table)
+
+    assert await provider.get_ltp(["NSE:INFY", "NSE:TCS"]) == {"NSE:INFY": 1500.0}
@@ -0,0 +1,24 @@
+"""Tests for PriceStore panels built from stored bars."""
+
+import numpy as np
+
+from src.services.price_store import PriceStore
+
+
+def save_bars(root, symbol, days, closes):
+    bars = np.array([[day, close - 1, close + 1, close - 2, close, 1000.0] for day, close in zip(days, closes)])
+    np.save(root / f"{symbol}.npy", bars)
+
+
+def test_panel_carries_the_last_close_over_missing_dates(tmp_path):
+    save_bars(tmp_path, "A.NS", [100, 101, 102, 103], [10.0, 11.0, 12.0, 13.0])
+    save_bars(tmp_path, "B.NS", [101, 103], [50.0, 52.0])
+    save_bars(tmp_path, "C.NS", [100, 101, 102], [7.0, 8.0, 9.0])
+
+    panel = PriceStore(tmp_path).get_panel(["A.NS", "B.NS", "C.NS"], days=4)
+
+    assert panel["dates"].tolist() == [100, 101, 102, 103]
+    np.testing.assert_array_equal(panel["close"][1], [np.nan, 50.0, 50.0, 52.0])
+    np.testing.assert_array_equal(panel["close"][2], [7.0, 8.0, 9.0, 9.0])
+    assert [panel[name][2, -1] for name in ("open", "high", "low", "volume")] == [9.0, 9.0, 9.0, 0.0]
+    np.testing.assert_array_equal(panel["high"][0], [11.0, 12.0, 13.0, 14.0])
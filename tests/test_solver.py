@@ -0,0 +1,100 @@
+"""Tests for the integer rebalancing solver."""
+
+import random
+
+import pytest
+
+from src.rebalancing import solve_rebalance
+
+
+def random_scenario(rng: random.Random):
+    tickers = [f"STK{i}" for i in range(rng.randint(3, 25))]
+    prices = {t: round(rng.uniform(20, 8000), 2) for t in tickers}
+    held = rng.sample(tickers, rng.randint(0, len(tickers)))
+    quantities = {t: rng.randint(0, 300) for t in held}
+    cash = rng.choice([0.0, rng.uniform(0, 200_000)])
+    basket = rng.sample(tickers, rng.randint(1, len(tickers)))
+    raw = {t: rng.random() for t in basket}
+    weights = {t: w / sum(raw.values()) for t, w in raw.items()}
+    total = cash + sum(prices[t] * q for t, q in quantities.items())
+    return total, weights, prices, quantities, cash
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("order_cost", [0.0, 1_000.0])
+def test_invariants_hold_on_random_portfolios(seed, order_cost):
+    rng = random.Random(seed)
+    total, weights, prices, quantities, cash = random_scenario(rng)
+    min_order_value = rng.choice([0.0, 100.0, 5_000.0])
+    buy_cost_buffer = rng.choice([0.0, 0.01])
+
+    solution = solve_rebalance(total, weights, prices, quantities, cash, min_order_value=min_order_value,
+                               buy_cost_buffer=buy_cost_buffer, order_cost=order_cost)
+
+    assert solution["cash_left"] >= -1e-6
+    assert all(q >= 0 for q in solution["quantities"].values())
+    for ticker, change in solution["trades"].items():
+        assert change != 0
+        assert abs(change) * prices[ticker] >= min_order_value
+        assert solution["quantities"][ticker] == quantities.get(ticker, 0) + change
+    assert solution["orders"] == len(solution["trades"])
+    spent = sum(
+        change * prices[t] * (1 + buy_cost_buffer) if change > 0 else change * prices[t]
+        for t, change in solution["trades"].items()
+    )
+    assert solution["cash_left"] == pytest.approx(cash - spent)
+
+
+def test_sell_proceeds_fund_buys():
+    prices = {"A": 100.0, "B": 100.0}
+    solution = solve_rebalance(10_000, {"B": 1.0}, prices, {"A": 100}, cash=0.0, order_cost=0.0)
+
+    assert solution["trades"] == {"A": -100, "B": 100}
+    assert solution["cash_left"] == pytest.approx(0.0)
+
+
+def test_trades_below_min_order_value_are_not_placed():
+    prices = {"A": 100.0, "B": 100.0}
+    # A is 3 shares under target, below the 500 rupee minimum order
+    solution = solve_rebalance(10_000, {"A": 0.5, "B": 0.5}, prices, {"A": 47, "B": 50}, cash=300.0,
+                               min_order_value=500.0, order_cost=0.0)
+
+    assert solution["trades"] == {}
+    assert solution["cash_left"] == pytest.approx(300.0)
+
+
+def test_order_cost_drops_marginal_orders():
+    prices = {"A": 100.0, "B": 100.0}
+    current = {"A": 4_995, "B": 4_000}
+    total = 1_000_000.0
+    cash = total - sum(prices[t] * q for t, q in current.items())
+    weights = {"A": 0.5, "B": 0.5}
+
+    default = solve_rebalance(total, weights, prices, current, cash)
+    costed = solve_rebalance(total, weights, prices, current, cash, order_cost=total * 0.25 / 100)
+
+    # A is 0.05% of the portfolio off target, below a 0.25% order cost
+    assert set(default["trades"]) == {"A", "B"}
+    assert set(costed["trades"]) == {"B"}
+    assert costed["trades"]["B"] == default["trades"]["B"] == 1_000
+    assert costed["cash_left"] == pytest.approx(default["cash_left"] + 500.0)
+
+
+def test_marginal_sell_is_kept_when_the_buys_need_its_proceeds():
+    prices = {"A": 100.0, "B": 100.0, "C": 100.0}
+    current = {"A": 110, "C": 90}
+    weights = {"A": 10 / 22, "B": 3 / 22, "C": 9 / 22}
+
+    # Selling 10 A corrects 1,000 rupees, below the order cost, but the buy of B needs the cash
+    solution = solve_rebalance(22_000, weights, prices, current, cash=2_000.0, order_cost=1_500.0)
+
+    assert solution["trades"] == {"A": -10, "B": 30}
+    assert solution["cash_left"] == pytest.approx(0.0)
+
+
+def test_unpriced_tickers_are_left_untouched():
+    solution = solve_rebalance(10_000, {"A": 0.5, "B": 0.5}, {"A": 100.0}, {"B": 7}, cash=10_000.0,
+                               order_cost=0.0)
+
+    assert "B" not in solution["quantities"]
+    assert set(solution["trades"]) == {"A"}
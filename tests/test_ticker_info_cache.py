@@ -0,0 +1,41 @@
+"""Tests for TickerInfoCache with fake yfinance fetchers."""
+
+import pytest
+
+from src.services.ticker_info_cache import EmptyInfoError, TickerInfoCache
+
+INFO = {"longName": "Infosys Limited", "currentPrice": 1500.0}
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self) -> None:
+        self.acquired += 1
+
+
+def test_retry_bypasses_the_empty_info_window(tmp_path):
+    payloads = [{}, INFO]
+    cache = TickerInfoCache(root=tmp_path, fetch_info=lambda symbol: payloads.pop(0))
+
+    with pytest.raises(EmptyInfoError):
+        cache.get_info("INFY.NS")
+    with pytest.raises(EmptyInfoError):
+        cache.get_info("INFY.NS")
+    assert payloads == [INFO]
+
+    assert cache.get_info("INFY.NS", retry=True) == INFO
+    assert cache.get_info("INFY.NS") == INFO
+    assert cache.stats()["empty_hits"] == 1
+
+
+def test_rate_limiter_is_acquired_only_for_requests(tmp_path):
+    limiter = CountingLimiter()
+    cache = TickerInfoCache(root=tmp_path, fetch_info=lambda symbol: INFO, fetch_news=lambda symbol: [])
+
+    for _ in range(3):
+        cache.get_info("INFY.NS", rate_limiter=limiter)
+        cache.get_news("INFY.NS", rate_limiter=limiter)
+
+    assert limiter.acquired == 2
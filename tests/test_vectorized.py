@@ -0,0 +1,127 @@
+"""Tests for the vectorized rebalance engine."""
+
+import numpy as np
+import pytest
+
+from src.rebalancing import evaluate_scenarios, scenario_grid, solve_rebalance
+from src.rebalancing.vectorized import summarize
+
+
+def random_batch(seed: int, scenarios: int = 64, tickers: int = 30):
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(20, 8000, size=tickers).round(2)
+    raw = rng.random((scenarios, tickers)) * (rng.random((scenarios, tickers)) < 0.4)
+    raw[:, 0] += 0.01  # every basket holds at least one ticker
+    weights = raw / raw.sum(axis=1, keepdims=True)
+    quantities = rng.integers(0, 300, size=(scenarios, tickers)) * (rng.random((scenarios, tickers)) < 0.5)
+    cash = rng.uniform(0, 200_000, size=scenarios)
+    min_order_value = rng.choice([0.0, 100.0, 5_000.0], size=scenarios)
+    return weights, prices, quantities, cash, min_order_value
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("buy_cost_buffer", [0.0, 0.01])
+def test_cash_and_minimum_order_invariants(seed, buy_cost_buffer):
+    weights, prices, quantities, cash, min_order_value = random_batch(seed)
+
+    results = evaluate_scenarios(weights, prices, quantities, cash, min_order_value=min_order_value,
+                                 buy_cost_buffer=buy_cost_buffer)
+
+    trades = results["trades"]
+    assert (results["cash_left"] >= -1e-6).all()
+    assert (results["quantities"] >= 0).all()
+    assert (results["quantities"] == quantities + trades).all()
+    traded = trades != 0
+    assert (np.abs(trades) * prices >= min_order_value[:, None])[traded].all()
+    assert (results["orders"] == traded.sum(axis=1)).all()
+    assert (results["buys"] + results["sells"] == results["orders"]).all()
+    spent = np.where(trades > 0, trades * prices * (1 + buy_cost_buffer), trades * prices).sum(axis=1)
+    np.testing.assert_allclose(results["cash_left"], cash - spent, atol=1e-6)
+
+
+def test_scenarios_within_target_deficit_are_not_traded():
+    weights, prices, quantities, cash, _ = random_batch(1, scenarios=8)
+    deficit = evaluate_scenarios(weights, prices, quantities, cash)["deficit"]
+
+    results = evaluate_scenarios(weights, prices, quantities, cash, target_deficit=deficit[3])
+
+    skipped = deficit <= deficit[3]
+    assert (results["orders"][skipped] == 0).all()
+    assert (results["orders"][~skipped] > 0).all()
+    np.testing.assert_allclose(results["residual"][skipped], deficit[skipped])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_close_to_solver_without_order_cost(seed):
+    weights, prices, quantities, cash, min_order_value = random_batch(seed, scenarios=16)
+    tickers = [f"STK{i}" for i in range(len(prices))]
+    price_map = dict(zip(tickers, prices.tolist()))
+
+    results = evaluate_scenarios(weights, prices, quantities, cash, min_order_value=min_order_value)
+
+    for i in range(len(cash)):
+        current = {t: int(q) for t, q in zip(tickers, quantities[i]) if q}
+        solution = solve_rebalance(
+            float(results["total_value"][i]), dict(zip(tickers, weights[i])), price_map, current, float(cash[i]),
+            min_order_value=float(min_order_value[i]), order_cost=0.0,
+        )
+        # The closed form adds at most one share per ticker, so it can trail the greedy solver slightly
+        assert results["residual"][i] <= solution["deviation"] + prices.max()
+        assert results["residual"][i] <= results["deficit"][i] + 1e-6
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("order_cost_pct", [0.25, 1.0])
+def test_order_cost_matches_solver(seed, order_cost_pct):
+    weights, prices, quantities, cash, min_order_value = random_batch(seed, scenarios=16)
+    tickers = [f"STK{i}" for i in range(len(prices))]
+    price_map = dict(zip(tickers, prices.tolist()))
+    total_value = quantities @ prices + cash
+    order_cost = total_value * order_cost_pct / 100
+
+    plain = evaluate_scenarios(weights, prices, quantities, cash, min_order_value=min_order_value)
+    results = evaluate_scenarios(weights, prices, quantities, cash, min_order_value=min_order_value,
+                                 order_cost=order_cost)
+
+    compared = 0
+    for i in range(len(cash)):
+        args = (float(total_value[i]), dict(zip(tickers, weights[i])), price_map,
+                {t: int(q) for t, q in zip(tickers, quantities[i]) if q}, float(cash[i]))
+        # Compare where the closed form matches the solver before any order is dropped
+        before = solve_rebalance(*args, min_order_value=float(min_order_value[i]))
+        if before["trades"] != {t: int(q) for t, q in zip(tickers, plain["trades"][i]) if q}:
+            continue
+        solution = solve_rebalance(*args, min_order_value=float(min_order_value[i]), order_cost=float(order_cost[i]))
+        assert results["orders"][i] == solution["orders"]
+        compared += 1
+    assert compared >= len(cash) // 2
+    assert results["orders"].sum() < plain["orders"].sum()
+    assert (results["cash_left"] >= -1e-6).all()
+
+
+def test_marginal_sell_is_kept_when_the_buys_need_its_proceeds():
+    prices = np.array([100.0, 100.0, 100.0])
+    weights = np.array([10, 3, 9]) / 22
+
+    results = evaluate_scenarios(weights, prices, np.array([110, 0, 90]), cash=2_000.0, order_cost=1_500.0)
+
+    assert results["trades"].tolist() == [[-10, 30, 0]]
+    assert results["cash_left"][0] == pytest.approx(0.0)
+
+
+def test_one_dimensional_inputs_broadcast_over_a_grid():
+    grid = scenario_grid(min_order_value=[0.0, 1_000.0], target_deficit=[0.0, 1e12])
+    weights = np.array([0.5, 0.5])
+    prices = np.array([100.0, 250.0])
+
+    results = evaluate_scenarios(
+        weights, prices, np.array([10, 0]), cash=10_000.0,
+        min_order_value=[s["min_order_value"] for s in grid],
+        target_deficit=[s["target_deficit"] for s in grid],
+    )
+    rows = summarize(results, grid)
+
+    assert len(grid) == 4 and results["trades"].shape == (4, 2)
+    assert [row["orders"] for row in rows if row["target_deficit"] == 1e12] == [0, 0]
+    assert all(row["orders"] > 0 for row in rows if row["target_deficit"] == 0.0)
+    assert rows[0] == {**grid[0], **{key: rows[0][key] for key in rows[0] if key not in grid[0]}}